@@ -22,6 +22,7 @@ if config.config_file_name is not None:
 target_metadata = None
 
 from app.models.models import SQLModel
+import app.models.models_mail  # noqa: F401
 
 target_metadata = SQLModel.metadata
 
@@ -0,0 +1,49 @@
+"""mail sync state
+
+Revision ID: 3f6c2a9d8e41
+Revises: b575832a09a9
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d8e41'
+down_revision: Union[str, Sequence[str], None] = 'b575832a09a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('mailsyncstate',
+    sa.Column('mailbox', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('delta_link', sa.Text(), nullable=True),
+    sa.Column('watermark', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('mailbox')
+    )
+    op.create_table('processedemail',
+    sa.Column('message_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('mailbox', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('subject', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('sender', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('received', sa.DateTime(), nullable=True),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('message_id')
+    )
+    op.create_index(op.f('ix_processedemail_mailbox'), 'processedemail', ['mailbox'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_processedemail_mailbox'), table_name='processedemail')
+    op.drop_table('processedemail')
+    op.drop_table('mailsyncstate')
@@ -0,0 +1,56 @@
+"""depot filter indexes
+
+Revision ID: 7b1e4d92c5a3
+Revises: 3f6c2a9d8e41
+Create Date: 2026-10-17 14:03:21.507316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1e4d92c5a3'
+down_revision: Union[str, Sequence[str], None] = '3f6c2a9d8e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The sync tables are created by DataSyncer from the workbook, so a table or column may
+# not exist yet; those are skipped here, and DatabaseClient indexes them when it creates them.
+FILTER_INDEXES = {
+    'DepotMaster': ['container_number', 'customer', 'gate_in_date', 'gate_out_date'],
+    'GateOut': ['container_number', 'customer', 'gate_in_date', 'gate_out_date'],
+}
+
+
+def _missing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in FILTER_INDEXES.items():
+        if not inspector.has_table(table, schema='dbo'):
+            continue
+        existing_columns = {c['name'] for c in inspector.get_columns(table, schema='dbo')}
+        existing_indexes = {i['name'] for i in inspector.get_indexes(table, schema='dbo')}
+        for column in columns:
+            name = f'ix_{table.lower()}_{column}'
+            if column in existing_columns and name not in existing_indexes:
+                yield table, column, name
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, name in list(_missing_indexes()):
+        op.create_index(name, table, [column], unique=False, schema='dbo')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in FILTER_INDEXES.items():
+        if not inspector.has_table(table, schema='dbo'):
+            continue
+        existing_indexes = {i['name'] for i in inspector.get_indexes(table, schema='dbo')}
+        for column in columns:
+            name = f'ix_{table.lower()}_{column}'
+            if name in existing_indexes:
+                op.drop_index(name, table_name=table, schema='dbo')
@@ -0,0 +1,34 @@
+from collections.abc import Callable
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.models_bulk import BulkItemStatus, BulkResult
+
+FAILED_STATUSES = {"conflict", "not_found"}
+
+
+def run_bulk(
+    session: Session, size: int, operation: Callable[[], list[BulkItemStatus]]
+) -> BulkResult:
+    """
+    Run a crud.bulk_* operation in one transaction and summarise its per-item statuses.
+    Items that fail a check are skipped; anything the database rejects rolls back all of them.
+    """
+    if size > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BULK_MAX_ITEMS} items per request",
+        )
+    try:
+        statuses = operation()
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=409, detail=f"Bulk operation rolled back: {e.orig}"
+        )
+    failed = sum(s.status in FAILED_STATUSES for s in statuses)
+    return BulkResult(results=statuses, succeeded=len(statuses) - failed, failed=failed)
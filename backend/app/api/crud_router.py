@@ -0,0 +1,285 @@
+import json
+import os
+import re
+from collections.abc import Callable
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel
+
+from app.api.bulk import run_bulk
+from app.api.deps import SessionDep, get_current_user
+from app.api.export import ExportFormat, stream_export
+from app.api.filters import ListFilters, filter_model
+from app.create_models import JSON_FILE
+from app.crud import bulk_create, bulk_delete, bulk_update, count_rows, read_page
+from app.models import models_depot
+from app.models.models_bulk import BulkResult
+from app.models.models_depot import Message
+
+# Sheets whose routes predate the factory keep their paths and operation names
+LEGACY_ROUTES = {
+    "DepotMaster": ("/depotmaster", "depot_master"),
+    "GateOut": ("/gateout", "gate_out"),
+    "DepotAddressPrice": ("/depotaddress", "depot_addr_price"),
+}
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def crud_router(
+    name: str, prefix: str | None = None, route_name: str | None = None
+) -> APIRouter:
+    """
+    The full route set for a sheet's models as generated by create_models.py ({name},
+    {name}Base, {name}Create, ...): filtered, counted and cursor-paged list, export,
+    bulk create/update/delete and the single-row CRUD routes.
+    """
+    model = getattr(models_depot, name)
+    create_model = getattr(models_depot, f"{name}Create")
+    update_model = getattr(models_depot, f"{name}Update")
+    public_model = getattr(models_depot, f"{name}Public")
+    list_model = getattr(models_depot, f"{name}List")
+    bulk_create_model = getattr(models_depot, f"{name}BulkCreate")
+    bulk_update_model = getattr(models_depot, f"{name}BulkUpdate")
+    filters_model = filter_model(getattr(models_depot, f"{name}Base"))
+    one = route_name or _snake_case(name)
+    many = f"{one}s"
+
+    # Every route needs a logged-in user
+    router = APIRouter(
+        prefix=prefix or f"/{name.lower()}",
+        tags=[name],
+        dependencies=[Depends(get_current_user)],
+    )
+
+    def read_items(
+        session: SessionDep,
+        filters: Annotated[ListFilters, Depends(filters_model)],
+        skip: int = 0,
+        limit: int = 100,
+        after: int | None = None,
+        include_count: bool = True,
+    ) -> Any:
+        if after is not None and filters.sort:
+            raise HTTPException(
+                status_code=400, detail="`after` cannot be combined with `sort`"
+            )
+        where = filters.where(model)
+        order_by = filters.order_by(model) if filters.sort else None
+
+        # Count the matching items (LIST_COUNT_MODE), unless the client opts out
+        count = count_rows(
+            session=session, model=model, where=where, include_count=include_count
+        )
+
+        # Retrieve the filtered items with offset and limit, or after the cursor
+        items, next_cursor = read_page(
+            session=session,
+            model=model,
+            skip=skip,
+            limit=limit,
+            after=after,
+            where=where,
+            order_by=order_by,
+        )
+        return list_model(data=items, count=count, next_cursor=next_cursor)
+
+    def export_items(
+        session: SessionDep,
+        filters: Annotated[ListFilters, Depends(filters_model)],
+        format: ExportFormat = "ndjson",
+    ) -> StreamingResponse:
+        return stream_export(session, model, filters, format)
+
+    def create_items_bulk(
+        *,
+        session: SessionDep,
+        items_in: list[bulk_create_model],  # type: ignore[valid-type]
+    ) -> Any:
+        return run_bulk(
+            session,
+            len(items_in),
+            lambda: bulk_create(session=session, model=model, items=items_in),
+        )
+
+    def update_items_bulk(
+        *,
+        session: SessionDep,
+        items_in: list[bulk_update_model],  # type: ignore[valid-type]
+    ) -> Any:
+        return run_bulk(
+            session,
+            len(items_in),
+            lambda: bulk_update(session=session, model=model, items=items_in),
+        )
+
+    def delete_items_bulk(
+        *, session: SessionDep, ids: Annotated[list[int], Body()]
+    ) -> Any:
+        return run_bulk(
+            session,
+            len(ids),
+            lambda: bulk_delete(session=session, model=model, ids=ids),
+        )
+
+    def read_item(session: SessionDep, instance_id: int) -> Any:
+        item = session.get(model, instance_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=f"{name} not found")
+        return item
+
+    def create_item(*, session: SessionDep, item_in: create_model) -> Any:  # type: ignore[valid-type]
+        item = model.model_validate(item_in)
+        session.add(item)
+        session.commit()
+        session.refresh(item)
+        return item
+
+    def update_item(
+        *,
+        session: SessionDep,
+        instance_id: int,
+        item_in: update_model,  # type: ignore[valid-type]
+    ) -> Any:
+        item = session.get(model, instance_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=f"{name} not found")
+
+        # Update the model with provided fields
+        update: SQLModel = item_in
+        item.sqlmodel_update(update.model_dump(exclude_unset=True))
+        session.add(item)
+        session.commit()
+        session.refresh(item)
+        return item
+
+    def delete_item(session: SessionDep, instance_id: int) -> Message:
+        item = session.get(model, instance_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=f"{name} not found")
+
+        session.delete(item)
+        session.commit()
+        return Message(message=f"{name} with ID {instance_id} deleted successfully")
+
+    # (path, method, endpoint, operation name, response model, description);
+    # /export and /bulk before /{instance_id}, which would otherwise claim them
+    routes: list[tuple[str, str, Callable[..., Any], str, Any, str]] = [
+        (
+            "/",
+            "GET",
+            read_items,
+            f"read_{many}",
+            list_model,
+            f"Retrieve {name} entries, filtered by the column query parameters and ordered by `sort`.\n"
+            "Without `sort` entries come in instance_id order, which for sheets with a business key is\n"
+            "hash order, not sheet order. Pass the previous page's next_cursor as `after` to page by\n"
+            "instance_id instead of skip.",
+        ),
+        (
+            "/export",
+            "GET",
+            export_items,
+            f"export_{many}",
+            None,
+            f"Stream every {name} entry matching the list filters as NDJSON, CSV or Parquet.",
+        ),
+        (
+            "/bulk",
+            "POST",
+            create_items_bulk,
+            f"create_{many}_bulk",
+            BulkResult,
+            f"Create many {name} entries in one transaction, with a status per item.",
+        ),
+        (
+            "/bulk",
+            "PUT",
+            update_items_bulk,
+            f"update_{many}_bulk",
+            BulkResult,
+            f"Update many {name} entries, each identified by its instance_id, in one transaction.",
+        ),
+        (
+            "/bulk",
+            "DELETE",
+            delete_items_bulk,
+            f"delete_{many}_bulk",
+            BulkResult,
+            f"Delete many {name} entries by instance_id in one transaction.",
+        ),
+        (
+            "/{instance_id}",
+            "GET",
+            read_item,
+            f"read_{one}_by_id",
+            public_model,
+            f"Get a specific {name} entry by its instance_id.",
+        ),
+        (
+            "/",
+            "POST",
+            create_item,
+            f"create_{one}",
+            public_model,
+            f"Create a new {name} entry.",
+        ),
+        (
+            "/{instance_id}",
+            "PUT",
+            update_item,
+            f"update_{one}",
+            public_model,
+            f"Update an existing {name} entry.",
+        ),
+        (
+            "/{instance_id}",
+            "DELETE",
+            delete_item,
+            f"delete_{one}",
+            Message,
+            f"Delete a {name} entry by its instance_id.",
+        ),
+    ]
+    for path, method, endpoint, route_name_, response_model, description in routes:
+        router.add_api_route(
+            path,
+            endpoint,
+            methods=[method],
+            name=route_name_,
+            response_model=response_model,
+            description=description,
+        )
+    return router
+
+
+def routers_from_metadata(metadata_path: str = JSON_FILE) -> list[APIRouter]:
+    """
+    One crud_router per sheet in the workbook metadata that create_models.py has generated
+    models for, so a new sheet gets its routes once its models are generated.
+    """
+    if os.path.exists(metadata_path):
+        with open(metadata_path) as f:
+            names = [
+                sheet["formatted_name"] for sheet in json.load(f).get("sheets", [])
+            ]
+    else:
+        print(
+            f"Metadata file '{metadata_path}' not found, routing the known sheets only."
+        )
+        names = list(LEGACY_ROUTES)
+
+    routers = []
+    for name in names:
+        if not hasattr(models_depot, f"{name}BulkUpdate"):
+            print(
+                f"No generated models for sheet '{name}', run create_models.py; skipping its routes."
+            )
+            continue
+        prefix, route_name = LEGACY_ROUTES.get(name, (None, None))
+        routers.append(crud_router(name, prefix=prefix, route_name=route_name))
+    return routers
@@ -0,0 +1,88 @@
+import types
+from datetime import datetime
+from typing import Any, ClassVar, Union, get_args, get_origin
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+# Query parameter suffix -> comparison, e.g. ?gate_in_date__gte=2024-01-01&customer__prefix=MAE
+OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "prefix": lambda column, value: column.startswith(value, autoescape=True),
+    "gte": lambda column, value: column >= value,
+    "lte": lambda column, value: column <= value,
+}
+TYPE_OPERATORS: dict[type, tuple[str, ...]] = {
+    str: ("eq", "prefix"),
+    int: ("eq", "gte", "lte"),
+    float: ("eq", "gte", "lte"),
+    datetime: ("gte", "lte"),
+}
+
+
+class ListFilters(BaseModel):
+    """
+    Filters and sort of a list endpoint. Subclasses are generated by filter_model,
+    with one optional query parameter per column and supported comparison.
+    """
+
+    sortable: ClassVar[frozenset[str]] = frozenset()
+
+    sort: str | None = None
+
+    def where(self, table: type[SQLModel]) -> list[Any]:
+        criteria = []
+        for name, value in self.model_dump(exclude_none=True, exclude={"sort"}).items():
+            column_name, _, operator = name.partition("__")
+            criteria.append(
+                OPERATORS[operator or "eq"](getattr(table, column_name), value)
+            )
+        return criteria
+
+    def order_by(self, table: type[SQLModel]) -> list[Any]:
+        """
+        Columns of `sort` ("customer,-gate_in_date"; "-" for descending), always
+        followed by the primary key so pages are stable.
+        """
+        key = inspect(table, raiseerr=True).primary_key[0]
+        order = []
+        for name in (self.sort or "").split(","):
+            name = name.strip()
+            column_name = name.lstrip("-")
+            if not column_name:
+                continue
+            if column_name not in self.sortable:
+                raise HTTPException(
+                    status_code=400, detail=f"Cannot sort by '{column_name}'"
+                )
+            column = getattr(table, column_name)
+            order.append(column.desc() if name.startswith("-") else column.asc())
+        return order + [key]
+
+
+def _scalar_type(annotation: Any) -> Any:
+    # str | None -> str
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        return args[0] if len(args) == 1 else None
+    return annotation
+
+
+def filter_model(base: type[SQLModel]) -> type[ListFilters]:
+    """ListFilters for the columns of a table's Base model; use as Depends() on the list route."""
+    fields: dict[str, Any] = {}
+    for name, info in base.model_fields.items():
+        scalar = _scalar_type(info.annotation)
+        for operator in TYPE_OPERATORS.get(scalar, ()):
+            fields[name if operator == "eq" else f"{name}__{operator}"] = (
+                scalar | None,
+                None,
+            )
+
+    model = create_model(
+        f"{base.__name__.removesuffix('Base')}Filters", __base__=ListFilters, **fields
+    )
+    model.sortable = frozenset(base.model_fields) | {"instance_id"}
+    return model
@@ -1,44 +1,57 @@
 import uuid
 from typing import Any
 
-
 from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
-from app.api.deps import CurrentUser, SessionDep
-from app.models.models import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
-
+from sqlmodel import col, select
 
+from app import crud
+from app.api.deps import CurrentUser, SessionDep
+from app.models.models import (
+    Item,
+    ItemCreate,
+    ItemPublic,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+)
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+
 @router.get("/", response_model=ItemsPublic)
 def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    include_count: bool = True,
 ) -> Any:
     """
     Retrieve items.
     """
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).order_by(Item.id).offset(skip).limit(limit)
+        count = crud.count_rows(
+            session=session, model=Item, include_count=include_count
+        )
+        statement = select(Item).order_by(col(Item.id)).offset(skip).limit(limit)
         items = session.exec(statement).all()
     else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
+        count = crud.count_rows(
+            session=session,
+            model=Item,
+            where=[Item.owner_id == current_user.id],
+            include_count=include_count,
         )
-        count = session.exec(count_statement).one()
         statement = (
             select(Item)
             .where(Item.owner_id == current_user.id)
-            .order_by(Item.id)
+            .order_by(col(Item.id))
             .offset(skip)
             .limit(limit)
         )
         items = session.exec(statement).all()
-    return ItemsPublic(data=items, count=count)
+    items_public = [ItemPublic.model_validate(item) for item in items]
+    return ItemsPublic(data=items_public, count=count)
 
 
 @router.get("/{id}", response_model=ItemPublic)
@@ -1,7 +1,10 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
+from app.api.services.ExtractionCache import get_extraction_cache
 from app.models.models import Message
 from app.utils import generate_test_email, send_email
 
@@ -26,6 +29,18 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/llm-cache/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def llm_cache_stats() -> dict[str, Any]:
+    """
+    Hit and miss counters of the LLM extraction cache.
+    """
+    cache = get_extraction_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
@@ -0,0 +1,141 @@
+import json
+import os
+from typing import Any
+
+import httpx
+
+from app.api.services.GraphClient import AsyncGraphClient, GraphClient
+from app.api.services.RowHashStore import atomic_write
+
+DELTA_TOKEN_FILE = "/app/app/sharepoint/delta_token.json"
+
+
+class ChangeFeed:
+    """
+    Change feed over a SharePoint drive, built on the Graph drive `delta` endpoint.
+    The delta link is persisted per drive once committed, so a poll only returns the
+    items changed since the last commit and an idle poll is a single small request.
+    """
+
+    def __init__(
+        self,
+        graph_client: "GraphClient",
+        drive_id: str,
+        token_file: str = DELTA_TOKEN_FILE,
+    ) -> None:
+        self._client = graph_client
+        self._headers = self._client._headers
+        self.graph_api = self._client.graph_api
+        self.drive_id = drive_id
+        self.token_file = token_file
+
+    def _load_delta_link(self) -> str | None:
+        if os.path.exists(self.token_file):
+            try:
+                with open(self.token_file) as f:
+                    delta_link: str | None = json.load(f).get(self.drive_id)
+                return delta_link
+            except json.JSONDecodeError:
+                print(
+                    f"Warning: Could not decode JSON from {self.token_file}. Resetting delta token."
+                )
+        return None
+
+    def _save_delta_link(self, delta_link: str | None) -> None:
+        data: dict[str, str] = {}
+        if os.path.exists(self.token_file):
+            try:
+                with open(self.token_file) as f:
+                    data = json.load(f)
+            except json.JSONDecodeError:
+                pass
+        if delta_link:
+            data[self.drive_id] = delta_link
+        else:
+            data.pop(self.drive_id, None)
+        atomic_write(self.token_file, lambda f: json.dump(data, f, indent=4), mode="w")
+
+    def poll(self) -> tuple[list[dict[str, Any]] | None, str | None]:
+        """
+        Return the driveItems changed since the saved delta link, and the new delta link.
+        The new link is not saved: pass it to commit() once the changes are handled, so
+        a failed sync gets the same changes again on the next poll.
+        The changes are None when there is no usable delta token yet (first poll, or the
+        token expired): callers should assume everything changed.
+        """
+        delta_link = self._load_delta_link()
+        if not delta_link:
+            return None, self._follow(self._initial_url())[1]
+
+        try:
+            return self._follow(delta_link)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 410:
+                print("Delta token expired, re-initializing the change feed.")
+                self._save_delta_link(None)
+                return self.poll()
+            raise
+
+    def commit(self, delta_link: str | None) -> None:
+        """Save the delta link returned by poll(), so the next poll starts after it."""
+        if delta_link:
+            self._save_delta_link(delta_link)
+
+    def _initial_url(self) -> str:
+        # token=latest returns a fresh delta link without enumerating the drive
+        return f"{self.graph_api}/drives/{self.drive_id}/root/delta?token=latest"
+
+    def _follow(self, url: str) -> tuple[list[dict[str, Any]], str | None]:
+        """Walk nextLink pages until the deltaLink. Returns (changes, delta link)."""
+        changes: list[dict[str, Any]] = []
+        next_url: str | None = url
+        delta_link = None
+        while next_url:
+            response = self._client.get(next_url)
+            response.raise_for_status()
+            next_url, delta_link = self._consume_page(response.json(), changes)
+        return changes, delta_link
+
+    def _consume_page(
+        self, body: dict[str, Any], changes: list[dict[str, Any]]
+    ) -> tuple[str | None, str | None]:
+        """Collect a page of changes and return the next page url and the delta link."""
+        changes.extend(body.get("value", []))
+        next_link: str | None = body.get("@odata.nextLink")
+        delta_link: str | None = body.get("@odata.deltaLink")
+        return next_link, delta_link
+
+
+class AsyncChangeFeed(ChangeFeed):
+    """ChangeFeed on an AsyncGraphClient; poll() is a coroutine."""
+
+    _client: AsyncGraphClient
+
+    # The coroutine overrides are not substitutable for the blocking methods
+    async def poll(  # type: ignore[override]
+        self,
+    ) -> tuple[list[dict[str, Any]] | None, str | None]:
+        delta_link = self._load_delta_link()
+        if not delta_link:
+            return None, (await self._follow(self._initial_url()))[1]
+
+        try:
+            return await self._follow(delta_link)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 410:
+                print("Delta token expired, re-initializing the change feed.")
+                self._save_delta_link(None)
+                return await self.poll()
+            raise
+
+    async def _follow(  # type: ignore[override]
+        self, url: str
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        changes: list[dict[str, Any]] = []
+        next_url: str | None = url
+        delta_link = None
+        while next_url:
+            response = await self._client.get(next_url)
+            response.raise_for_status()
+            next_url, delta_link = self._consume_page(response.json(), changes)
+        return changes, delta_link
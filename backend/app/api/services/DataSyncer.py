@@ -1,66 +1,201 @@
-import os
+import asyncio
+import hashlib
 import json
+import multiprocessing
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
 import pandas as pd
+
+from app.api.services.ChangeFeed import AsyncChangeFeed, ChangeFeed
+from app.api.services.FileEditor import (
+    AsyncFileEditor,
+    FileEditor,
+    load_metadata,
+    read_workbook,
+)
+from app.api.services.RowHashStore import (
+    LEGACY_HASH_NAME,
+    VECTORIZED_HASH_NAME,
+    RowHashStore,
+    atomic_write,
+    get_row_hash_store,
+)
 from app.core.config import settings
-import hashlib
+from app.crud import invalidate_counts
+
+if TYPE_CHECKING:
+    from app.api.services.DatabaseClient import DatabaseClient
 
 
-ROW_HASH_FILE = "/app/app/sharepoint/sheet_row_hashes.json"
 PERSISTENCE_FILE = "/app/app/sharepoint/last_synced_time.json"
 
+# (frame, row hashes, cell hashes) of a parsed sheet
+HashedSheet = tuple[pd.DataFrame, pd.Series, pd.DataFrame]
+
+
 def compute_row_hash(row: pd.Series) -> str:
     """Compute a stable hash for a row (fill NaNs to ensure consistency)."""
     row_bytes = ",".join(row.fillna("__NA__").astype(str)).encode("utf-8")
     return hashlib.sha256(row_bytes).hexdigest()
 
-def load_row_hashes(file_path: str = ROW_HASH_FILE) -> dict:
-    """Load previous row-hash snapshot."""
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            print(f"Warning: Could not decode JSON from {file_path}. Resetting hashes.")
-    return {}
 
-def save_row_hashes(hashes: dict, file_path: str = ROW_HASH_FILE) -> None:
-    """Save row-hash snapshot."""
-    with open(file_path, "w") as f:
-        json.dump(hashes, f, indent=4)
+def compute_row_hashes(df: pd.DataFrame, legacy: bool = False) -> pd.Series:
+    """
+    Hash every row of a DataFrame into a uint64 Series keyed by instance_id.
+    By default the whole frame is hashed in one vectorized pass.
+    With legacy=True the per-row sha256 digests of older snapshots are used (first 64 bits).
+    """
+    keys = df["instance_id"].to_numpy(dtype=np.int64)
+    if legacy:
+        digests = np.fromiter(
+            (int(compute_row_hash(df.iloc[i])[:16], 16) for i in range(len(df))),
+            dtype=np.uint64,
+            count=len(df),
+        )
+        return pd.Series(digests, index=keys, name=LEGACY_HASH_NAME)
+    digests = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return pd.Series(digests, index=keys, name=VECTORIZED_HASH_NAME)
+
+
+def is_legacy_snapshot(sheet_hashes: pd.Series) -> bool:
+    """Check whether a sheet snapshot still holds sha256 digests from the per-row path."""
+    return sheet_hashes.name == LEGACY_HASH_NAME and not sheet_hashes.empty
+
+
+def diff_row_hashes(
+    old_hashes: pd.Series, new_hashes: pd.Series
+) -> tuple[list[int], list[int], list[int]]:
+    """Return (added, changed, removed) row keys between two snapshots."""
+    added_rows = new_hashes.index.difference(old_hashes.index)
+    removed_rows = old_hashes.index.difference(new_hashes.index)
+    common = new_hashes.index.intersection(old_hashes.index)
+    changed_mask = (
+        new_hashes.loc[common].to_numpy() != old_hashes.loc[common].to_numpy()
+    )
+    changed_rows = common[changed_mask]
+    return added_rows.tolist(), changed_rows.tolist(), removed_rows.tolist()
+
+
+def compute_cell_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """Hash every cell into a uint32 digest, one column at a time, indexed by instance_id."""
+    cells = {
+        col: (
+            pd.util.hash_pandas_object(df[col], index=False).to_numpy() >> np.uint64(32)
+        ).astype(np.uint32)
+        for col in df.columns
+        if col != "instance_id"
+    }
+    return pd.DataFrame(cells, index=df["instance_id"].to_numpy(dtype=np.int64))
+
+
+def group_changed_columns(
+    old_cells: pd.DataFrame | None, new_cells: pd.DataFrame, changed_rows: list[int]
+) -> dict[tuple[str, ...], list[int]]:
+    """
+    Group changed rows by the set of columns that differ from the previous snapshot.
+    Rows without previous cell digests are grouped under all columns.
+    """
+    all_columns = tuple(new_cells.columns)
+    if old_cells is None or not changed_rows:
+        return {all_columns: list(changed_rows)} if changed_rows else {}
+
+    ids = pd.Index(changed_rows)
+    known = ids.intersection(old_cells.index)
+    shared = [c for c in all_columns if c in old_cells.columns]
+    added_columns = [c for c in all_columns if c not in old_cells.columns]
+    differs = (
+        new_cells.loc[known, shared].to_numpy()
+        != old_cells.loc[known, shared].to_numpy()
+    )
+
+    groups: dict[tuple[str, ...], list[int]] = {}
+    for row_id, mask in zip(known.tolist(), differs, strict=True):
+        columns = tuple(
+            [c for c, changed in zip(shared, mask, strict=True) if changed]
+            + added_columns
+        )
+        groups.setdefault(columns or all_columns, []).append(row_id)
+    unknown = ids.difference(old_cells.index).tolist()
+    if unknown:
+        groups.setdefault(all_columns, []).extend(unknown)
+    return groups
 
 
 def _load_last_synced_time(file_key: str, file_path: str = PERSISTENCE_FILE) -> str:
     if os.path.exists(file_path):
         try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
+            with open(file_path) as f:
+                data: dict[str, str] = json.load(f)
                 return data.get(file_key, "1970-01-01T00:00:00Z")
         except json.JSONDecodeError:
             print(f"Warning: Could not decode JSON from {file_path}. Resetting time.")
     return "1970-01-01T00:00:00Z"
 
-def _save_last_synced_time(file_key: str, timestamp: str, file_path: str = PERSISTENCE_FILE) -> None:
-    data = {}
+
+def _save_last_synced_time(
+    file_key: str, timestamp: str, file_path: str = PERSISTENCE_FILE
+) -> None:
+    data: dict[str, str] = {}
     if os.path.exists(file_path):
         try:
-            with open(file_path, "r") as f:
+            with open(file_path) as f:
                 data = json.load(f)
         except json.JSONDecodeError:
             pass
     data[file_key] = timestamp
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=4)
-
-
-
-
-class DataSyncer():
-    def __init__(self, file_editor: 'FileEditor', db_client: 'DBClient'):
+    atomic_write(file_path, lambda f: json.dump(data, f, indent=4), mode="w")
+
+
+def _read_and_hash_sheet(
+    metadata_path: str, excel_path: str, sheet_name: str, legacy: bool
+) -> HashedSheet:
+    """Process-pool worker: parse one sheet of a local workbook and hash it, without any Graph client."""
+    df = read_workbook(excel_path, load_metadata(metadata_path), [sheet_name])[
+        sheet_name
+    ]
+    return df, compute_row_hashes(df, legacy=legacy), compute_cell_hashes(df)
+
+
+def _chunks(items: list[int], size: int) -> Iterator[tuple[int, list[int]]]:
+    """Yield (items done after this chunk, chunk) pairs."""
+    for start in range(0, len(items), size):
+        chunk = items[start : start + size]
+        yield start + len(chunk), chunk
+
+
+class DataSyncer:
+    def __init__(
+        self,
+        file_editor: "FileEditor",
+        db_client: "DatabaseClient",
+        hash_store: RowHashStore | None = None,
+        chunk_size: int = settings.SYNC_CHUNK_SIZE,
+        commit_per_chunk: bool = settings.SYNC_COMMIT_PER_CHUNK,
+        progress_callback: Callable[[str, str, int, int], None] | None = None,
+        parallel_sheets: bool = settings.SYNC_PARALLEL_SHEETS,
+    ):
+        """
+        progress_callback is called as (table_name, stage, rows_done, rows_total) after
+        every chunk, where stage is "upsert", "update" or "delete".
+        With parallel_sheets, sheets are parsed and hashed in worker processes and synced
+        concurrently over separate connections.
+        """
         self.editor = file_editor
         self.db_client = db_client
+        self.hash_store = hash_store or get_row_hash_store(settings.ROW_HASH_STORE)
+        self.chunk_size = chunk_size
+        self.commit_per_chunk = commit_per_chunk
+        self.progress_callback = progress_callback
+        self.parallel_sheets = parallel_sheets
         self._sharepoint_file_name = self.editor._sharepoint_file_name
+        self._change_feed: ChangeFeed | None = None
+        self._item_id: str | None = None
 
         # Get list of sheets to sync from metadata
         self.sheets_to_sync = [s["name"] for s in self.editor.metadata["sheets"]]
@@ -68,10 +203,26 @@ class DataSyncer():
             s["name"]: s["formatted_name"] for s in self.editor.metadata["sheets"]
         }
 
-    def sync_dataframe_to_db(self, df: pd.DataFrame, table_name: str,
-                             added_rows: Optional[list[int]] = None,
-                             changed_rows: Optional[list[int]] = None,
-                             removed_rows: Optional[list[int]] = None):
+    def _report_progress(
+        self, table_name: str, stage: str, done: int, total: int
+    ) -> None:
+        if self.progress_callback:
+            self.progress_callback(table_name, stage, done, total)
+
+    def sync_dataframe_to_db(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        added_rows: list[int] | None = None,
+        changed_rows: list[int] | None = None,
+        removed_rows: list[int] | None = None,
+        changed_columns: dict[tuple[str, ...], list[int]] | None = None,
+    ) -> None:
+        """
+        Apply a row diff to the sheet's table.
+        With changed_columns ({column set: row ids}, see group_changed_columns), changed
+        rows only have those columns updated; otherwise they are upserted whole.
+        """
         added_rows = added_rows or []
         changed_rows = changed_rows or []
         removed_rows = removed_rows or []
@@ -80,23 +231,188 @@ class DataSyncer():
             print(f"No data in dataframe for table '{table_name}'")
             return
 
+        chunk_size = self.chunk_size
+        rows_by_id = df.set_index("instance_id", drop=False)
         with self.db_client.get_connection() as conn:
             print(f"Ensuring table '{table_name}' exists...")
             self.db_client.create_table_from_dataframe(conn, table_name, df)
 
-            rows_to_upsert = df.loc[added_rows + changed_rows] if added_rows or changed_rows else pd.DataFrame()
-            if not rows_to_upsert.empty:
-                print(f"Upserting {len(rows_to_upsert)} rows into '{table_name}'...")
-                self.db_client.upsert_dataframe(conn, table_name, rows_to_upsert)
-
-            if removed_rows:
-                print(f"Deleting {len(removed_rows)} rows from '{table_name}'...")
-                self.db_client.delete_rows(conn, table_name, removed_rows)
-
+            # Without commit-per-chunk all chunks share one transaction
+            transaction = nullcontext() if self.commit_per_chunk else conn.begin()
+            with transaction:
+                upsert_ids = (
+                    added_rows
+                    if changed_columns is not None
+                    else added_rows + changed_rows
+                )
+                if upsert_ids:
+                    print(
+                        f"Upserting {len(upsert_ids)} rows into '{table_name}' in chunks of {chunk_size}..."
+                    )
+                for done, ids in _chunks(upsert_ids, chunk_size):
+                    self.db_client.upsert_dataframe(
+                        conn, table_name, rows_by_id.loc[ids]
+                    )
+                    self._report_progress(table_name, "upsert", done, len(upsert_ids))
+
+                for columns, row_ids in (changed_columns or {}).items():
+                    print(
+                        f"Updating {list(columns)} of {len(row_ids)} rows in '{table_name}'..."
+                    )
+                    for done, ids in _chunks(row_ids, chunk_size):
+                        rows_to_update = rows_by_id.loc[ids, ["instance_id", *columns]]
+                        self.db_client.upsert_dataframe(
+                            conn,
+                            table_name,
+                            rows_to_update,
+                            update_columns=list(columns),
+                        )
+                        self._report_progress(table_name, "update", done, len(row_ids))
+
+                if removed_rows:
+                    print(f"Deleting {len(removed_rows)} rows from '{table_name}'...")
+                for done, ids in _chunks(removed_rows, chunk_size):
+                    self.db_client.delete_rows(conn, table_name, ids)
+                    self._report_progress(table_name, "delete", done, len(removed_rows))
+
+        # Cached list counts of this table are stale now
+        invalidate_counts(table_name)
         print(f"✅ Sync complete for table '{table_name}'")
 
-    def check_and_sync(self):
-        """Check SharePoint workbook and sync only changed rows for all configured sheets."""
+    def _read_and_hash_sheets(
+        self, sheet_names: list[str], item: dict[str, Any]
+    ) -> dict[str, HashedSheet]:
+        """
+        Read and hash the given sheets, returning {sheet: (df, row hashes, cell hashes)}.
+        In parallel mode every sheet is parsed and hashed in its own worker process.
+        """
+        if not self.parallel_sheets:
+            return self._hash_frames(
+                self.editor.read_sheets_with_metadata(sheet_names, item=item)
+            )
+        return self._hash_workbook_in_processes(
+            self.editor._download_excel(item), sheet_names
+        )
+
+    @staticmethod
+    def _hash_frames(dfs: dict[str, pd.DataFrame]) -> dict[str, HashedSheet]:
+        legacy_mode = settings.ROW_HASH_MODE == "legacy"
+        return {
+            name: (
+                df,
+                compute_row_hashes(df, legacy=legacy_mode),
+                compute_cell_hashes(df),
+            )
+            for name, df in dfs.items()
+        }
+
+    def _hash_workbook_in_processes(
+        self, excel_path: str, sheet_names: list[str]
+    ) -> dict[str, HashedSheet]:
+        # Download once in this process, then parse the local copy in the workers.
+        # spawn, because forking a process that runs scheduler threads is not safe.
+        legacy_mode = settings.ROW_HASH_MODE == "legacy"
+        with ProcessPoolExecutor(
+            max_workers=len(sheet_names),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = {
+                name: pool.submit(
+                    _read_and_hash_sheet,
+                    self.editor._metadata_path,
+                    excel_path,
+                    name,
+                    legacy_mode,
+                )
+                for name in sheet_names
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _sync_sheet(
+        self,
+        sheet_name: str,
+        df: pd.DataFrame,
+        new_hashes: pd.Series,
+        new_cells: pd.DataFrame,
+        old_sheet_hashes: pd.Series,
+        old_sheet_cells: pd.DataFrame | None,
+    ) -> bool:
+        """Diff one sheet against its previous snapshot and sync the changes. Returns True if synced."""
+        print(f"Processing sheet '{sheet_name}'...")
+
+        # Snapshots written by the per-row path are diffed against legacy digests once,
+        # then replaced by the current digests when the hashes are saved
+        compare_hashes = new_hashes
+        if settings.ROW_HASH_MODE != "legacy" and is_legacy_snapshot(old_sheet_hashes):
+            print(f"Migrating legacy row-hash snapshot for sheet '{sheet_name}'...")
+            compare_hashes = compute_row_hashes(df, legacy=True)
+
+        # Detect added, changed, removed rows
+        added_rows, changed_rows, removed_rows = diff_row_hashes(
+            old_sheet_hashes, compare_hashes
+        )
+
+        # Narrow changed rows down to the columns that actually differ
+        changed_columns = group_changed_columns(
+            old_sheet_cells, new_cells, changed_rows
+        )
+
+        if not added_rows and not changed_rows and not removed_rows:
+            print(
+                f"✅ No row changes detected in sheet '{sheet_name}'. Skipping DB sync."
+            )
+            # Still update last synced time
+            # _save_last_synced_time(sheet_name, current_mod_time)
+            return False
+        print(
+            f"❗ Changes detected for sheet '{sheet_name}': "
+            f"Added: {len(added_rows)}, "
+            f"Changed: {len(changed_rows)}, "
+            f"Removed: {len(removed_rows)}"
+        )
+        # print(f"Added rows: {added_rows}")
+        # print(f"Changed rows: {changed_rows}")
+        # print(f"Removed rows: {removed_rows}")
+
+        # Sync to DB
+        self.sync_dataframe_to_db(
+            df, sheet_name, added_rows, changed_rows, removed_rows, changed_columns
+        )
+        return True
+
+    def sync_if_changed(self, change_feed: ChangeFeed | None = None) -> bool:
+        """
+        Poll the drive change feed and run check_and_sync right away if the workbook is
+        among the changed items. An idle tick costs one delta request.
+        The feed only moves past a change once the sync succeeded, so a failed sync is
+        retried on the next tick. Returns whether a sync was started.
+        """
+        if change_feed is not None:
+            self._change_feed = change_feed
+        if self._change_feed is None:
+            self._change_feed = ChangeFeed(
+                self.editor._client, self.editor.get_drive_id()
+            )
+        if self._item_id is None:
+            self._item_id = self.editor.get_sync_data()["id"]
+
+        changes, delta_link = self._change_feed.poll()
+        # None means the feed was just (re)initialized, so changes may have been missed
+        if changes is not None and not any(
+            c.get("id") == self._item_id for c in changes
+        ):
+            self._change_feed.commit(delta_link)
+            return False
+        print(f"🔔 Change feed reported a change to '{self._sharepoint_file_name}'.")
+        if self.check_and_sync():
+            self._change_feed.commit(delta_link)
+        return True
+
+    def check_and_sync(self) -> bool:
+        """
+        Check SharePoint workbook and sync only changed rows for all configured sheets.
+        Returns whether the tables are in sync with the workbook now.
+        """
         print(f"⏰ [{datetime.now().isoformat()}] Starting scheduled check...")
 
         try:
@@ -106,61 +422,170 @@ class DataSyncer():
                 raise ValueError("Could not find 'lastModifiedDateTime'.")
         except Exception as e:
             print(f"FATAL ERROR: {e}")
-            return
+            return False
 
-        # Read all configured sheets at once
+        pending_sheets = self._pending_sheets(current_mod_time)
+        if not pending_sheets:
+            return True
+
+        # Read and hash all pending sheets
         try:
-            dfs = self.editor.read_sheets_with_metadata(self.sheets_to_sync)
+            hashed_sheets = self._read_and_hash_sheets(pending_sheets, metadata)
         except Exception as e:
             print(f"FATAL ERROR: {e}")
-            return
+            return False
 
-        # Load previous row hashes
-        old_hashes = load_row_hashes()
+        self._sync_hashed_sheets(hashed_sheets, current_mod_time)
+        return True
 
-        for unf_sheet_name, df in dfs.items():
+    def _pending_sheets(self, current_mod_time: str) -> list[str]:
+        """Sheets whose last sync is older than the workbook."""
+        pending_sheets = []
+        for unf_sheet_name in self.sheets_to_sync:
             sheet_name = self.sheets_mapping[unf_sheet_name]
-            print(f"Processing sheet '{sheet_name}'...")
-
-            # Load last synced time for this sheet
-            last_synced_time = _load_last_synced_time(sheet_name)
-
-            # Only sync if file changed since last sheet sync
+            # Times from before they were committed with the snapshots are in PERSISTENCE_FILE
+            last_synced_time = self.hash_store.load_synced_time(
+                sheet_name
+            ) or _load_last_synced_time(sheet_name)
             if current_mod_time <= last_synced_time:
-                print(f"❗ No changes detected for sheet '{sheet_name}'. Last synced at {last_synced_time}.")
-                continue
-
-            # Compute row hashes
-            new_hashes = {str(i): compute_row_hash(df.iloc[i]) for i in range(len(df))}
-            old_sheet_hashes = old_hashes.get(sheet_name, {})
-
-            # Detect added, changed, removed rows
-            added_rows = [int(idx) for idx in new_hashes if idx not in old_sheet_hashes]
-            changed_rows = [int(idx) for idx, h in new_hashes.items() if idx in old_sheet_hashes and old_sheet_hashes[idx] != h]
-            removed_rows = [int(idx) for idx in old_sheet_hashes if idx not in new_hashes]
-
-            if not added_rows and not changed_rows and not removed_rows:
-                print(f"✅ No row changes detected in sheet '{sheet_name}'. Skipping DB sync.")
-                # Still update last synced time
-                # _save_last_synced_time(sheet_name, current_mod_time)
-                continue
+                print(
+                    f"❗ No changes detected for sheet '{sheet_name}'. Last synced at {last_synced_time}."
+                )
+            else:
+                pending_sheets.append(unf_sheet_name)
+        if not pending_sheets:
             print(
-                f"❗ Changes detected for sheet '{sheet_name}': "
-                f"Added: {len(added_rows)}, "
-                f"Changed: {len(changed_rows)}, "
-                f"Removed: {len(removed_rows)}"
+                f"❗ No changes detected since last sync ({current_mod_time}). Skipping download."
+            )
+        return pending_sheets
+
+    def _sync_hashed_sheets(
+        self, hashed_sheets: dict[str, HashedSheet], current_mod_time: str
+    ) -> None:
+        """Diff the hashed sheets against their snapshots, sync them, then persist the new state."""
+        jobs: dict[str, tuple[Any, ...]] = {}
+        for unf_sheet_name, (df, new_hashes, new_cells) in hashed_sheets.items():
+            sheet_name = self.sheets_mapping[unf_sheet_name]
+            jobs[sheet_name] = (
+                df,
+                new_hashes,
+                new_cells,
+                self.hash_store.load(sheet_name),
+                self.hash_store.load_cells(sheet_name),
+            )
+
+        # Sync to DB, each sheet over its own pooled connection in parallel mode
+        synced: list[str] = []
+        errors: dict[str, Exception] = {}
+        if self.parallel_sheets:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                futures = {
+                    name: pool.submit(self._sync_sheet, name, *job)
+                    for name, job in jobs.items()
+                }
+                for sheet_name, future in futures.items():
+                    try:
+                        if future.result():
+                            synced.append(sheet_name)
+                    except Exception as e:
+                        errors[sheet_name] = e
+        else:
+            for sheet_name, job in jobs.items():
+                if self._sync_sheet(sheet_name, *job):
+                    synced.append(sheet_name)
+
+        # Legacy snapshots are rewritten even without changes, or every later check
+        # would rehash the sheet row by row again
+        migrated = [
+            name
+            for name, job in jobs.items()
+            if name not in synced
+            and name not in errors
+            and settings.ROW_HASH_MODE != "legacy"
+            and is_legacy_snapshot(job[3])
+        ]
+
+        # Commit hashes and last synced times of every sheet that synced in one atomic save
+        if synced or migrated:
+            self.hash_store.save(
+                {name: jobs[name][1] for name in synced + migrated},
+                {name: jobs[name][2] for name in synced + migrated},
+                synced_times=dict.fromkeys(synced, current_mod_time),
+            )
+
+        for sheet_name, error in errors.items():
+            print(f"ERROR syncing sheet '{sheet_name}': {error}")
+        if errors:
+            raise next(iter(errors.values()))
+        print("✅ All configured sheets synced with per-sheet last synced times.")
+
+
+class AsyncDataSyncer(DataSyncer):
+    """
+    DataSyncer for the asyncio pipeline, on an AsyncFileEditor. Graph calls and the
+    download are awaited; parsing, hashing and the database writes, which are blocking
+    (pyodbc has no asyncio driver), run in worker threads.
+    """
+
+    editor: AsyncFileEditor
+    _change_feed: AsyncChangeFeed | None
+
+    # The coroutine overrides are not substitutable for the blocking methods
+    async def sync_if_changed(  # type: ignore[override]
+        self, change_feed: AsyncChangeFeed | None = None
+    ) -> bool:
+        if change_feed is not None:
+            self._change_feed = change_feed
+        if self._change_feed is None:
+            self._change_feed = AsyncChangeFeed(
+                self.editor._client, await self.editor.get_drive_id()
             )
-            # print(f"Added rows: {added_rows}")
-            # print(f"Changed rows: {changed_rows}")
-            # print(f"Removed rows: {removed_rows}")
+        if self._item_id is None:
+            self._item_id = (await self.editor.get_sync_data())["id"]
+
+        changes, delta_link = await self._change_feed.poll()
+        if changes is not None and not any(
+            c.get("id") == self._item_id for c in changes
+        ):
+            self._change_feed.commit(delta_link)
+            return False
+        print(f"🔔 Change feed reported a change to '{self._sharepoint_file_name}'.")
+        if await self.check_and_sync():
+            self._change_feed.commit(delta_link)
+        return True
+
+    async def check_and_sync(self) -> bool:  # type: ignore[override]
+        print(f"⏰ [{datetime.now().isoformat()}] Starting scheduled check...")
+
+        try:
+            metadata = await self.editor.get_sync_data()
+            current_mod_time = metadata.get("lastModifiedDateTime")
+            if not current_mod_time:
+                raise ValueError("Could not find 'lastModifiedDateTime'.")
+        except Exception as e:
+            print(f"FATAL ERROR: {e}")
+            return False
 
-            # Sync to DB
-            self.sync_dataframe_to_db(df, sheet_name, added_rows, changed_rows, removed_rows)
+        pending_sheets = self._pending_sheets(current_mod_time)
+        if not pending_sheets:
+            return True
 
-            # Update hashes and last synced time per sheet
-            old_hashes[sheet_name] = new_hashes
-            _save_last_synced_time(sheet_name, current_mod_time)
+        try:
+            if self.parallel_sheets:
+                excel_path = await self.editor._download_excel(metadata)
+                hashed_sheets = await asyncio.to_thread(
+                    self._hash_workbook_in_processes, excel_path, pending_sheets
+                )
+            else:
+                dfs = await self.editor.read_sheets_with_metadata(
+                    pending_sheets, item=metadata
+                )
+                hashed_sheets = await asyncio.to_thread(self._hash_frames, dfs)
+        except Exception as e:
+            print(f"FATAL ERROR: {e}")
+            return False
 
-        # Save all updated hashes
-        save_row_hashes(old_hashes)
-        print(f"✅ All configured sheets synced with per-sheet last synced times.")
+        await asyncio.to_thread(
+            self._sync_hashed_sheets, hashed_sheets, current_mod_time
+        )
+        return True
@@ -1,29 +1,68 @@
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any
+
 import pandas as pd
-from sqlalchemy import create_engine, text, Table, Column, Integer, String, Float, DateTime, MetaData
-from sqlalchemy.engine import Connection
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    create_engine,
+    inspect,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from app.api.services.SchemaRegistry import SchemaRegistry, schema_registry
 from app.core.config import settings
-import uuid
-from sqlalchemy.engine import Engine
+
+# SQL Server rejects statements with more than 2100 parameters
+MAX_DELETE_PARAMETERS = 2000
+# Columns the depot list endpoints filter on; see the depot_filter_indexes migration
+FILTER_INDEX_COLUMNS = ("container_number", "customer", "gate_in_date", "gate_out_date")
+
+
+def _transaction(conn: Connection) -> AbstractContextManager[Any]:
+    """Join the caller's transaction if one is open, otherwise run in a new one."""
+    return nullcontext() if conn.in_transaction() else conn.begin()
+
 
 class DatabaseClient:
     """
     Manages MSSQL connection, table creation, and bulk upserts using row index as PK.
     """
 
-    def __init__(self):
+    def __init__(self, registry: SchemaRegistry = schema_registry):
         DB_URL = settings.SQLALCHEMY_DATABASE_URI
-        self.engine: Engine = create_engine(DB_URL)
+        # fast_executemany sends parameter batches as arrays instead of one round trip per row
+        self.engine: Engine = create_engine(DB_URL, fast_executemany=True)
+        self.schema_registry = registry
 
     def get_connection(self) -> Connection:
         """Opens and returns a new connection."""
         return self.engine.connect()
 
-    def create_table_from_dataframe(self, conn: Connection, table_name: str, df: pd.DataFrame):
-        """Create table if it doesn't exist, with instance_id as primary key."""
+    def create_table_from_dataframe(
+        self, conn: Connection, table_name: str, df: pd.DataFrame
+    ) -> None:
+        """
+        Create table if it doesn't exist, with instance_id as primary key.
+        Columns missing from an existing table are added with ALTER TABLE. Tables already
+        verified for the same column set in this process are skipped without any query.
+        """
         metadata = MetaData()
 
-        columns = [Column("instance_id", Integer, primary_key=True, autoincrement=False)]
-        for col_name, dtype in zip(df.columns, df.dtypes):
+        # BIGINT so that business-key ids (63-bit hashes) fit as well as row positions
+        columns: list[Column[Any]] = [
+            Column("instance_id", BigInteger, primary_key=True, autoincrement=False)
+        ]
+        for col_name, dtype in zip(df.columns, df.dtypes, strict=True):
             if col_name == "instance_id":
                 continue
             if pd.api.types.is_integer_dtype(dtype):
@@ -35,34 +74,110 @@ class DatabaseClient:
             else:
                 columns.append(Column(col_name, String(512)))
 
-        # Create the table in dbo schema
-        table = Table(table_name, metadata, *columns, extend_existing=True, schema="dbo")
-        metadata.create_all(self.engine)
-        print(f"Table '{table_name}' created in schema 'dbo' successfully!")
+        wide_ids = (
+            "instance_id" in df.columns
+            and not df.empty
+            and df["instance_id"].max() > 2**31 - 1
+        )
+        fingerprint = self.schema_registry.fingerprint(
+            columns, self.engine.dialect, f"wide_ids:{wide_ids}"
+        )
+        if self.schema_registry.is_verified(table_name, fingerprint):
+            return
+
+        with _transaction(conn):
+            inspector = inspect(conn)
+            if not inspector.has_table(table_name, schema="dbo"):
+                # Create the table in dbo schema, with the indexes the list filters use
+                indexes = [
+                    Index(f"ix_{table_name.lower()}_{c.name}", c.name)
+                    for c in columns
+                    if c.name in FILTER_INDEX_COLUMNS
+                ]
+                Table(table_name, metadata, *columns, *indexes, schema="dbo")
+                metadata.create_all(conn)
+                print(f"Table '{table_name}' created in schema 'dbo' successfully!")
+            else:
+                existing = {
+                    c["name"]: c
+                    for c in inspector.get_columns(table_name, schema="dbo")
+                }
+                for column in columns:
+                    if column.name not in existing:
+                        col_type = column.type.compile(dialect=self.engine.dialect)
+                        conn.execute(
+                            text(
+                                f"ALTER TABLE [dbo].[{table_name}] ADD [{column.name}] {col_type} NULL;"
+                            )
+                        )
+                        print(f"Added column '{column.name}' to table '{table_name}'.")
+                if wide_ids and not isinstance(
+                    existing["instance_id"]["type"], BigInteger
+                ):
+                    self._widen_instance_id(conn, table_name)
+
+        self.schema_registry.mark_verified(table_name, fingerprint)
 
+    def _widen_instance_id(self, conn: Connection, table_name: str) -> None:
+        """
+        Tables created before business-key ids have an INT instance_id.
+        Convert it to BIGINT, re-creating the primary key around the change.
+        """
+        quoted_table = f"[dbo].[{table_name}]"
+        with _transaction(conn):
+            pk_name = conn.execute(
+                text(
+                    "SELECT name FROM sys.key_constraints "
+                    "WHERE type = 'PK' AND parent_object_id = OBJECT_ID(:table)"
+                ),
+                {"table": f"dbo.{table_name}"},
+            ).scalar()
+            if pk_name:
+                conn.execute(
+                    text(f"ALTER TABLE {quoted_table} DROP CONSTRAINT [{pk_name}];")
+                )
+            conn.execute(
+                text(
+                    f"ALTER TABLE {quoted_table} ALTER COLUMN instance_id BIGINT NOT NULL;"
+                )
+            )
+            conn.execute(
+                text(
+                    f"ALTER TABLE {quoted_table} ADD CONSTRAINT [PK_{table_name}] PRIMARY KEY (instance_id);"
+                )
+            )
+        print(f"Widened instance_id of {quoted_table} to BIGINT.")
 
-    def upsert_dataframe(self, conn: Connection, table_name: str, df: pd.DataFrame):
+    def upsert_dataframe(
+        self,
+        conn: Connection,
+        table_name: str,
+        df: pd.DataFrame,
+        update_columns: list[str] | None = None,
+    ) -> None:
         """
         Bulk upsert using a staging table and MERGE, based on instance_id as primary key.
+        With update_columns, only those columns are staged and updated on existing rows,
+        and rows missing from the table are not inserted.
         """
         if df.empty:
             print(f"No rows to upsert for {table_name}.")
             return
 
-        # Generate a unique staging table name
-        staging_table = f"{table_name}_staging_{uuid.uuid4().hex[:8]}"
-
-        # ✅ Write to staging table
-        df.to_sql(staging_table, con=self.engine, if_exists='replace', index=False, schema="dbo")
+        if update_columns is not None:
+            df = df[["instance_id", *update_columns]]
 
         quoted_table = f"[dbo].[{table_name}]"
-        quoted_staging = f"[dbo].[{staging_table}]"
+        staging_table = f"#{table_name}_staging"
+        quoted_staging = f"[{staging_table}]"
 
         # Generate the column sets
         columns = [c for c in df.columns if c != "instance_id"]
         set_stmt = ", ".join([f"target.[{c}] = source.[{c}]" for c in columns])
         insert_cols = ", ".join(["instance_id"] + [f"[{c}]" for c in columns])
-        insert_vals = ", ".join(["source.instance_id"] + [f"source.[{c}]" for c in columns])
+        insert_vals = ", ".join(
+            ["source.instance_id"] + [f"source.[{c}]" for c in columns]
+        )
 
         merge_sql = f"""
         MERGE {quoted_table} AS target
@@ -70,31 +185,97 @@ class DatabaseClient:
         ON target.instance_id = source.instance_id
         WHEN MATCHED THEN
             UPDATE SET {set_stmt}
+        """
+        if update_columns is None:
+            merge_sql += f"""
         WHEN NOT MATCHED BY TARGET THEN
             INSERT ({insert_cols})
-            VALUES ({insert_vals});
+            VALUES ({insert_vals})
         """
+        merge_sql += ";"
 
-        # ✅ Execute inside a transaction
-        with conn.begin():
-            conn.execute(text(merge_sql))
-            conn.execute(text(f"DROP TABLE {quoted_staging};"))
+        # ✅ Load the staging table and merge inside one transaction
+        try:
+            with _transaction(conn):
+                self._prepare_staging_table(
+                    conn, table_name, staging_table, list(df.columns)
+                )
+                self._bulk_insert(conn, quoted_staging, df)
+                conn.execute(text(merge_sql))
+        except Exception:
+            # A rollback also drops a #temp table created inside the transaction
+            conn.info.get("staging_tables", {}).pop(staging_table, None)
+            raise
 
         print(f"Upserted {len(df)} rows into {quoted_table}.")
 
-    def delete_rows(self, conn: Connection, table_name: str, row_indices: list[int]):
+    def _prepare_staging_table(
+        self, conn: Connection, table_name: str, staging_table: str, columns: list[str]
+    ) -> None:
+        """
+        Make sure the session-scoped #temp staging table exists, shaped like the target
+        table, and is empty. It is created once per pooled connection and truncated on
+        later upserts, so no DDL runs against dbo on each sync.
+        """
+        staging_tables = conn.info.setdefault("staging_tables", {})
+
+        known_columns = staging_tables.get(staging_table)
+        if known_columns is not None and set(columns) <= known_columns:
+            conn.execute(text(f"TRUNCATE TABLE [{staging_table}];"))
+            return
+
+        # First use on this connection, or the target table gained columns since
+        conn.execute(
+            text(
+                f"IF OBJECT_ID('tempdb..{staging_table}') IS NOT NULL DROP TABLE [{staging_table}];"
+            )
+        )
+        conn.execute(
+            text(f"SELECT TOP 0 * INTO [{staging_table}] FROM [dbo].[{table_name}];")
+        )
+        staging_tables[staging_table] = set(
+            conn.execute(text(f"SELECT TOP 0 * FROM [{staging_table}];")).keys()
+        )
+
+    def _bulk_insert(
+        self, conn: Connection, quoted_table: str, df: pd.DataFrame
+    ) -> None:
+        """Insert a DataFrame through one executemany call (fast_executemany on pyodbc)."""
+        values = df.astype(object).where(df.notna(), None)
+        rows = list(values.itertuples(index=False, name=None))
+        insert_cols = ", ".join(f"[{c}]" for c in df.columns)
+        placeholders = ", ".join("?" for _ in df.columns)
+        conn.exec_driver_sql(
+            f"INSERT INTO {quoted_table} ({insert_cols}) VALUES ({placeholders})", rows
+        )
+
+    def delete_rows(
+        self, conn: Connection, table_name: str, row_indices: list[int]
+    ) -> None:
         """
         Delete rows from the table based on instance_id.
         """
         if not row_indices:
             return
 
-        quoted_table = f"[{table_name}]"
-        indices_str = ", ".join(map(str, row_indices))
-        sql = f"DELETE FROM {quoted_table} WHERE instance_id IN ({indices_str});"
-        conn.execute(text(sql))
+        quoted_table = f"[dbo].[{table_name}]"
+        sql = text(f"DELETE FROM {quoted_table} WHERE instance_id IN :ids;").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        with _transaction(conn):
+            for start in range(0, len(row_indices), MAX_DELETE_PARAMETERS):
+                conn.execute(
+                    sql,
+                    {
+                        "ids": [
+                            int(i)
+                            for i in row_indices[start : start + MAX_DELETE_PARAMETERS]
+                        ]
+                    },
+                )
         print(f"Deleted {len(row_indices)} rows from {quoted_table}.")
 
+
 # # Usage example
 # db = DatabaseClient()
 # df = pd.DataFrame({
@@ -103,14 +284,14 @@ class DatabaseClient:
 #     "Fab/Split": ["Yes", "No"]
 # })
 # df["instance_id"] = df.index
-# 
+#
 # df1 = pd.DataFrame({
 #     "instance_id": [0,2,1],
 #     "Depot Name": ["Depot3", "Depot3", "Depot4"],
 #     "City": ["City1", "City2",  "City2"],
 #     "Fab/Split": ["Yes", "No", "Yes"]
 # })
-# 
+#
 # with db.get_connection() as conn:
 #     print("HERE")
 #     db.create_table_from_dataframe(conn, "Depot", df)
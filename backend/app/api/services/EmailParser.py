@@ -1,85 +1,199 @@
-import os
+import asyncio
+import base64
+import itertools
 import json
-from datetime import datetime
-from typing import Dict, Any
-from app.core.config import settings
-import requests
-import pandas as pd
-from app.api.services.GraphClient import GraphClient
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+import httpx
 import openai
+from bs4 import BeautifulSoup
+
+from app.api.services.ExtractionCache import (
+    ExtractionCache,
+    extraction_key,
+    get_extraction_cache,
+)
+from app.api.services.GraphClient import AsyncGraphClient, GraphClient
+from app.api.services.PromptCompactor import (
+    CHARS_PER_TOKEN,
+    chunk_attachments,
+    estimate_tokens,
+    merge_extractions,
+)
+from app.api.services.StructuredExtractor import extract_attachments
+from app.core.config import settings
 
+# Failures of the extraction service itself, not of the message being extracted
+LLM_BACKEND_ERRORS = (
+    openai.APIConnectionError,
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.NotFoundError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
 
-class EmailParser():
-    def __init__(self, graph_client: 'GraphClient', mail_user: str = settings.MAIL_USER):
+
+class EmailParser:
+    def __init__(
+        self,
+        graph_client: "GraphClient",
+        mail_user: str = settings.MAIL_USER,
+        cache: Optional["ExtractionCache"] = None,
+    ) -> None:
         # Composition: The parser HAS A GraphClient
         self.client = graph_client
         self.mail_user = mail_user
+        # Falls back to the process-wide cache on first use
+        self._cache = cache
+        # Azure OpenAI client, built on first use
+        self._llm: Any = None
 
         # Optional: Assign frequently used properties for cleaner method calls (Hybrid approach)
         self._headers = self.client._headers
         self.graph_api = self.client.graph_api
 
-    def get_emails(self, top=10, distribution_list=None):
+    def get_emails(
+        self, top: int = 10, distribution_list: str | None = None
+    ) -> list[dict[str, Any]]:
         """Get latest emails, optionally filter by distribution list"""
-        url = f"{self.graph_api}/users/{self.mail_user}/mailFolders/Inbox/messages"
-        url += f"?$top={top}&$orderby=receivedDateTime desc"
-        response = requests.get(url, headers=self._headers())
+        response = self.client.get(self._messages_url(top))
         response.raise_for_status()
-        messages = response.json().get("value", [])
+        return self._filter_messages(
+            response.json().get("value", []), distribution_list
+        )
 
-        filtered = []
-        for msg in messages:
-            recipients = [recip["emailAddress"]["address"] for recip in msg.get("toRecipients", [])]
-            if distribution_list and not any(distribution_list.lower() in r.lower() for r in recipients):
-                continue
+    def get_email_body(self, message_id: str, prefer_html: bool = False) -> str:
+        url = f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}"
+        response = self.client.get(url)
+        response.raise_for_status()
+        return self._body_text(response.json(), prefer_html)
 
-            filtered.append({
-                "id": msg["id"],
-                "subject": msg.get("subject"),
-                "from": msg.get("from", {}).get("emailAddress", {}).get("address"),
-                "received": msg.get("receivedDateTime"),
-                "to": recipients
-            })
-        return filtered
+    def get_attachments(self, message_id: str) -> list[tuple[str, bytes]]:
+        url = (
+            f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}/attachments"
+        )
+        response = self.client.get(url)
+        response.raise_for_status()
+        return self._file_attachments(response.json().get("value", []))
 
-    def get_email_body(self, message_id, prefer_html=False):
-        url = f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}"
-        response = requests.get(url, headers=self._headers())
+    def get_message_content(
+        self, message_id: str, prefer_html: bool = False
+    ) -> tuple[str, list[tuple[str, bytes]]]:
+        """Body text and file attachments of a message, in one request."""
+        return self._message_content(
+            self.client.get(self._message_content_url(message_id)), prefer_html
+        )
+
+    def _message_content(
+        self, response: httpx.Response, prefer_html: bool = False
+    ) -> tuple[str, list[tuple[str, bytes]]]:
         response.raise_for_status()
         msg = response.json()
+        return self._body_text(msg, prefer_html), self._file_attachments(
+            msg.get("attachments", [])
+        )
+
+    def _messages_url(self, top: int) -> str:
+        url = f"{self.graph_api}/users/{self.mail_user}/mailFolders/Inbox/messages"
+        return url + f"?$top={top}&$orderby=receivedDateTime desc"
+
+    def _message_content_url(self, message_id: str) -> str:
+        return f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}?$expand=attachments"
+
+    @staticmethod
+    def _filter_messages(
+        messages: list[dict[str, Any]], distribution_list: str | None = None
+    ) -> list[dict[str, Any]]:
+        filtered: list[dict[str, Any]] = []
+        for msg in messages:
+            recipients = [
+                recip["emailAddress"]["address"]
+                for recip in msg.get("toRecipients", [])
+            ]
+            if distribution_list and not any(
+                distribution_list.lower() in r.lower() for r in recipients
+            ):
+                continue
 
-        body = msg.get("body", {}).get("content", "")
+            filtered.append(
+                {
+                    "id": msg["id"],
+                    "subject": msg.get("subject"),
+                    "from": msg.get("from", {}).get("emailAddress", {}).get("address"),
+                    "received": msg.get("receivedDateTime"),
+                    "to": recipients,
+                }
+            )
+        return filtered
+
+    @staticmethod
+    def _body_text(msg: dict[str, Any], prefer_html: bool = False) -> str:
+        body: str = msg.get("body", {}).get("content", "")
         if not body:
             return ""
 
         if not prefer_html:
-            return BeautifulSoup(body, "html.parser").get_text(separator=" ", strip=True)
+            return BeautifulSoup(body, "html.parser").get_text(
+                separator=" ", strip=True
+            )
         return body
 
-    def get_attachments(self, message_id):
-        url = f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}/attachments"
-        response = requests.get(url, headers=self._headers())
-        response.raise_for_status()
+    @staticmethod
+    def _file_attachments(values: list[dict[str, Any]]) -> list[tuple[str, bytes]]:
         attachments = []
-        for att in response.json().get("value", []):
+        for att in values:
             if att["@odata.type"] == "#microsoft.graph.fileAttachment":
                 filename = att["name"]
                 content_bytes = base64.b64decode(att["contentBytes"])
                 attachments.append((filename, content_bytes))
         return attachments
 
+    @staticmethod
+    def attachment_text(attachments: list[tuple[str, bytes]]) -> str:
+        """Compact text rendering of the spreadsheet and text attachments, for the LLM prompt."""
+        return chunk_attachments(attachments)[0]
+
+    def prompt_chunks(
+        self,
+        email_text: str,
+        attachments: list[tuple[str, bytes]],
+        budget: int | None = settings.LLM_PROMPT_TOKEN_BUDGET,
+    ) -> tuple[str, list[str]]:
+        """
+        The email text and the attachment text split so that each extraction prompt stays
+        within budget tokens. An email body longer than half the budget is cut short.
+        """
+        if not budget:
+            return email_text, [self.attachment_text(attachments)]
+        if estimate_tokens(self._extraction_prompt(email_text)) > budget // 2:
+            email_text = email_text[: budget // 2 * CHARS_PER_TOKEN]
+        available = budget - estimate_tokens(self._extraction_prompt(email_text))
+        return email_text, chunk_attachments(attachments, max(available, 1))
+
+    @staticmethod
+    def _report_prompt_size(
+        mail: dict[str, Any], email_text: str, chunks: list[str]
+    ) -> int:
+        tokens = sum(
+            estimate_tokens(EmailParser._extraction_prompt(email_text, chunk))
+            for chunk in chunks
+        )
+        print(
+            f"LLM prompt for '{mail['subject']}': ~{tokens} tokens in {len(chunks)} chunk(s)"
+        )
+        return tokens
+
         # ----------------------
         # -
         # AI EXTRACTION
         # -----------------------
-    def parse_with_azure_openai(self, email_text: str, attachment_text: str = ""):
-        openai.api_type = "azure"
-        openai.api_base = settings.AZURE_OPENAI_ENDPOINT
-        openai.api_key = settings.AZURE_OPENAI_API_KEY
-        openai.api_version = settings.AZURE_OPENAI_API_VERSION
 
-        prompt = f"""
+    @staticmethod
+    def _extraction_prompt(email_text: str, attachment_text: str = "") -> str:
+        return f"""
         Extract the following fields from this vendor email and attachment:
         Country, Location, Qty, Size, Condition, Specs, Price, Vendor, Availability.
 
@@ -92,62 +206,312 @@ class EmailParser():
         Return the result as a JSON object.
         """
 
-        response = openai.ChatCompletion.create(
-            engine=settings.AZURE_OPENAI_DEPLOYMENT,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
-        )
-
-        result = response["choices"][0]["message"]["content"]
-
+    @staticmethod
+    def _parse_llm_json(result: str) -> dict[str, Any]:
         try:
-            return json.loads(result)
+            parsed: dict[str, Any] = json.loads(result)
+            return parsed
         except json.JSONDecodeError:
             cleaned = result.strip("` \n")
             if cleaned.startswith("json"):
                 cleaned = cleaned[4:]
             try:
-                return json.loads(cleaned)
+                parsed = json.loads(cleaned)
+                return parsed
             except Exception as e:
-                raise ValueError(f"Failed to parse LLM response as JSON. Raw: {result}") from e
+                raise ValueError(
+                    f"Failed to parse LLM response as JSON. Raw: {result}"
+                ) from e
+
+    def _extraction_cache(self) -> Optional["ExtractionCache"]:
+        if self._cache is None:
+            self._cache = get_extraction_cache()
+        return self._cache
+
+    def _cached_extraction(
+        self, prompt: str
+    ) -> tuple[str | None, dict[str, Any] | None]:
+        """Cache key of the prompt and the stored extraction, if any."""
+        cache = self._extraction_cache()
+        if cache is None:
+            return None, None
+        key = extraction_key(prompt, settings.AZURE_OPENAI_DEPLOYMENT)
+        return key, cache.get(key)
 
-    def process_inbox(self, top=5, distribution_list=None):
-        """Fetch emails, parse body + attachments, send to LLM, return structured list"""
+    def _store_extraction(self, key: str | None, parsed: dict[str, Any]) -> None:
+        cache = self._extraction_cache()
+        if key is not None and cache is not None:
+            cache.put(key, parsed)
+
+    def parse_with_azure_openai(
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        prompt = self._extraction_prompt(email_text, attachment_text)
+        key, cached = self._cached_extraction(prompt)
+        if cached is not None:
+            return cached
+
+        parsed = self._parse_llm_json(self._complete(prompt))
+        self._store_extraction(key, parsed)
+        return parsed
+
+    def _llm_client(self) -> "openai.AzureOpenAI":
+        if self._llm is None:
+            self._llm = openai.AzureOpenAI(
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                api_key=settings.AZURE_OPENAI_API_KEY,
+                api_version=settings.AZURE_OPENAI_API_VERSION,
+            )
+        client: openai.AzureOpenAI = self._llm
+        return client
+
+    def _complete(self, prompt: str) -> str:
+        response = self._llm_client().chat.completions.create(
+            model=settings.AZURE_OPENAI_DEPLOYMENT,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+        )
+        return response.choices[0].message.content or ""
+
+    @staticmethod
+    def _inbox_result(
+        mail: dict[str, Any],
+        parsed: dict[str, Any] | None = None,
+        error: Exception | None = None,
+    ) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            "email_id": mail["id"],
+            "subject": mail["subject"],
+            "from": mail["from"],
+            "received": mail["received"],
+        }
+        if error is not None:
+            result["error"] = str(error)
+            # The message may be fine; InboxSyncer keeps it pending instead of failed
+            if isinstance(error, LLM_BACKEND_ERRORS):
+                result["backend_error"] = True
+        else:
+            result["parsed"] = parsed
+        return result
+
+    def process_inbox(
+        self,
+        top: int = 5,
+        distribution_list: str | None = None,
+        fetch_concurrency: int = settings.MAIL_FETCH_CONCURRENCY,
+        llm_concurrency: int = settings.LLM_CONCURRENCY,
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch emails, parse body + attachments, send to LLM, return structured list.
+        Message contents are fetched through Graph $batch calls, at most fetch_concurrency
+        at a time, and at most llm_concurrency LLM calls run at once; results keep the
+        order of the inbox.
+        """
         emails = self.get_emails(top=top, distribution_list=distribution_list)
-        results = []
-
-        for mail in emails:
-            message_id = mail["id"]
-            body = self.get_email_body(message_id)
-
-            attachments = self.get_attachments(message_id)
-            attachment_text = ""
-            for filename, content in attachments:
-                if filename.endswith(".xlsx"):
-                    df = pd.read_excel(BytesIO(content), engine="openpyxl")
-                    attachment_text += df.to_string(index=False) + "\n"
-                elif filename.endswith(".csv"):
-                    df = pd.read_csv(BytesIO(content))
-                    attachment_text += df.to_string(index=False) + "\n"
-                elif filename.endswith(".txt"):
-                    attachment_text += content.decode(errors="ignore") + "\n"
+        return self.process_messages(emails, fetch_concurrency, llm_concurrency)
 
-            try:
-                parsed = self.parse_with_azure_openai(body, attachment_text)
-                results.append({
-                    "email_id": message_id,
-                    "subject": mail["subject"],
-                    "from": mail["from"],
-                    "received": mail["received"],
-                    "parsed": parsed
-                })
-            except Exception as e:
-                results.append({
-                    "email_id": message_id,
-                    "subject": mail["subject"],
-                    "from": mail["from"],
-                    "received": mail["received"],
-                    "error": str(e)
-                })
-
-        return results
+    def process_messages(
+        self,
+        emails: list[dict[str, Any]],
+        fetch_concurrency: int = settings.MAIL_FETCH_CONCURRENCY,
+        llm_concurrency: int = settings.LLM_CONCURRENCY,
+    ) -> list[dict[str, Any]]:
+        """process_inbox for messages already listed (dicts as returned by get_emails)."""
+        if not emails:
+            return []
+
+        llm_slots = threading.Semaphore(llm_concurrency)
+        with self.client.batch(max_concurrency=fetch_concurrency) as batch:
+            contents = [
+                batch.get(self._message_content_url(mail["id"])) for mail in emails
+            ]
+            with ThreadPoolExecutor(
+                max_workers=min(len(emails), llm_concurrency)
+            ) as pool:
+                return list(
+                    pool.map(
+                        self._process_message,
+                        emails,
+                        contents,
+                        itertools.repeat(llm_slots),
+                    )
+                )
+
+    @staticmethod
+    def structured_fields(
+        attachments: list[tuple[str, bytes]],
+    ) -> dict[str, Any] | None:
+        """Fields read straight from spreadsheet attachments, or None when the LLM is needed."""
+        if not settings.STRUCTURED_EXTRACTION_ENABLED:
+            return None
+        return extract_attachments(attachments)
+
+    def _process_message(
+        self,
+        mail: dict[str, Any],
+        content: Future[httpx.Response],
+        llm_slots: threading.Semaphore,
+    ) -> dict[str, Any]:
+        try:
+            # The first worker to ask sends the queued $batch calls
+            body, attachments = self._message_content(content.result())
+            parsed = self.structured_fields(attachments)
+            if parsed is not None:
+                return self._inbox_result(mail, parsed=parsed)
+            body, chunks = self.prompt_chunks(body, attachments)
+            tokens = self._report_prompt_size(mail, body, chunks)
+            extractions = []
+            for chunk in chunks:
+                with llm_slots:
+                    extractions.append(self.parse_with_azure_openai(body, chunk))
+            result = self._inbox_result(mail, parsed=merge_extractions(extractions))
+            result["prompt_tokens"] = tokens
+            return result
+        except Exception as e:
+            return self._inbox_result(mail, error=e)
+
+
+class AsyncEmailParser(EmailParser):
+    """
+    EmailParser on an AsyncGraphClient and the async Azure OpenAI client.
+    Every method that talks to Graph or the LLM is a coroutine.
+    """
+
+    client: AsyncGraphClient
+
+    def __init__(
+        self,
+        graph_client: "AsyncGraphClient",
+        mail_user: str = settings.MAIL_USER,
+        cache: Optional["ExtractionCache"] = None,
+    ) -> None:
+        super().__init__(graph_client, mail_user, cache)
+
+    # The coroutine overrides are not substitutable for the blocking methods
+    async def get_emails(  # type: ignore[override]
+        self, top: int = 10, distribution_list: str | None = None
+    ) -> list[dict[str, Any]]:
+        response = await self.client.get(self._messages_url(top))
+        response.raise_for_status()
+        return self._filter_messages(
+            response.json().get("value", []), distribution_list
+        )
+
+    async def get_email_body(  # type: ignore[override]
+        self, message_id: str, prefer_html: bool = False
+    ) -> str:
+        response = await self.client.get(
+            f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}"
+        )
+        response.raise_for_status()
+        return self._body_text(response.json(), prefer_html)
+
+    async def get_attachments(  # type: ignore[override]
+        self, message_id: str
+    ) -> list[tuple[str, bytes]]:
+        url = (
+            f"{self.graph_api}/users/{self.mail_user}/messages/{message_id}/attachments"
+        )
+        response = await self.client.get(url)
+        response.raise_for_status()
+        return self._file_attachments(response.json().get("value", []))
+
+    def _llm_client(self) -> "openai.AsyncAzureOpenAI":  # type: ignore[override]
+        if self._llm is None:
+            self._llm = openai.AsyncAzureOpenAI(
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                api_key=settings.AZURE_OPENAI_API_KEY,
+                api_version=settings.AZURE_OPENAI_API_VERSION,
+            )
+        client: openai.AsyncAzureOpenAI = self._llm
+        return client
+
+    async def parse_with_azure_openai(  # type: ignore[override]
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        prompt = self._extraction_prompt(email_text, attachment_text)
+        key, cached = self._cached_extraction(prompt)
+        if cached is not None:
+            return cached
+
+        parsed = self._parse_llm_json(await self._complete(prompt))
+        self._store_extraction(key, parsed)
+        return parsed
+
+    async def _complete(self, prompt: str) -> str:  # type: ignore[override]
+        response = await self._llm_client().chat.completions.create(
+            model=settings.AZURE_OPENAI_DEPLOYMENT,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+        )
+        return response.choices[0].message.content or ""
+
+    async def get_message_content(  # type: ignore[override]
+        self, message_id: str, prefer_html: bool = False
+    ) -> tuple[str, list[tuple[str, bytes]]]:
+        return self._message_content(
+            await self.client.get(self._message_content_url(message_id)), prefer_html
+        )
+
+    async def process_inbox(  # type: ignore[override]
+        self,
+        top: int = 5,
+        distribution_list: str | None = None,
+        fetch_concurrency: int = settings.MAIL_FETCH_CONCURRENCY,
+        llm_concurrency: int = settings.LLM_CONCURRENCY,
+    ) -> list[dict[str, Any]]:
+        emails = await self.get_emails(top=top, distribution_list=distribution_list)
+        return await self.process_messages(emails, fetch_concurrency, llm_concurrency)
+
+    async def process_messages(  # type: ignore[override]
+        self,
+        emails: list[dict[str, Any]],
+        fetch_concurrency: int = settings.MAIL_FETCH_CONCURRENCY,
+        llm_concurrency: int = settings.LLM_CONCURRENCY,
+    ) -> list[dict[str, Any]]:
+        llm_slots = asyncio.Semaphore(llm_concurrency)
+        async with self.client.batch(max_concurrency=fetch_concurrency) as batch:
+            contents = [
+                batch.get(self._message_content_url(mail["id"])) for mail in emails
+            ]
+            # gather returns results in the order of the inbox
+            return list(
+                await asyncio.gather(
+                    *(
+                        self._process_message(mail, content, llm_slots)
+                        for mail, content in zip(emails, contents, strict=True)
+                    )
+                )
+            )
+
+    async def _extract_chunk(
+        self, email_text: str, attachment_text: str, llm_slots: asyncio.Semaphore
+    ) -> dict[str, Any]:
+        async with llm_slots:
+            return await self.parse_with_azure_openai(email_text, attachment_text)
+
+    async def _process_message(  # type: ignore[override]
+        self,
+        mail: dict[str, Any],
+        content: asyncio.Future[httpx.Response],
+        llm_slots: asyncio.Semaphore,
+    ) -> dict[str, Any]:
+        try:
+            body, attachments = self._message_content(await content)
+            parsed = await asyncio.to_thread(self.structured_fields, attachments)
+            if parsed is not None:
+                return self._inbox_result(mail, parsed=parsed)
+            body, chunks = await asyncio.to_thread(
+                self.prompt_chunks, body, attachments
+            )
+            tokens = self._report_prompt_size(mail, body, chunks)
+            extractions = await asyncio.gather(
+                *(self._extract_chunk(body, chunk, llm_slots) for chunk in chunks)
+            )
+            result = self._inbox_result(
+                mail, parsed=merge_extractions(list(extractions))
+            )
+            result["prompt_tokens"] = tokens
+            return result
+        except Exception as e:
+            return self._inbox_result(mail, error=e)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from app.core.config import settings
+
+EXTRACTION_CACHE_FILE = "/app/app/sharepoint/llm_cache.sqlite"
+
+
+def extraction_key(prompt: str, deployment: str) -> str:
+    """
+    Content address of an extraction: the prompt with its whitespace collapsed, so
+    re-wrapped bodies and trailing newlines from attachment_text hit the same entry,
+    and the deployment, so switching models never returns another model's answer.
+    """
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{deployment}\0{normalized}".encode()).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent cache of LLM extractions in a local SQLite file. Entries expire after
+    ttl_seconds; past max_entries the least recently used ones are evicted.
+    Safe to share between threads; hit, miss and eviction counts are kept per process.
+    """
+
+    def __init__(
+        self,
+        path: str = EXTRACTION_CACHE_FILE,
+        ttl_seconds: float = settings.LLM_CACHE_TTL_SECONDS,
+        max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extraction ("
+            " key TEXT PRIMARY KEY, result TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_extraction_last_used ON extraction (last_used)"
+        )
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, created FROM extraction WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._db.execute("DELETE FROM extraction WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE extraction SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        result: dict[str, Any] = json.loads(row[0])
+        return result
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extraction (key, result, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        expired = self._db.execute(
+            "DELETE FROM extraction WHERE created < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = self._db.execute(
+            "DELETE FROM extraction WHERE key IN ("
+            " SELECT key FROM extraction ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self.evictions += expired + overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM extraction")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM extraction").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: ExtractionCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache | None:
+    """The process-wide cache, or None when LLM_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
@@ -1,177 +1,391 @@
-import os
+import asyncio
+import hashlib
 import json
-from datetime import datetime
-from typing import Dict, Any
-from app.core.config import settings
-from app.api.services.GraphClient import GraphClient
+import os
+from typing import Any
 from urllib.parse import quote
-from io import BytesIO
-import time
-import requests
+
+import numpy as np
 import pandas as pd
 
+from app.api.services.GraphClient import AsyncGraphClient, GraphClient
+from app.core.config import settings
+
+WORKBOOK_CACHE_DIR = "/app/app/sharepoint/cache"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Joins the key values of a row before hashing; empty key cells hash as KEY_NA
+KEY_SEPARATOR = "\x1f"
+KEY_NA = "\x00"
+
+
+def _excel_engine() -> str:
+    """calamine (Rust) when python-calamine is installed, otherwise openpyxl in read-only mode."""
+    if settings.EXCEL_ENGINE != "auto":
+        return settings.EXCEL_ENGINE
+    try:
+        import python_calamine  # noqa: F401
+
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+def _key_digest(values: tuple[Any, ...]) -> int:
+    """
+    63-bit blake2b digest of a row's key values. Only the values' text goes in, so ids
+    stay the same across pandas and Python versions.
+    """
+    text = KEY_SEPARATOR.join(KEY_NA if pd.isna(v) else str(v) for v in values)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def _normalize_column(name: Any) -> str:
+    return "".join(str(name).split()).lower()
+
+
+def _cast_column(column: pd.Series, meta_type: str) -> pd.Series:
+    if meta_type == "str":
+        return column.astype(str)
+    if meta_type == "float":
+        return pd.to_numeric(column, errors="coerce")
+    if meta_type == "datetime":
+        return pd.to_datetime(column, errors="coerce")
+    return column
+
+
+def _suffix_duplicates(names: list[str]) -> list[str]:
+    """Keep the first occurrence of a name, suffix later ones with _1, _2, ..."""
+    name_counts = {}
+    result = []
+    for name in names:
+        if name not in name_counts:
+            name_counts[name] = 0
+            result.append(name)
+        else:
+            name_counts[name] += 1
+            result.append(f"{name}_{name_counts[name]}")
+    return result
 
-class FileEditor():
-    def __init__(self, graph_client: 'GraphClient',
-                 site_domain=settings.SITE_DOMAIN, site_name=settings.SITE_NAME,
-                 sharepoint_folder_name=settings.SHAREPOINT_FOLDER_NAME,
-                 sharepoint_file_name=settings.SHAREPOINT_FILE_NAME,
-                 metadata_path="/app/app/sharepoint/DepotMasterMetadata.json"):
+
+def load_metadata(metadata_path: str) -> dict[str, Any]:
+    if not os.path.exists(metadata_path):
+        raise FileNotFoundError(f"Metadata file not found: {metadata_path}")
+    with open(metadata_path) as f:
+        metadata: dict[str, Any] = json.load(f)
+    return metadata
+
+
+def read_workbook(
+    excel_path: str, metadata: dict[str, Any], sheets_list: list[str]
+) -> dict[str, pd.DataFrame]:
+    """
+    Read the requested sheets of a local workbook and normalize them with the metadata.
+    Needs no Graph client, so worker processes can parse a downloaded copy on their own.
+    """
+    # Validate sheets exist in metadata
+    sheets_meta = {s["name"]: s for s in metadata["sheets"]}
+    for sheet in sheets_list:
+        if sheet not in sheets_meta:
+            raise ValueError(f"Sheet '{sheet}' not found in metadata.")
+
+    # Read only requested sheets, and only the columns the metadata knows about
+    wanted = {
+        _normalize_column(c["name"])
+        for sheet in sheets_list
+        for c in sheets_meta[sheet]["columns"]
+    }
+    df_dict = pd.read_excel(
+        excel_path,
+        sheet_name=sheets_list,
+        engine=_excel_engine(),
+        usecols=lambda c: _normalize_column(c) in wanted,
+    )
+
+    result = {}
+    for sheet_name, df in df_dict.items():
+        sheet_meta = sheets_meta[sheet_name]
+        columns_meta = sorted(sheet_meta["columns"], key=lambda x: x["position"])
+        excel_col_map = {_normalize_column(c): c for c in df.columns}
+
+        # Cast and rename every column in one pass, in metadata order
+        data = {}
+        for col_meta, out_name in zip(
+            columns_meta,
+            _suffix_duplicates([c["formatted_name"] for c in columns_meta]),
+            strict=True,
+        ):
+            excel_col_name = excel_col_map.get(_normalize_column(col_meta["name"]))
+            if excel_col_name is None:
+                print(
+                    f"Warning: Column '{col_meta['name']}' not found in Excel. Filling with NaN."
+                )
+                data[out_name] = pd.Series(pd.NA, index=df.index, dtype=object)
+                continue
+            data[out_name] = _cast_column(df[excel_col_name], col_meta["type"])
+
+        df = pd.DataFrame(data, index=df.index).reset_index(drop=True)
+        df.insert(
+            0, "instance_id", df.index.astype(int)
+        )  # Ensure type consistency for DB
+
+        # Sheets with a business key get instance_ids that survive row inserts and moves
+        if sheet_meta.get("key"):
+            df["instance_id"] = FileEditor._key_instance_ids(df, sheet_meta["key"])
+
+        # Optionally save to CSV
+        # df.to_csv(f"/app/app/sharepoint/{sheet_name}.csv", index=False)
+        result[sheet_name] = df
+
+    return result
+
+
+class FileEditor:
+    def __init__(
+        self,
+        graph_client: "GraphClient",
+        site_domain: str = settings.SITE_DOMAIN,
+        site_name: str = settings.SITE_NAME,
+        sharepoint_folder_name: str = settings.SHAREPOINT_FOLDER_NAME,
+        sharepoint_file_name: str = settings.SHAREPOINT_FILE_NAME,
+        metadata_path: str = "/app/app/sharepoint/DepotMasterMetadata.json",
+        cache_dir: str = WORKBOOK_CACHE_DIR,
+    ) -> None:
         self._client = graph_client
         self.site_domain = site_domain
         self.site_name = site_name
 
         self._headers = self._client._headers
         self.graph_api = self._client.graph_api
-        self._drive_id = None
-        self._site_id = None
+        self._drive_id: str | None = None
+        self._site_id: str | None = None
         self._sharepoint_folder_name = sharepoint_folder_name
         self._sharepoint_file_name = sharepoint_file_name
         self._metadata_path = metadata_path
+        self._cache_dir = cache_dir
 
         # Load JSON metadata
         self.metadata = self._load_metadata()
 
-    def _load_metadata(self):
-        if not os.path.exists(self._metadata_path):
-            raise FileNotFoundError(f"Metadata file not found: {self._metadata_path}")
-        with open(self._metadata_path, "r") as f:
-            return json.load(f)
+    def _load_metadata(self) -> dict[str, Any]:
+        return load_metadata(self._metadata_path)
 
-    def get_sync_data(self):
+    def get_sync_data(self) -> dict[str, Any]:
         self.get_site_id()
         self.get_drive_id()
-        encoded_file_name = quote(self._sharepoint_file_name)
-        file_path = f"{self._sharepoint_folder_name}/{encoded_file_name}"
-        url = f"{self.graph_api}/sites/{self._site_id}/drives/{self._drive_id}/root:/{file_path}"
-        response = requests.get(url, headers=self._headers())
+        response = self._client.get(self._item_url())
         response.raise_for_status()
-        return response.json()
+        item: dict[str, Any] = response.json()
+        return item
 
     # -----------------------
     # SharePoint helpers
     # -----------------------
-    def get_site_id(self):
+    def get_site_id(self) -> str:
         if self._site_id:
             return self._site_id
-        url = f"{self.graph_api}/sites/{self.site_domain}:/sites/{self.site_name}"
-        response = requests.get(url, headers=self._headers())
+        response = self._client.get(self._site_url())
         response.raise_for_status()
-        self._site_id = response.json()["id"]
-        return self._site_id
+        site_id: str = response.json()["id"]
+        self._site_id = site_id
+        return site_id
 
-    def get_drive_id(self):
+    def get_drive_id(self) -> str:
         if self._drive_id:
             return self._drive_id
         site_id = self.get_site_id()
-        url = f"{self.graph_api}/sites/{site_id}/drives"
-        response = requests.get(url, headers=self._headers())
+        response = self._client.get(f"{self.graph_api}/sites/{site_id}/drives")
         response.raise_for_status()
-        drives = response.json().get("value", [])
+        drive_id = self._find_drive_id(response.json().get("value", []))
+        self._drive_id = drive_id
+        return drive_id
+
+    def _site_url(self) -> str:
+        return f"{self.graph_api}/sites/{self.site_domain}:/sites/{self.site_name}"
+
+    def _item_url(self) -> str:
+        encoded_file_name = quote(self._sharepoint_file_name)
+        file_path = f"{self._sharepoint_folder_name}/{encoded_file_name}"
+        return f"{self.graph_api}/sites/{self._site_id}/drives/{self._drive_id}/root:/{file_path}"
+
+    @staticmethod
+    def _find_drive_id(drives: list[dict[str, Any]]) -> str:
         target_drive_name = "Documents"
         for drive in drives:
             if drive.get("name") == target_drive_name:
-                self._drive_id = drive["id"]
-                return self._drive_id
-        raise Exception(f"Document Library (Drive) named '{target_drive_name}' not found.")
+                drive_id: str = drive["id"]
+                return drive_id
+        raise Exception(
+            f"Document Library (Drive) named '{target_drive_name}' not found."
+        )
 
     # -----------------------
     # Read Excel
     # -----------------------
-    def _download_excel(self):
-        """Download workbook content from SharePoint"""
-        self.get_site_id()
-        self.get_drive_id()
-        file_path = f"{self._sharepoint_folder_name}/{self._sharepoint_file_name}"
-        # Add timestamp query to force re-download
-        timestamp = int(time.time())
-        url = f"{self.graph_api}/sites/{self._site_id}/drives/{self._drive_id}/root:/{file_path}:/content?ts={timestamp}"
-        # url = f"{self.graph_api}/sites/{self._site_id}/drives/{self._drive_id}/root:/{file_path}:/content"
-        headers = self._headers()
-        response = requests.get(url, headers=headers)
-        if response.status_code == 404:
-            raise FileNotFoundError(f"File not found: {self._sharepoint_file_name}")
-        response.raise_for_status()
-        return BytesIO(response.content)
+    def _download_excel(self, item: dict[str, Any] | None = None) -> str:
+        """
+        Return the path of a local copy of the workbook, downloading it only when the
+        driveItem cTag differs from the cached copy. The body is streamed to disk in chunks.
+        `item` is the driveItem from get_sync_data; it is fetched when not given.
+        """
+        item = item or self.get_sync_data()
+        cache_path = self._cached_workbook(item)
+        if cache_path:
+            return cache_path
+
+        url, authenticated = self._download_url(
+            item, self._drive_id or self.get_drive_id()
+        )
+        tmp_path = f"{self._cache_path()}.part"
+        with self._client.stream("GET", url, authenticated=authenticated) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(f"File not found: {self._sharepoint_file_name}")
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        return self._store_workbook(tmp_path, item)
 
-    def read_sheets_with_metadata(self, sheets_list: list[str]) -> Dict[str, pd.DataFrame]:
+    def _cache_path(self) -> str:
+        os.makedirs(self._cache_dir, exist_ok=True)
+        return os.path.join(self._cache_dir, self._sharepoint_file_name)
+
+    def _cached_workbook(self, item: dict[str, Any]) -> str | None:
+        """Path of the cached copy if its cTag matches the driveItem, otherwise None."""
+        cache_path = self._cache_path()
+        meta_path = f"{cache_path}.meta.json"
+        if os.path.exists(cache_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                cached = json.load(f)
+            if item.get("cTag") and cached.get("cTag") == item.get("cTag"):
+                print(
+                    f"Workbook '{self._sharepoint_file_name}' unchanged (cTag), using cached copy."
+                )
+                return cache_path
+        return None
+
+    def _download_url(self, item: dict[str, Any], drive_id: str) -> tuple[str, bool]:
+        """Pre-authenticated URL when Graph provides one, otherwise the content endpoint."""
+        url = item.get("@microsoft.graph.downloadUrl")
+        if url:
+            return url, False
+        return f"{self.graph_api}/drives/{drive_id}/items/{item['id']}/content", True
+
+    def _store_workbook(self, tmp_path: str, item: dict[str, Any]) -> str:
+        """Swap a finished download into the cache and record its tags."""
+        cache_path = self._cache_path()
+        os.replace(tmp_path, cache_path)
+        with open(f"{cache_path}.meta.json", "w") as f:
+            json.dump(
+                {
+                    "eTag": item.get("eTag"),
+                    "cTag": item.get("cTag"),
+                    "lastModifiedDateTime": item.get("lastModifiedDateTime"),
+                },
+                f,
+                indent=4,
+            )
+        return cache_path
+
+    @staticmethod
+    def _key_instance_ids(df: pd.DataFrame, key_columns: list[str]) -> pd.Series:
+        """
+        Derive a stable 63-bit instance_id from the business-key columns of each row.
+        Rows sharing a key are told apart by their order of appearance. Lists and cursor
+        pages order by instance_id, so keyed sheets come back in hash order rather than
+        sheet order; that order does not change when rows are inserted or moved.
+        """
+        missing = [c for c in key_columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Key columns {missing} not found in sheet columns.")
+        keys = df[key_columns].copy()
+        keys["occurrence"] = keys.groupby(key_columns, dropna=False).cumcount()
+        return pd.Series(
+            [_key_digest(row) for row in keys.itertuples(index=False, name=None)],
+            index=df.index,
+            dtype=np.int64,
+        )
+
+    def read_sheets_with_metadata(
+        self, sheets_list: list[str], item: dict[str, Any] | None = None
+    ) -> dict[str, pd.DataFrame]:
         """
         Read multiple sheets by names and apply metadata-based normalization.
+        Pass the driveItem from get_sync_data as `item` to avoid fetching it again.
         Returns a dictionary {sheet_name: DataFrame}.
         """
-        # Download workbook once
-        excel_io = self._download_excel()
-
-        # Validate sheets exist in metadata
-        valid_sheets = [s["name"] for s in self.metadata["sheets"]]
-        for sheet in sheets_list:
-            if sheet not in valid_sheets:
-                raise ValueError(f"Sheet '{sheet}' not found in metadata.")
-
-        # Read only requested sheets
-        df_dict = pd.read_excel(excel_io, sheet_name=sheets_list, engine="openpyxl")
-
-        result = {}
-        for sheet_name, df in df_dict.items():
-            # Find metadata
-            sheet_meta = next((s for s in self.metadata["sheets"] if s["name"] == sheet_name), None)
-            if not sheet_meta:
-                continue
+        # Download workbook once (or reuse the cached copy)
+        excel_path = self._download_excel(item)
+
+        return self._read_workbook(excel_path, sheets_list)
+
+    def _read_workbook(
+        self, excel_path: str, sheets_list: list[str]
+    ) -> dict[str, pd.DataFrame]:
+        return read_workbook(excel_path, self.metadata, sheets_list)
+
+
+class AsyncFileEditor(FileEditor):
+    """
+    FileEditor on an AsyncGraphClient: the Graph calls and the download are coroutines,
+    parsing the workbook runs in a worker thread so the event loop stays free.
+    """
+
+    _client: AsyncGraphClient
+
+    # The coroutine overrides are not substitutable for the blocking methods
+    async def get_sync_data(self) -> dict[str, Any]:  # type: ignore[override]
+        await self.get_drive_id()
+        response = await self._client.get(self._item_url())
+        response.raise_for_status()
+        item: dict[str, Any] = response.json()
+        return item
+
+    async def get_site_id(self) -> str:  # type: ignore[override]
+        if self._site_id:
+            return self._site_id
+        response = await self._client.get(self._site_url())
+        response.raise_for_status()
+        site_id: str = response.json()["id"]
+        self._site_id = site_id
+        return site_id
+
+    async def get_drive_id(self) -> str:  # type: ignore[override]
+        if self._drive_id:
+            return self._drive_id
+        site_id = await self.get_site_id()
+        response = await self._client.get(f"{self.graph_api}/sites/{site_id}/drives")
+        response.raise_for_status()
+        drive_id = self._find_drive_id(response.json().get("value", []))
+        self._drive_id = drive_id
+        return drive_id
+
+    async def _download_excel(  # type: ignore[override]
+        self, item: dict[str, Any] | None = None
+    ) -> str:
+        item = item or await self.get_sync_data()
+        cache_path = self._cached_workbook(item)
+        if cache_path:
+            return cache_path
+
+        url, authenticated = self._download_url(
+            item, self._drive_id or await self.get_drive_id()
+        )
+        tmp_path = f"{self._cache_path()}.part"
+        async with self._client.stream(
+            "GET", url, authenticated=authenticated
+        ) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(f"File not found: {self._sharepoint_file_name}")
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        return self._store_workbook(tmp_path, item)
 
-            # Normalize column names
-            def normalize(name: str):
-                return "".join(name.split()).lower()
-
-            excel_col_map = {normalize(c): c for c in df.columns}
-            final_cols = {}
-
-            for col_meta in sheet_meta["columns"]:
-                meta_name = col_meta["name"]
-                meta_type = col_meta["type"]
-                normalized_meta_name = normalize(meta_name)
-
-                if normalized_meta_name not in excel_col_map:
-                    print(f"Warning: Column '{meta_name}' not found in Excel. Filling with NaN.")
-                    df[meta_name] = pd.NA
-                    final_cols[meta_name] = meta_name
-                    continue
-
-                excel_col_name = excel_col_map[normalized_meta_name]
-
-                # Cast types
-                if meta_type == "str":
-                    df[excel_col_name] = df[excel_col_name].astype(str)
-                elif meta_type == "float":
-                    df[excel_col_name] = pd.to_numeric(df[excel_col_name], errors="coerce")
-                elif meta_type == "datetime":
-                    df[excel_col_name] = pd.to_datetime(df[excel_col_name], errors="coerce")
-
-                # Map to metadata name
-                df.rename(columns={excel_col_name: meta_name}, inplace=True)
-                final_cols[meta_name] = meta_name
-
-            # Reorder columns
-            ordered_cols = [c["name"] for c in sorted(sheet_meta["columns"], key=lambda x: x["position"])]
-            renamed_columns = [c["formatted_name"] for c in sorted(sheet_meta["columns"], key=lambda x: x["position"])]
-
-            name_counts = {}
-            renamed_columns_duplicates = []
-            for name in renamed_columns:
-                if name not in name_counts:
-                    name_counts[name] = 0
-                    renamed_columns_duplicates.append(name)  # first occurrence, no suffix
-                else:
-                    name_counts[name] += 1
-                    renamed_columns_duplicates.append(f"{name}_{name_counts[name]}")  # subsequent occurrences get suffix
-
-            df = df[ordered_cols]
-            df.columns = renamed_columns_duplicates
-            df = df.reset_index()
-            df['index'] = df['index'].astype(int)  # Ensure type consistency for DB
-            df.rename(columns={'index': 'instance_id'}, inplace=True)
-
-            # Optionally save to CSV
-            # df.to_csv(f"/app/app/sharepoint/{sheet_name}.csv", index=False)
-            result[sheet_name] = df
-
-        return result
+    async def read_sheets_with_metadata(  # type: ignore[override]
+        self, sheets_list: list[str], item: dict[str, Any] | None = None
+    ) -> dict[str, pd.DataFrame]:
+        excel_path = await self._download_excel(item)
+        return await asyncio.to_thread(self._read_workbook, excel_path, sheets_list)
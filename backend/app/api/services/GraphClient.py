@@ -1,34 +1,569 @@
-from msal import ConfidentialClientApplication
+import asyncio
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+from app.api.services.TokenManager import TokenManager, get_token_manager
 from app.core.config import settings
 
+# Throttled or transiently unavailable; Graph sends Retry-After on 429 and 503
+RETRY_STATUSES = {429, 502, 503, 504}
+# Only these are retried after a connection error, when the request may have been sent
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+MAX_BACKOFF_SECONDS = 30.0
+# Sub-requests per JSON $batch call, a Graph limit
+MAX_BATCH_SIZE = 20
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    """Retry-After as seconds, given either as a number or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(
+            (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(),
+            0.0,
+        )
+    except (TypeError, ValueError):
+        return None
+
 
 class GraphClient:
-    def __init__(self, client_id=settings.CLIENT_ID, tenant_id=settings.TENANT_ID,
-                 client_secret=settings.CLIENT_SECRET, graph_api=settings.GRAPH_API):
+    def __init__(
+        self,
+        client_id: str = settings.CLIENT_ID,
+        tenant_id: str = settings.TENANT_ID,
+        client_secret: str = settings.CLIENT_SECRET,
+        graph_api: str = settings.GRAPH_API,
+        timeout: float = settings.GRAPH_TIMEOUT_SECONDS,
+        max_retries: int = settings.GRAPH_MAX_RETRIES,
+        backoff: float = settings.GRAPH_BACKOFF_SECONDS,
+        max_connections: int = settings.GRAPH_MAX_CONNECTIONS,
+        token_manager: TokenManager | None = None,
+    ) -> None:
         self.client_id = client_id
         self.tenant_id = tenant_id
         self.client_secret = client_secret
         self.graph_api = graph_api.rstrip("/")
-        self._access_token = None
+        # Shared per process and refreshed in the background, starting now
+        self._tokens = token_manager or get_token_manager(
+            client_id, tenant_id, client_secret
+        )
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        # One pooled keep-alive client shared by every service built on this GraphClient
+        self.http = self._build_http(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            follow_redirects=True,
+        )
+
+    def _build_http(self, **options: Any) -> httpx.Client:
+        return httpx.Client(**options)
+
+    def authenticate(self) -> str:
+        return self._tokens.get_token()
+
+    def _headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.authenticate()}"}
+
+    # -----------------------
+    # HTTP
+    # -----------------------
+    def _backoff_seconds(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * 2**attempt))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        authenticated: bool = True,
+        stream: bool = False,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send a request through the pooled client. Relative urls are resolved against
+        graph_api. Throttled (429/503) and transient failures are retried with jittered
+        backoff, waiting at least as long as Retry-After asks. A 401 drops the cached
+        token and is retried once with a fresh one.
+        With stream=True the body is not read; close the response, or use stream().
+        """
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.graph_api}/{url.lstrip('/')}"
+        method = method.upper()
+
+        attempt, reauthenticated = 0, False
+        while True:
+            # Headers are rebuilt per attempt so a refreshed token is picked up
+            request_headers = {
+                **(self._headers() if authenticated else {}),
+                **(headers or {}),
+            }
+            request = self.http.build_request(
+                method, url, headers=request_headers, **kwargs
+            )
+            try:
+                response = self.http.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries or method not in IDEMPOTENT_METHODS:
+                    raise
+                delay = self._backoff_seconds(attempt)
+                reason = type(e).__name__
+            else:
+                if (
+                    response.status_code == 401
+                    and authenticated
+                    and not reauthenticated
+                ):
+                    print(f"Graph {method} {url} returned 401, refreshing the token.")
+                    response.close()
+                    self._tokens.invalidate()
+                    reauthenticated = True
+                    continue
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                delay = max(
+                    _retry_after_seconds(response) or 0.0,
+                    self._backoff_seconds(attempt),
+                )
+                reason = f"HTTP {response.status_code}"
+                response.close()
+            attempt += 1
+            print(
+                f"Graph {method} {url} failed ({reason}), retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs: Any) -> Iterator[httpx.Response]:
+        response = self.request(method, url, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
+
+    def batch(self, max_concurrency: int = 1) -> "GraphBatch":
+        """Collect requests into $batch calls; see GraphBatch."""
+        return GraphBatch(self, max_concurrency)
+
+    def close(self) -> None:
+        self.http.close()
+
+
+class AsyncGraphClient(GraphClient):
+    """
+    GraphClient for asyncio code: the same token handling, pooling and retry policy,
+    on an httpx.AsyncClient. request/get/post/stream/close are coroutines here.
+    """
+
+    # The async client and coroutine overrides are not substitutable for the blocking ones
+    http: httpx.AsyncClient  # type: ignore[assignment]
+
+    def _build_http(self, **options: Any) -> httpx.AsyncClient:  # type: ignore[override]
+        return httpx.AsyncClient(**options)
+
+    async def _async_headers(self) -> dict[str, str]:
+        # Only the very first token (or one after a 401) is waited for, off the event loop
+        token = self._tokens.cached_token() or await asyncio.to_thread(
+            self._tokens.get_token
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    async def request(  # type: ignore[override]
+        self,
+        method: str,
+        url: str,
+        authenticated: bool = True,
+        stream: bool = False,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.graph_api}/{url.lstrip('/')}"
+        method = method.upper()
+
+        attempt, reauthenticated = 0, False
+        while True:
+            request_headers = {
+                **(await self._async_headers() if authenticated else {}),
+                **(headers or {}),
+            }
+            request = self.http.build_request(
+                method, url, headers=request_headers, **kwargs
+            )
+            try:
+                response = await self.http.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries or method not in IDEMPOTENT_METHODS:
+                    raise
+                delay = self._backoff_seconds(attempt)
+                reason = type(e).__name__
+            else:
+                if (
+                    response.status_code == 401
+                    and authenticated
+                    and not reauthenticated
+                ):
+                    print(f"Graph {method} {url} returned 401, refreshing the token.")
+                    await response.aclose()
+                    await asyncio.to_thread(self._tokens.invalidate)
+                    reauthenticated = True
+                    continue
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                delay = max(
+                    _retry_after_seconds(response) or 0.0,
+                    self._backoff_seconds(attempt),
+                )
+                reason = f"HTTP {response.status_code}"
+                await response.aclose()
+            attempt += 1
+            print(
+                f"Graph {method} {url} failed ({reason}), retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:  # type: ignore[override]
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:  # type: ignore[override]
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(  # type: ignore[override]
+        self, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        response = await self.request(method, url, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            await response.aclose()
 
-    def authenticate(self):
-        if self._access_token:  # simple cache
-            return self._access_token
+    def batch(self, max_concurrency: int = 1) -> "AsyncGraphBatch":
+        return AsyncGraphBatch(self, max_concurrency)
 
-        app = ConfidentialClientApplication(
-            client_id=self.client_id,
-            client_credential=self.client_secret,
-            authority=f"https://login.microsoftonline.com/{self.tenant_id}"
+    async def close(self) -> None:  # type: ignore[override]
+        await self.http.aclose()
+
+
+# Resolved with the sub-response: a thread future in GraphBatch, an asyncio one in AsyncGraphBatch
+BatchFuture = Future[httpx.Response] | asyncio.Future[httpx.Response]
+# The sub-responses of one $batch call, or the exception that failed the call
+BatchResult = list[dict[str, Any]] | Exception
+
+
+class _BatchEntry:
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        json: Any,
+        headers: dict[str, str] | None,
+        future: BatchFuture,
+    ) -> None:
+        self.method = method
+        self.url = url
+        self.json = json
+        self.headers = headers or {}
+        self.future = future
+
+    def payload(self, request_id: int, graph_api: str) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "id": str(request_id),
+            "method": self.method,
+            "url": self.url[len(graph_api) :],
+        }
+        if self.json is not None:
+            request["body"] = self.json
+            request["headers"] = {"Content-Type": "application/json", **self.headers}
+        elif self.headers:
+            request["headers"] = self.headers
+        return request
+
+    def response(self, item: dict[str, Any]) -> httpx.Response:
+        """The sub-response as an httpx.Response, so callers handle it like any other."""
+        body = item.get("body")
+        options: dict[str, Any] = (
+            {"json": body}
+            if isinstance(body, (dict, list))
+            else {"content": (body or "").encode("utf-8")}
+        )
+        return httpx.Response(
+            item["status"],
+            headers=item.get("headers", {}),
+            request=httpx.Request(self.method, self.url),
+            **options,
         )
-        token = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
-        if "access_token" not in token:
-            raise Exception(f"Failed to acquire token: {token}")
-        self._access_token = token["access_token"]
-        return self._access_token
 
-    def _headers(self):
-        if not self._access_token:
-            self.authenticate()
-        return {"Authorization": f"Bearer {self._access_token}"}
 
+class GraphBatch:
+    """
+    Collects Graph requests and sends them as JSON $batch calls of up to MAX_BATCH_SIZE
+    sub-requests, max_concurrency calls at a time. Each request returns a Future of its
+    httpx.Response. Asking a future for its result sends everything still queued, as
+    does leaving the `with` block. Throttled sub-requests (429/503/...) are sent again in
+    a later batch after their Retry-After, up to the client's max_retries.
+    Urls outside graph_api cannot be batched and are sent on their own right away.
+    """
+
+    def __init__(self, client: GraphClient, max_concurrency: int = 1):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._pending: list[_BatchEntry] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "GraphBatch":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
+
+    def _absolute(self, url: str) -> str:
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.client.graph_api}/{url.lstrip('/')}"
+        return url
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        json: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> Future[httpx.Response]:
+        url = self._absolute(url)
+        future = _BatchFuture(self)
+        if not url.startswith(f"{self.client.graph_api}/"):
+            try:
+                future.set_result(
+                    self.client.request(method, url, json=json, headers=headers)
+                )
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        with self._lock:
+            self._pending.append(
+                _BatchEntry(method.upper(), url, json, headers, future)
+            )
+        return future
+
+    def get(self, url: str, **kwargs: Any) -> Future[httpx.Response]:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> Future[httpx.Response]:
+        return self.request("POST", url, **kwargs)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        attempt = 0
+        while pending:
+            chunks = [
+                pending[i : i + MAX_BATCH_SIZE]
+                for i in range(0, len(pending), MAX_BATCH_SIZE)
+            ]
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, len(chunks))
+            ) as pool:
+                results = list(pool.map(self._send, chunks))
+            pending, delay = _settle(
+                chunks, results, attempt >= self.client.max_retries
+            )
+            if pending:
+                delay = max(delay, self.client._backoff_seconds(attempt))
+                attempt += 1
+                print(
+                    f"Graph $batch: {len(pending)} throttled sub-requests, retry {attempt} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def _send(self, chunk: list[_BatchEntry]) -> BatchResult:
+        """The sub-responses of one $batch call, or the exception that failed the call."""
+        try:
+            requests = [
+                entry.payload(i, self.client.graph_api) for i, entry in enumerate(chunk)
+            ]
+            response = self.client.post("$batch", json={"requests": requests})
+            response.raise_for_status()
+            responses: list[dict[str, Any]] = response.json().get("responses", [])
+            return responses
+        except Exception as e:
+            return e
+
+
+class _BatchFuture(Future[httpx.Response]):
+    def __init__(self, batch: GraphBatch) -> None:
+        super().__init__()
+        self._batch = batch
+
+    def result(self, timeout: float | None = None) -> httpx.Response:
+        if not self.done():
+            self._batch.flush()
+        return super().result(timeout)
+
+    def exception(self, timeout: float | None = None) -> BaseException | None:
+        if not self.done():
+            self._batch.flush()
+        return super().exception(timeout)
+
+
+def _settle(
+    chunks: list[list[_BatchEntry]], results: list[BatchResult], final: bool
+) -> tuple[list[_BatchEntry], float]:
+    """
+    Resolve the futures of sent chunks. Returns the throttled entries to send again
+    (none when `final`) and the longest Retry-After among them.
+    """
+    retry: list[_BatchEntry] = []
+    delay = 0.0
+    for chunk, result in zip(chunks, results, strict=True):
+        if isinstance(result, Exception):
+            for entry in chunk:
+                entry.future.set_exception(result)
+            continue
+        by_id = {item["id"]: item for item in result}
+        for i, entry in enumerate(chunk):
+            item = by_id.get(str(i))
+            if item is None:
+                entry.future.set_exception(
+                    Exception(f"No response for batched {entry.method} {entry.url}")
+                )
+                continue
+            response = entry.response(item)
+            if response.status_code in RETRY_STATUSES and not final:
+                retry.append(entry)
+                delay = max(delay, _retry_after_seconds(response) or 0.0)
+            else:
+                entry.future.set_result(response)
+    return retry, delay
+
+
+class AsyncGraphBatch(GraphBatch):
+    """
+    GraphBatch for AsyncGraphClient. Requests return asyncio futures; everything queued
+    in the same event-loop step is sent together on the next step, so awaiting a future
+    right away works too.
+    """
+
+    client: AsyncGraphClient
+
+    def __init__(self, client: AsyncGraphClient, max_concurrency: int = 1) -> None:
+        super().__init__(client, max_concurrency)
+        self._scheduled = False
+        self._flushes: set[asyncio.Task[None]] = set()
+
+    async def __aenter__(self) -> "AsyncGraphBatch":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.flush()
+        await asyncio.gather(*self._flushes)
+
+    # The coroutine overrides are not substitutable for the blocking methods
+    def request(  # type: ignore[override]
+        self,
+        method: str,
+        url: str,
+        json: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> asyncio.Future[httpx.Response]:
+        url = self._absolute(url)
+        if not url.startswith(f"{self.client.graph_api}/"):
+            return asyncio.ensure_future(
+                self.client.request(method, url, json=json, headers=headers)
+            )
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[httpx.Response] = loop.create_future()
+        self._pending.append(_BatchEntry(method.upper(), url, json, headers, future))
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._schedule_flush)
+        return future
+
+    def get(self, url: str, **kwargs: Any) -> asyncio.Future[httpx.Response]:  # type: ignore[override]
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> asyncio.Future[httpx.Response]:  # type: ignore[override]
+        return self.request("POST", url, **kwargs)
+
+    def _schedule_flush(self) -> None:
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:  # type: ignore[override]
+        pending, self._pending, self._scheduled = self._pending, [], False
+        slots = asyncio.Semaphore(self.max_concurrency)
+        attempt = 0
+        while pending:
+            chunks = [
+                pending[i : i + MAX_BATCH_SIZE]
+                for i in range(0, len(pending), MAX_BATCH_SIZE)
+            ]
+            results = await asyncio.gather(
+                *(self._send(chunk, slots) for chunk in chunks)
+            )
+            pending, delay = _settle(
+                chunks, results, attempt >= self.client.max_retries
+            )
+            if pending:
+                delay = max(delay, self.client._backoff_seconds(attempt))
+                attempt += 1
+                print(
+                    f"Graph $batch: {len(pending)} throttled sub-requests, retry {attempt} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
 
+    async def _send(  # type: ignore[override]
+        self, chunk: list[_BatchEntry], slots: asyncio.Semaphore
+    ) -> BatchResult:
+        try:
+            requests = [
+                entry.payload(i, self.client.graph_api) for i, entry in enumerate(chunk)
+            ]
+            async with slots:
+                response = await self.client.post("$batch", json={"requests": requests})
+            response.raise_for_status()
+            responses: list[dict[str, Any]] = response.json().get("responses", [])
+            return responses
+        except Exception as e:
+            return e
@@ -0,0 +1,222 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, and_, col, or_, select
+
+from app.api.services.EmailParser import EmailParser
+from app.core.config import settings
+from app.models.models_mail import MailSyncState, ProcessedEmail
+
+# Only what _filter_messages reads; bodies are fetched when a message is processed
+MESSAGE_FIELDS = "subject,from,toRecipients,receivedDateTime"
+# SQL Server rejects statements with more than 2100 parameters
+MAX_IN_PARAMETERS = 2000
+
+
+def _parse_graph_time(value: str | None) -> datetime | None:
+    """Graph timestamps as naive UTC datetimes, the way they are stored."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        return parsed
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class InboxSyncer:
+    """
+    Incremental inbox ingestion. Follows the Inbox messages delta from a delta link
+    stored per mailbox in the database, or from the receivedDateTime watermark when there
+    is no usable link. Only unseen messages go to the EmailParser; each is recorded with
+    its extraction in the transaction that advances the delta link, so it is processed once.
+    Messages whose extraction failed are retried on later syncs, up to max_attempts.
+    When the extraction service itself failed they are kept pending and retried without
+    using up an attempt.
+    """
+
+    def __init__(
+        self,
+        email_parser: "EmailParser",
+        engine: Engine | None = None,
+        distribution_list: str | None = settings.MAIL_SYNC_DISTRIBUTION_LIST,
+        lookback_days: int = settings.MAIL_SYNC_LOOKBACK_DAYS,
+        max_attempts: int = settings.MAIL_SYNC_MAX_ATTEMPTS,
+    ) -> None:
+        if engine is None:
+            from app.core.db import engine
+        self.parser = email_parser
+        self.engine = engine
+        self.mailbox = email_parser.mail_user
+        self.distribution_list = distribution_list
+        self.lookback_days = lookback_days
+        self.max_attempts = max_attempts
+        # Ids this process has finished with, so repeats skip the database as well
+        self._seen: set[str] = set()
+
+    def sync(self) -> list[dict[str, Any]]:
+        """Process the messages received since the last sync; returns their results."""
+        with Session(self.engine) as session:
+            state = session.get(MailSyncState, self.mailbox)
+            if state is None:
+                state = MailSyncState(mailbox=self.mailbox)
+            else:
+                session.expunge(state)
+
+        messages, delta_link = self._fetch_changes(state)
+        emails = self._unseen(
+            self.parser._filter_messages(messages, self.distribution_list)
+        )
+        emails += self._failed(exclude={m["id"] for m in emails})
+        if emails:
+            print(f"📨 Processing {len(emails)} new messages for '{self.mailbox}'...")
+        results = self.parser.process_messages(emails)
+
+        received = [
+            t
+            for t in (_parse_graph_time(m.get("receivedDateTime")) for m in messages)
+            if t
+        ]
+        self._record(state, emails, results, delta_link, max(received, default=None))
+        return results
+
+    # -----------------------
+    # Graph
+    # -----------------------
+    def _initial_url(self, since: datetime | None) -> str:
+        since = since or _utcnow() - timedelta(days=self.lookback_days)
+        return (
+            f"{self.parser.graph_api}/users/{self.mailbox}/mailFolders/Inbox/messages/delta"
+            f"?changeType=created&$select={MESSAGE_FIELDS}"
+            f"&$filter=receivedDateTime ge {since.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+        )
+
+    def _fetch_changes(
+        self, state: MailSyncState
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        if not state.delta_link:
+            return self._follow(self._initial_url(state.watermark))
+        try:
+            return self._follow(state.delta_link)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 410:
+                raise
+            print(
+                f"Mail delta token expired for '{self.mailbox}', resuming from the watermark."
+            )
+            return self._follow(self._initial_url(state.watermark))
+
+    def _follow(self, url: str) -> tuple[list[dict[str, Any]], str | None]:
+        """Walk nextLink pages; returns the created messages and the new delta link."""
+        messages: list[dict[str, Any]] = []
+        next_url: str | None = url
+        delta_link: str | None = None
+        while next_url:
+            response = self.parser.client.get(next_url)
+            response.raise_for_status()
+            body = response.json()
+            messages.extend(m for m in body.get("value", []) if "@removed" not in m)
+            next_url = body.get("@odata.nextLink")
+            delta_link = body.get("@odata.deltaLink", delta_link)
+        return messages, delta_link
+
+    # -----------------------
+    # Processed messages
+    # -----------------------
+    def _unseen(self, emails: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # A message can show up on more than one page
+        candidates = [
+            m
+            for m in {m["id"]: m for m in emails}.values()
+            if m["id"] not in self._seen
+        ]
+        known: set[str] = set()
+        with Session(self.engine) as session:
+            ids = [m["id"] for m in candidates]
+            for i in range(0, len(ids), MAX_IN_PARAMETERS):
+                chunk = ids[i : i + MAX_IN_PARAMETERS]
+                known.update(
+                    session.exec(
+                        select(ProcessedEmail.message_id).where(
+                            col(ProcessedEmail.message_id).in_(chunk)
+                        )
+                    )
+                )
+        self._seen.update(known)
+        return [m for m in candidates if m["id"] not in known]
+
+    def _failed(self, exclude: set[str]) -> list[dict[str, Any]]:
+        """Earlier messages that are pending or whose extraction failed and may be tried again."""
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(ProcessedEmail).where(
+                    ProcessedEmail.mailbox == self.mailbox,
+                    or_(
+                        ProcessedEmail.status == "pending",
+                        and_(
+                            ProcessedEmail.status == "error",
+                            ProcessedEmail.attempts < self.max_attempts,
+                        ),
+                    ),
+                )
+            ).all()
+        return [
+            {
+                "id": row.message_id,
+                "subject": row.subject,
+                "from": row.sender,
+                "received": row.received.isoformat() if row.received else None,
+                "to": [],
+            }
+            for row in rows
+            if row.message_id not in exclude
+        ]
+
+    def _record(
+        self,
+        state: MailSyncState,
+        emails: list[dict[str, Any]],
+        results: list[dict[str, Any]],
+        delta_link: str | None,
+        newest: datetime | None,
+    ) -> None:
+        now = _utcnow()
+        with Session(self.engine) as session:
+            for mail, result in zip(emails, results, strict=True):
+                failed = "error" in result
+                row = session.get(ProcessedEmail, mail["id"])
+                if row is None:
+                    row = ProcessedEmail(
+                        message_id=mail["id"],
+                        mailbox=self.mailbox,
+                        attempts=0,
+                        subject=(mail.get("subject") or "")[:255],
+                        sender=mail.get("from"),
+                        received=_parse_graph_time(mail.get("received")),
+                        status="",
+                    )
+                if result.get("backend_error"):
+                    # The extraction service was down: not the message's fault
+                    row.status = "pending"
+                else:
+                    row.status = "error" if failed else "parsed"
+                    row.attempts += 1
+                row.result = result["error"] if failed else json.dumps(result["parsed"])
+                row.processed_at = now
+                session.add(row)
+
+            state.delta_link = delta_link or state.delta_link
+            if newest and (state.watermark is None or newest > state.watermark):
+                state.watermark = newest
+            state.updated_at = now
+            session.merge(state)
+            session.commit()
+
+        # Failed ones come back through _failed, not through the delta
+        self._seen.update(mail["id"] for mail in emails)
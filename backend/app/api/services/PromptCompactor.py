@@ -0,0 +1,123 @@
+import math
+from io import BytesIO
+from typing import Any
+
+import pandas as pd
+
+# Rough tokens for English and tabular text; close enough to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _cell(value: Any) -> str:
+    # Blank rows turn integer columns into floats; "12.0" costs tokens and reads worse
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return " ".join(str(value).split())
+
+
+def compact_frame(df: pd.DataFrame) -> list[str]:
+    """
+    A table as tab-separated lines, header first: empty rows and columns dropped, cells
+    stripped and duplicate rows removed. Far fewer tokens than the padded df.to_string.
+    """
+    df = df.dropna(how="all").dropna(axis=1, how="all")
+    if df.empty:
+        return []
+    df = df.astype(object).where(df.notna(), "")
+    df = df.map(_cell)
+    df = df.drop_duplicates()
+    header = "\t".join(" ".join(str(c).split()) for c in df.columns)
+    return [header] + ["\t".join(row) for row in df.itertuples(index=False, name=None)]
+
+
+def _attachment_blocks(
+    attachments: list[tuple[str, bytes]],
+) -> list[tuple[str | None, list[str]]]:
+    """(header, lines) per table or text attachment; text has no header to repeat."""
+    blocks: list[tuple[str | None, list[str]]] = []
+    for filename, content in attachments:
+        if filename.endswith(".xlsx"):
+            lines = compact_frame(pd.read_excel(BytesIO(content), engine="openpyxl"))
+        elif filename.endswith(".csv"):
+            lines = compact_frame(pd.read_csv(BytesIO(content)))
+        elif filename.endswith(".txt"):
+            text = [
+                line
+                for line in content.decode(errors="ignore").strip().splitlines()
+                if line.strip()
+            ]
+            if text:
+                blocks.append((None, text))
+            continue
+        else:
+            continue
+        if lines:
+            blocks.append((lines[0], lines[1:]))
+    return blocks
+
+
+def _truncate(line: str, budget: int) -> str:
+    return line if estimate_tokens(line) <= budget else line[: budget * CHARS_PER_TOKEN]
+
+
+def chunk_attachments(
+    attachments: list[tuple[str, bytes]], budget: int | None = None
+) -> list[str]:
+    """
+    Compacted attachment text split into chunks of at most budget tokens each. Tables
+    that overflow a chunk continue in the next one under a repeated header, so every
+    chunk can be extracted on its own. Without a budget everything is one chunk.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+
+    def flush() -> None:
+        nonlocal current, used
+        if current:
+            chunks.append("\n".join(current))
+        current, used = [], 0
+
+    for header, lines in _attachment_blocks(attachments):
+        header_cost = estimate_tokens(header) + 1 if header is not None else 0
+        if budget is not None and current and used + header_cost > budget:
+            flush()
+        if header is not None:
+            current.append(header)
+            used += header_cost
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if budget is not None and used + cost > budget and used > header_cost:
+                flush()
+                if header is not None:
+                    current.append(header)
+                    used += header_cost
+            if budget is not None:
+                line = _truncate(line, max(budget - used, 1))
+                cost = min(cost, estimate_tokens(line) + 1)
+            current.append(line)
+            used += cost
+    flush()
+    return chunks or [""]
+
+
+def merge_extractions(results: list[Any]) -> Any:
+    """
+    One extraction for a message that was extracted in chunks. A single result is
+    returned as is; otherwise the items of every chunk are concatenated.
+    """
+    if len(results) == 1:
+        return results[0]
+    items: list[Any] = []
+    for result in results:
+        if isinstance(result, list):
+            items.extend(result)
+        elif isinstance(result, dict) and isinstance(result.get("items"), list):
+            items.extend(result["items"])
+        else:
+            items.append(result)
+    return {"items": items, "chunks": len(results)}
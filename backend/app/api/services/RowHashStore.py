@@ -0,0 +1,270 @@
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import IO, Any
+
+import numpy as np
+import pandas as pd
+
+ROW_HASH_FILE = "/app/app/sharepoint/sheet_row_hashes.json"
+
+# Snapshot series are named after the digest that produced them
+LEGACY_HASH_NAME = "sha256"
+VECTORIZED_HASH_NAME = "hash64"
+
+# sha256 hex digests written by the per-row hashing path
+LEGACY_DIGEST_LENGTH = 64
+
+# Prefix of the per-cell digest fields in binary snapshots
+CELL_FIELD_PREFIX = "cell:"
+
+# Sheet -> last synced time, committed together with the snapshots
+SYNCED_TIMES_KEY = "__last_synced__"
+
+
+def empty_snapshot() -> pd.Series:
+    return pd.Series(
+        np.array([], dtype=np.uint64),
+        index=pd.Index([], dtype=np.int64),
+        name=VECTORIZED_HASH_NAME,
+    )
+
+
+def atomic_write(
+    file_path: str, write: Callable[[IO[Any]], None], mode: str = "wb"
+) -> None:
+    """Write to a temp file next to file_path and swap it in, so readers never see a partial file."""
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class RowHashStore(ABC):
+    """
+    Persists per-sheet row-hash snapshots.
+    A snapshot is a uint64 Series of row digests indexed by row key.
+    Stores may also keep a uint32 digest per cell (a DataFrame indexed by row key).
+    """
+
+    @abstractmethod
+    def load(self, sheet_name: str) -> pd.Series:
+        """Row digests of a sheet, empty if it has no snapshot yet."""
+
+    def load_cells(self, sheet_name: str) -> pd.DataFrame | None:
+        """Per-cell digests of a sheet, or None if the store does not keep them."""
+        return None
+
+    def load_synced_time(self, sheet_name: str) -> str | None:
+        """Last synced time saved with the sheet's snapshot, or None."""
+        return None
+
+    @abstractmethod
+    def save(
+        self,
+        snapshots: dict[str, pd.Series],
+        cells: dict[str, pd.DataFrame] | None = None,
+        synced_times: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Persist the given sheets and their last synced times in one atomic commit,
+        leaving other sheets untouched. A crash leaves the previous state whole.
+        """
+
+
+class JsonRowHashStore(RowHashStore):
+    """
+    The original single-file format: {sheet: {str(key): hex digest}}, plus the last
+    synced times under SYNCED_TIMES_KEY. One file, so every save is one atomic write.
+    """
+
+    def __init__(self, file_path: str = ROW_HASH_FILE):
+        self.file_path = file_path
+        self._data: dict[str, Any] | None = None
+
+    def _read(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = {}
+            if os.path.exists(self.file_path):
+                try:
+                    with open(self.file_path) as f:
+                        self._data = json.load(f)
+                except json.JSONDecodeError:
+                    print(
+                        f"Warning: Could not decode JSON from {self.file_path}. Resetting hashes."
+                    )
+        return self._data
+
+    def load(self, sheet_name: str) -> pd.Series:
+        hashes = self._read().get(sheet_name, {})
+        if not hashes:
+            return empty_snapshot()
+        sample = next(iter(hashes.values()))
+        name = (
+            LEGACY_HASH_NAME
+            if len(sample) == LEGACY_DIGEST_LENGTH
+            else VECTORIZED_HASH_NAME
+        )
+        keys = np.fromiter((int(k) for k in hashes), dtype=np.int64, count=len(hashes))
+        # Legacy sha256 digests are compared on their first 64 bits
+        digests = np.fromiter(
+            (int(h[:16], 16) for h in hashes.values()),
+            dtype=np.uint64,
+            count=len(hashes),
+        )
+        return pd.Series(digests, index=keys, name=name)
+
+    def load_synced_time(self, sheet_name: str) -> str | None:
+        synced_time: str | None = self._read().get(SYNCED_TIMES_KEY, {}).get(sheet_name)
+        return synced_time
+
+    def save(
+        self,
+        snapshots: dict[str, pd.Series],
+        cells: dict[str, pd.DataFrame] | None = None,
+        synced_times: dict[str, str] | None = None,
+    ) -> None:
+        data = self._read()
+        for sheet_name, hashes in snapshots.items():
+            data[sheet_name] = {
+                str(k): format(int(h), "016x") for k, h in hashes.items()
+            }
+        if synced_times:
+            data.setdefault(SYNCED_TIMES_KEY, {}).update(synced_times)
+        atomic_write(self.file_path, lambda f: json.dump(data, f, indent=4), mode="w")
+
+
+class NumpyRowHashStore(RowHashStore):
+    """
+    One .npy file of (key, 64-bit digest, 32-bit cell digests...) records per sheet, in a
+    directory named after ROW_HASH_FILE. Sheets are only read when asked for, through a
+    memory map. Sheets without a .npy file yet are read from the JSON snapshot, which
+    migrates them.
+
+    Every save writes new generation files next to the current ones, then commits them
+    with the last synced times by replacing manifest.json. Only the files the manifest
+    names are read, so a crash before that leaves the previous commit in effect.
+    """
+
+    RECORD_FIELDS = [("key", "<i8"), ("digest", "<u8")]
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, file_path: str = ROW_HASH_FILE):
+        self.directory = os.path.splitext(file_path)[0]
+        self._json_store = JsonRowHashStore(file_path)
+
+    def _manifest(self) -> dict[str, Any]:
+        path = os.path.join(self.directory, self.MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"generation": 0, "sheets": {}, "last_synced": {}}
+        with open(path) as f:
+            manifest: dict[str, Any] = json.load(f)
+        return manifest
+
+    def _sheet_path(self, sheet_name: str) -> str:
+        # Sheets not in the manifest yet may have a file from before manifests
+        file_name = self._manifest()["sheets"].get(sheet_name, f"{sheet_name}.npy")
+        return os.path.join(self.directory, file_name)
+
+    def _records(self, sheet_name: str) -> np.ndarray | None:
+        path = self._sheet_path(sheet_name)
+        if not os.path.exists(path):
+            return None
+        records: np.ndarray = np.load(path, mmap_mode="r")
+        return records
+
+    def load_synced_time(self, sheet_name: str) -> str | None:
+        synced_time: str | None = self._manifest()["last_synced"].get(sheet_name)
+        return synced_time
+
+    def load(self, sheet_name: str) -> pd.Series:
+        records = self._records(sheet_name)
+        if records is None:
+            return self._json_store.load(sheet_name)
+        return pd.Series(
+            records["digest"], index=pd.Index(records["key"]), name=VECTORIZED_HASH_NAME
+        )
+
+    def load_cells(self, sheet_name: str) -> pd.DataFrame | None:
+        records = self._records(sheet_name)
+        if records is None:
+            return None
+        names = records.dtype.names or ()
+        fields = [f for f in names if f.startswith(CELL_FIELD_PREFIX)]
+        if not fields:
+            return None
+        return pd.DataFrame(
+            {f[len(CELL_FIELD_PREFIX) :]: records[f] for f in fields},
+            index=pd.Index(records["key"]),
+        )
+
+    def save(
+        self,
+        snapshots: dict[str, pd.Series],
+        cells: dict[str, pd.DataFrame] | None = None,
+        synced_times: dict[str, str] | None = None,
+    ) -> None:
+        cells = cells or {}
+        manifest = self._manifest()
+        generation = manifest["generation"] + 1
+        for sheet_name, hashes in snapshots.items():
+            # Row and cell digests share one file so they are always swapped in together
+            sheet_cells = cells.get(sheet_name, pd.DataFrame(index=hashes.index))
+            cell_columns = list(sheet_cells.columns)
+            dtype = np.dtype(
+                self.RECORD_FIELDS
+                + [(f"{CELL_FIELD_PREFIX}{c}", "<u4") for c in cell_columns]
+            )
+            records = np.empty(len(hashes), dtype=dtype)
+            records["key"] = hashes.index.to_numpy()
+            records["digest"] = hashes.to_numpy()
+            for c in cell_columns:
+                records[f"{CELL_FIELD_PREFIX}{c}"] = (
+                    sheet_cells[c].reindex(hashes.index).to_numpy()
+                )
+
+            def write(f: IO[Any], r: np.ndarray = records) -> None:
+                np.save(f, r)
+
+            file_name = f"{sheet_name}.{generation}.npy"
+            atomic_write(os.path.join(self.directory, file_name), write)
+            manifest["sheets"][sheet_name] = file_name
+
+        # The commit point: the new files and times take effect together
+        manifest["generation"] = generation
+        manifest["last_synced"].update(synced_times or {})
+        atomic_write(
+            os.path.join(self.directory, self.MANIFEST_FILE),
+            lambda f: json.dump(manifest, f, indent=4),
+            mode="w",
+        )
+        self._remove_stale_files(manifest)
+
+    def _remove_stale_files(self, manifest: dict[str, Any]) -> None:
+        """Older generations of the committed sheets, and leftovers of interrupted saves."""
+        current = set(manifest["sheets"].values())
+        for file_name in os.listdir(self.directory):
+            sheet_name = file_name.split(".", 1)[0]
+            if (
+                file_name.endswith(".npy")
+                and sheet_name in manifest["sheets"]
+                and file_name not in current
+            ):
+                os.remove(os.path.join(self.directory, file_name))
+
+
+def get_row_hash_store(kind: str, file_path: str = ROW_HASH_FILE) -> RowHashStore:
+    if kind == "json":
+        return JsonRowHashStore(file_path)
+    if kind == "numpy":
+        return NumpyRowHashStore(file_path)
+    raise ValueError(f"Unknown row hash store '{kind}'.")
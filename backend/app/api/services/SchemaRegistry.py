@@ -0,0 +1,44 @@
+import hashlib
+import threading
+from typing import Any
+
+from sqlalchemy import Column
+from sqlalchemy.engine import Dialect
+
+
+class SchemaRegistry:
+    """
+    Remembers, for the lifetime of the process, which tables have already been verified
+    against which column set, so DDL and catalog queries only run when the schema changes.
+    """
+
+    def __init__(self) -> None:
+        self._fingerprints: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(columns: list[Column[Any]], dialect: Dialect, *extra: str) -> str:
+        parts = [f"{c.name}:{c.type.compile(dialect=dialect)}" for c in columns] + list(
+            extra
+        )
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def is_verified(self, table_name: str, fingerprint: str) -> bool:
+        with self._lock:
+            return self._fingerprints.get(table_name) == fingerprint
+
+    def mark_verified(self, table_name: str, fingerprint: str) -> None:
+        with self._lock:
+            self._fingerprints[table_name] = fingerprint
+
+    def invalidate(self, table_name: str | None = None) -> None:
+        """Forget one table, or every table, e.g. after it was dropped outside the sync."""
+        with self._lock:
+            if table_name is None:
+                self._fingerprints.clear()
+            else:
+                self._fingerprints.pop(table_name, None)
+
+
+# Shared by every DatabaseClient in the process
+schema_registry = SchemaRegistry()
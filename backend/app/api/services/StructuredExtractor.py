@@ -0,0 +1,177 @@
+import math
+import re
+from datetime import date, datetime
+from io import BytesIO
+from typing import Any
+
+import pandas as pd
+
+from app.core.config import settings
+
+# The fields the LLM prompt asks for, and the column headers vendors use for them
+FIELD_ALIASES: dict[str, tuple[str, ...]] = {
+    "Country": ("country", "countryoforigin", "origin"),
+    "Location": (
+        "location",
+        "city",
+        "port",
+        "depot",
+        "yard",
+        "pickuplocation",
+        "pickup",
+        "place",
+    ),
+    "Qty": (
+        "qty",
+        "quantity",
+        "units",
+        "noofunits",
+        "unitsavailable",
+        "pcs",
+        "count",
+        "volume",
+    ),
+    "Size": (
+        "size",
+        "containersize",
+        "sizetype",
+        "type",
+        "containertype",
+        "equipment",
+        "eqtype",
+    ),
+    "Condition": ("condition", "grade", "cond", "containercondition"),
+    "Specs": (
+        "specs",
+        "spec",
+        "specifications",
+        "specification",
+        "description",
+        "details",
+    ),
+    "Price": (
+        "price",
+        "unitprice",
+        "priceusd",
+        "priceeur",
+        "rate",
+        "cost",
+        "offerprice",
+    ),
+    "Vendor": ("vendor", "supplier", "seller", "company", "owner"),
+    "Availability": (
+        "availability",
+        "available",
+        "availablefrom",
+        "releasedate",
+        "ready",
+        "eta",
+    ),
+}
+_ALIAS_FIELDS = {
+    alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases
+}
+# Title or logo rows above the real header are common in vendor sheets
+HEADER_SCAN_ROWS = 10
+
+
+def _normalize_header(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(value).lower())
+
+
+def map_columns(headers: list[Any]) -> dict[int, str]:
+    """Column positions mapped to target fields; the first column wins for each field."""
+    mapping: dict[int, str] = {}
+    for position, header in enumerate(headers):
+        field = _ALIAS_FIELDS.get(_normalize_header(header))
+        if field and field not in mapping.values():
+            mapping[position] = field
+    return mapping
+
+
+def _json_value(value: Any) -> Any:
+    if (
+        value is None
+        or (isinstance(value, float) and math.isnan(value))
+        or value is pd.NaT
+    ):
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+
+def extract_table(
+    raw: pd.DataFrame, min_fields: int = settings.STRUCTURED_EXTRACTION_MIN_FIELDS
+) -> list[dict[str, Any]] | None:
+    """
+    Rows of a header-less sheet as dicts of the target fields, or None when no row in
+    the first HEADER_SCAN_ROWS looks like a header naming at least min_fields of them.
+    """
+    for header_row in range(min(HEADER_SCAN_ROWS, len(raw))):
+        mapping = map_columns(raw.iloc[header_row].tolist())
+        if len(mapping) >= min_fields:
+            break
+    else:
+        return None
+
+    rows = []
+    body = raw.iloc[header_row + 1 :, list(mapping)]
+    for values in body.itertuples(index=False, name=None):
+        row = dict.fromkeys(FIELD_ALIASES)
+        row.update(
+            {
+                field: _json_value(v)
+                for field, v in zip(mapping.values(), values, strict=True)
+            }
+        )
+        if any(v is not None for v in row.values()):
+            rows.append(row)
+    return rows
+
+
+def _read_tables(filename: str, content: bytes) -> list[pd.DataFrame]:
+    name = filename.lower()
+    if name.endswith(".xlsx"):
+        return list(
+            pd.read_excel(
+                BytesIO(content), sheet_name=None, header=None, engine="openpyxl"
+            ).values()
+        )
+    if name.endswith(".csv"):
+        return [pd.read_csv(BytesIO(content), header=None, dtype=object)]
+    # Same as attachment_text: other files (signature images, PDFs) never reach the LLM either
+    return []
+
+
+def extract_attachments(attachments: list[tuple[str, bytes]]) -> dict[str, Any] | None:
+    """
+    Deterministic extraction from spreadsheet attachments. Returns None, meaning the LLM
+    has to read the message, unless there is at least one table, no attachment is free text
+    and every non-empty sheet has a recognisable header.
+    """
+    items: list[dict[str, Any]] = []
+    for filename, content in attachments:
+        if filename.lower().endswith(".txt"):
+            return None
+        try:
+            tables = _read_tables(filename, content)
+        except Exception as e:
+            print(f"Could not read '{filename}' as a table: {e}")
+            return None
+        for df in tables:
+            if df.dropna(how="all").empty:
+                continue
+            rows = extract_table(df)
+            if rows is None:
+                return None
+            items.extend(rows)
+    if not items:
+        return None
+    return {"items": items, "extracted_by": "rules"}
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from msal import ConfidentialClientApplication
+
+from app.core.config import settings
+
+GRAPH_SCOPES = ["https://graph.microsoft.com/.default"]
+
+# Wait between attempts when the token endpoint fails, and at least this long between refreshes
+RETRY_SECONDS = 5.0
+
+
+class TokenManager:
+    """
+    Holds the app-only Graph token for one tenant/client and refreshes it in a background
+    thread `refresh_margin` seconds before it expires. Callers only read the cached token;
+    they block only until the very first token arrives, or after invalidate().
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        tenant_id: str,
+        client_secret: str,
+        refresh_margin: float = settings.GRAPH_TOKEN_REFRESH_MARGIN_SECONDS,
+        retry_seconds: float = RETRY_SECONDS,
+        app: ConfidentialClientApplication | None = None,
+    ):
+        self.refresh_margin = refresh_margin
+        self.retry_seconds = retry_seconds
+        self.client_id = client_id
+        self.tenant_id = tenant_id
+        self.client_secret = client_secret
+        # Built by the refresher thread, as MSAL contacts the authority on construction
+        self._app = app
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._error: Exception | None = None
+        self._ready = threading.Condition()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    def start(self) -> None:
+        with self._ready:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="graph-token-refresh", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def get_token(self, timeout: float = settings.GRAPH_TIMEOUT_SECONDS) -> str:
+        self.start()
+        with self._ready:
+            if (
+                not self._ready.wait_for(self._valid, timeout=timeout)
+                or self._token is None
+            ):
+                raise Exception(
+                    f"Failed to acquire token: {self._error or 'timed out'}"
+                )
+            return self._token
+
+    def cached_token(self) -> str | None:
+        """The current token if it is still valid, without waiting."""
+        with self._ready:
+            return self._token if self._valid() else None
+
+    def invalidate(self) -> None:
+        """Drop the current token, e.g. after a 401, and have the refresher fetch a new one."""
+        with self._ready:
+            self._token = None
+            self._expires_at = 0.0
+        # Otherwise MSAL would hand back the same cached token
+        if self._app is not None:
+            self._app.remove_tokens_for_client()
+        self._wakeup.set()
+
+    def _refresh(self) -> None:
+        if self._app is None:
+            self._app = ConfidentialClientApplication(
+                client_id=self.client_id,
+                client_credential=self.client_secret,
+                authority=f"https://login.microsoftonline.com/{self.tenant_id}",
+            )
+        result = self._app.acquire_token_for_client(scopes=GRAPH_SCOPES)
+        if "access_token" not in result:
+            raise Exception(f"Failed to acquire token: {result}")
+        with self._ready:
+            self._token = result["access_token"]
+            self._expires_at = time.monotonic() + float(result.get("expires_in", 3600))
+            self._error = None
+            self._ready.notify_all()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._refresh()
+                # MSAL may hand back its cached token until close to expiry, so don't spin on it
+                wait = max(
+                    self._expires_at - time.monotonic() - self.refresh_margin,
+                    self.retry_seconds,
+                )
+            except Exception as e:
+                print(f"ERROR refreshing Graph token: {e}")
+                with self._ready:
+                    self._error = e
+                wait = self.retry_seconds
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+
+_managers: dict[tuple[str, str], TokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(
+    client_id: str, tenant_id: str, client_secret: str
+) -> TokenManager:
+    """The process-wide TokenManager (and MSAL app) for a tenant/client, started on first use."""
+    with _managers_lock:
+        manager = _managers.get((tenant_id, client_id))
+        if manager is None:
+            manager = _managers[(tenant_id, client_id)] = TokenManager(
+                client_id, tenant_id, client_secret
+            )
+    manager.start()
+    return manager
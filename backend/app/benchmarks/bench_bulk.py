@@ -0,0 +1,125 @@
+"""
+Compare per-row writes with the bulk endpoints' crud.bulk_* operations on the same rows.
+
+The per-row side does what create/update/delete_depot_master do once per request
+(add/commit/refresh per row). Uses a throwaway SQLite database unless --url points
+elsewhere; against SQL Server use a scratch database, as the DepotMaster table is
+created and emptied.
+
+Usage: python -m app.benchmarks.bench_bulk [--rows 2000] [--url mssql+pyodbc://...]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, delete
+
+from app.api.bulk import run_bulk
+from app.benchmarks.data import make_depot_frame
+from app.crud import bulk_create, bulk_delete, bulk_update
+from app.models.models_depot import (
+    DepotMaster,
+    DepotMasterBulkCreate,
+    DepotMasterBulkUpdate,
+    DepotMasterCreate,
+)
+
+
+def _records(n_rows: int) -> list[dict[str, Any]]:
+    # Dates left out: the row shape matters here, not the column types
+    frame = make_depot_frame(n_rows).drop(columns="instance_id")
+    frame = frame.select_dtypes(exclude="datetime")
+    records: list[dict[str, Any]] = (
+        frame.astype(object).where(frame.notna(), None).to_dict("records")
+    )
+    return records
+
+
+def _timed(label: str, rows: int, operation: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    operation()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<18} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/s")
+    return elapsed
+
+
+def per_row(engine: Engine, records: list[dict[str, Any]]) -> None:
+    with Session(engine) as session:
+        for i, record in enumerate(records):
+            item = DepotMaster.model_validate(
+                DepotMasterCreate(**record), update={"instance_id": i + 1}
+            )
+            session.add(item)
+            session.commit()
+            session.refresh(item)
+        for i in range(len(records)):
+            stored = session.get(DepotMaster, i + 1)
+            assert stored is not None
+            stored.sqlmodel_update({"city": "Rotterdam"})
+            session.add(stored)
+            session.commit()
+            session.refresh(stored)
+        for i in range(len(records)):
+            session.delete(session.get(DepotMaster, i + 1))
+            session.commit()
+
+
+def bulk(engine: Engine, records: list[dict[str, Any]]) -> None:
+    rows = len(records)
+    with Session(engine) as session:
+        created = [
+            DepotMasterBulkCreate(instance_id=i + 1, **record)
+            for i, record in enumerate(records)
+        ]
+        run_bulk(
+            session,
+            rows,
+            lambda: bulk_create(session=session, model=DepotMaster, items=created),
+        )
+        updated = [
+            DepotMasterBulkUpdate(instance_id=i + 1, city="Rotterdam")
+            for i in range(rows)
+        ]
+        run_bulk(
+            session,
+            rows,
+            lambda: bulk_update(session=session, model=DepotMaster, items=updated),
+        )
+        ids = list(range(1, rows + 1))
+        run_bulk(
+            session,
+            rows,
+            lambda: bulk_delete(session=session, model=DepotMaster, ids=ids),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--url", default="sqlite://")
+    args = parser.parse_args()
+
+    if args.url.startswith("sqlite"):
+        engine = create_engine(
+            args.url, poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+    else:
+        engine = create_engine(args.url)
+    SQLModel.metadata.create_all(engine, tables=[DepotMaster.__table__])  # type: ignore[attr-defined]
+    with Session(engine) as session:
+        session.exec(delete(DepotMaster))
+        session.commit()
+
+    records = _records(args.rows)
+    print(f"create + update + delete of {args.rows} DepotMaster rows")
+    slow = _timed("per-row requests", args.rows * 3, lambda: per_row(engine, records))
+    fast = _timed("bulk requests", args.rows * 3, lambda: bulk(engine, records))
+    print(f"bulk is {slow / fast:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare the previous workbook reader (whole sheets with openpyxl, per-column casts and
+in-place renames) with FileEditor's metadata-driven reader on a synthetic workbook.
+
+Usage: python -m app.benchmarks.bench_read_workbook [--rows 100000] [--extra-columns 10]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any
+
+import pandas as pd
+
+from app.api.services.FileEditor import _excel_engine, load_metadata, read_workbook
+from app.benchmarks.data import make_depot_frame
+
+METADATA_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "sharepoint", "DepotMasterMetadata.json"
+)
+
+
+def legacy_read(
+    metadata: dict[str, Any], excel_path: str, sheets_list: list[str]
+) -> dict[str, pd.DataFrame]:
+    """The previous normalization loop of read_sheets_with_metadata."""
+    df_dict = pd.read_excel(excel_path, sheet_name=sheets_list, engine="openpyxl")
+
+    def normalize(name: str) -> str:
+        return "".join(name.split()).lower()
+
+    result = {}
+    for sheet_name, df in df_dict.items():
+        sheet_meta = next(s for s in metadata["sheets"] if s["name"] == sheet_name)
+        excel_col_map = {normalize(c): c for c in df.columns}
+        for col_meta in sheet_meta["columns"]:
+            meta_name = col_meta["name"]
+            if normalize(meta_name) not in excel_col_map:
+                df[meta_name] = pd.NA
+                continue
+            excel_col_name = excel_col_map[normalize(meta_name)]
+            if col_meta["type"] == "str":
+                df[excel_col_name] = df[excel_col_name].astype(str)
+            elif col_meta["type"] == "float":
+                df[excel_col_name] = pd.to_numeric(df[excel_col_name], errors="coerce")
+            elif col_meta["type"] == "datetime":
+                df[excel_col_name] = pd.to_datetime(df[excel_col_name], errors="coerce")
+            df.rename(columns={excel_col_name: meta_name}, inplace=True)
+        columns = sorted(sheet_meta["columns"], key=lambda x: x["position"])
+        df = df[[c["name"] for c in columns]]
+        df.columns = [c["formatted_name"] for c in columns]
+        result[sheet_name] = df.reset_index().rename(columns={"index": "instance_id"})
+    return result
+
+
+def write_workbook(
+    path: str, sheet_meta: dict[str, Any], n_rows: int, extra_columns: int
+) -> None:
+    """Write a Depot Master shaped sheet, plus unused columns the reader should skip."""
+    df = make_depot_frame(n_rows).drop(columns="instance_id")
+    df.columns = [
+        c["name"] for c in sorted(sheet_meta["columns"], key=lambda x: x["position"])
+    ]
+    for i in range(extra_columns):
+        df[f"Notes {i}"] = "unused"
+    df.to_excel(path, sheet_name=sheet_meta["name"], index=False, engine="openpyxl")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--extra-columns", type=int, default=10)
+    args = parser.parse_args()
+
+    metadata = load_metadata(METADATA_PATH)
+    sheet_meta = metadata["sheets"][0]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.xlsx")
+        print(
+            f"Writing {args.rows} rows x {len(sheet_meta['columns']) + args.extra_columns} columns..."
+        )
+        write_workbook(path, sheet_meta, args.rows, args.extra_columns)
+
+        start = time.perf_counter()
+        legacy_read(metadata, path, [sheet_meta["name"]])
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        read_workbook(path, metadata, [sheet_meta["name"]])
+        current = time.perf_counter() - start
+
+    print(f"previous reader (openpyxl): {legacy:.2f}s")
+    print(
+        f"current reader ({_excel_engine()}): {current:.2f}s ({legacy / current:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare load and save cost of the JSON and NumPy row-hash snapshot stores.
+
+Usage: python -m app.benchmarks.bench_row_hash_store [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.api.services.RowHashStore import JsonRowHashStore, NumpyRowHashStore
+
+
+def _snapshot(n_rows: int) -> pd.Series:
+    rng = np.random.default_rng(0)
+    digests = rng.integers(0, 2**63, n_rows, dtype=np.int64).astype(np.uint64)
+    return pd.Series(digests, index=np.arange(n_rows, dtype=np.int64))
+
+
+def _time(fn: Callable[..., Any], *args: Any) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>10} {'store':>6} {'save (s)':>9} {'load (s)':>9} {'size (KB)':>10}"
+    )
+    for n_rows in (int(s) for s in args.sizes.split(",")):
+        snapshot = _snapshot(n_rows)
+        for name, store_cls in (
+            ("json", JsonRowHashStore),
+            ("numpy", NumpyRowHashStore),
+        ):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                file_path = os.path.join(tmp_dir, "sheet_row_hashes.json")
+                save = _time(store_cls(file_path).save, {"DepotMaster": snapshot})
+                # A fresh store per load, as on every scheduler tick
+                load = _time(
+                    lambda cls=store_cls, path=file_path: (
+                        cls(path).load("DepotMaster").to_numpy()
+                    )
+                )
+                size = sum(
+                    os.path.getsize(os.path.join(root, f))
+                    for root, _, files in os.walk(tmp_dir)
+                    for f in files
+                )
+                print(
+                    f"{n_rows:>10} {name:>6} {save:>9.3f} {load:>9.3f} {size / 1024:>10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
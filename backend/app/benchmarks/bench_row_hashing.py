@@ -0,0 +1,38 @@
+"""
+Compare the per-row sha256 hashing path with the vectorized one.
+
+Usage: python -m app.benchmarks.bench_row_hashing [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app.api.services.DataSyncer import compute_row_hashes
+from app.benchmarks.data import make_depot_frame
+
+
+def _time(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_rows in (int(s) for s in args.sizes.split(",")):
+        df = make_depot_frame(n_rows)
+        legacy = _time(compute_row_hashes, df, legacy=True)
+        vectorized = _time(compute_row_hashes, df)
+        print(
+            f"{n_rows:>10} {legacy:>12.3f} {vectorized:>15.3f} {legacy / vectorized:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
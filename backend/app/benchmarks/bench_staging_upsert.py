@@ -0,0 +1,78 @@
+"""
+Compare upsert throughput of the per-call to_sql staging table with the reused #temp
+staging table loaded through fast_executemany. Needs the configured MSSQL database.
+
+Usage: python -m app.benchmarks.bench_staging_upsert [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import time
+import uuid
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.api.services.DatabaseClient import DatabaseClient
+from app.benchmarks.data import make_depot_frame
+from app.core.config import settings
+
+TABLE_NAME = "BenchUpsert"
+
+
+def to_sql_upsert(
+    engine: Engine, conn: Connection, table_name: str, df: pd.DataFrame
+) -> None:
+    """The previous staging path: CREATE a dbo table with df.to_sql, MERGE, DROP."""
+    staging_table = f"{table_name}_staging_{uuid.uuid4().hex[:8]}"
+    df.to_sql(staging_table, con=engine, if_exists="replace", index=False, schema="dbo")
+    columns = [c for c in df.columns if c != "instance_id"]
+    set_stmt = ", ".join(f"target.[{c}] = source.[{c}]" for c in columns)
+    insert_cols = ", ".join(["instance_id"] + [f"[{c}]" for c in columns])
+    insert_vals = ", ".join(["source.instance_id"] + [f"source.[{c}]" for c in columns])
+    with conn.begin():
+        conn.execute(
+            text(f"""
+        MERGE [dbo].[{table_name}] AS target
+        USING [dbo].[{staging_table}] AS source
+        ON target.instance_id = source.instance_id
+        WHEN MATCHED THEN UPDATE SET {set_stmt}
+        WHEN NOT MATCHED BY TARGET THEN INSERT ({insert_cols}) VALUES ({insert_vals});
+        """)
+        )
+        conn.execute(text(f"DROP TABLE [dbo].[{staging_table}];"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    db = DatabaseClient()
+    plain_engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+    print(
+        f"{'rows':>10} {'to_sql (rows/s)':>16} {'#temp + fast_executemany (rows/s)':>34}"
+    )
+    try:
+        for n_rows in (int(s) for s in args.sizes.split(",")):
+            df = make_depot_frame(n_rows)
+            with db.get_connection() as conn:
+                db.create_table_from_dataframe(conn, TABLE_NAME, df)
+
+                start = time.perf_counter()
+                to_sql_upsert(plain_engine, conn, TABLE_NAME, df)
+                old_rate = n_rows / (time.perf_counter() - start)
+
+                start = time.perf_counter()
+                db.upsert_dataframe(conn, TABLE_NAME, df)
+                new_rate = n_rows / (time.perf_counter() - start)
+
+            print(f"{n_rows:>10} {old_rate:>16.0f} {new_rate:>34.0f}")
+    finally:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS [dbo].[{TABLE_NAME}];"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def make_depot_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a synthetic frame shaped like the normalized Depot Master sheet:
+    instance_id plus 24 str / datetime / float columns.
+    """
+    rng = np.random.default_rng(seed)
+    str_cols = [
+        "vendor",
+        "depot",
+        "city",
+        "customer",
+        "invoice",
+        "ven_invoice_number",
+        "po_number",
+        "acceptance_number",
+        "release_number",
+        "container_number",
+        "type",
+        "condition",
+        "flp",
+        "lb",
+        "color",
+        "pc",
+        "puc",
+        "approved",
+    ]
+    date_cols = ["berth_eta", "gate_in_date", "gate_out_date"]
+    float_cols = ["price", "damage", "price_after_damage"]
+
+    data: dict[str, Any] = {"instance_id": np.arange(n_rows, dtype=int)}
+    for col in str_cols:
+        data[col] = (
+            pd.Series(rng.integers(0, 5000, n_rows))
+            .map(lambda v, c=col: f"{c}-{v}")
+            .astype(str)
+        )
+    base = np.datetime64("2024-01-01")
+    for col in date_cols:
+        dates = pd.Series(base + rng.integers(0, 700, n_rows).astype("timedelta64[D]"))
+        dates[rng.random(n_rows) < 0.2] = pd.NaT
+        data[col] = dates
+    for col in float_cols:
+        values = rng.random(n_rows) * 1000
+        values[rng.random(n_rows) < 0.1] = np.nan
+        data[col] = values
+    return pd.DataFrame(data)
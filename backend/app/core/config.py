@@ -1,7 +1,6 @@
 import secrets
 import warnings
 from typing import Annotated, Any, Literal
-from sqlalchemy.engine.url import URL  # new import
 
 from pydantic import (
     AnyUrl,
@@ -37,7 +36,6 @@ class Settings(BaseSettings):
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
-
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
     ] = []
@@ -49,7 +47,6 @@ class Settings(BaseSettings):
             self.FRONTEND_HOST
         ]
 
-
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
     MSSQL_SERVER: str
@@ -58,7 +55,7 @@ class Settings(BaseSettings):
     MSSQL_SA_PASSWORD: str = ""
     MSSQL_DB: str = ""
 
-    @computed_field
+    @computed_field  # type: ignore[prop-decorator]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         """
@@ -76,18 +73,11 @@ class Settings(BaseSettings):
             trust_cert = "no"
 
         return (
-            "mssql+pyodbc://{user}:{password}@{server}:{port}/{db}"
+            f"mssql+pyodbc://{self.MSSQL_USER}:{self.MSSQL_SA_PASSWORD}@{self.MSSQL_SERVER}:{self.MSSQL_PORT}/{self.MSSQL_DB}"
             "?driver=ODBC+Driver+18+for+SQL+Server"
             "&Encrypt=yes"
-            "&TrustServerCertificate={trust_cert}"
+            f"&TrustServerCertificate={trust_cert}"
             "&ConnectionTimeout=30"
-        ).format(
-            user=self.MSSQL_USER,
-            password=self.MSSQL_SA_PASSWORD,
-            server=self.MSSQL_SERVER,
-            port=self.MSSQL_PORT,
-            db=self.MSSQL_DB,
-            trust_cert=trust_cert,
         )
 
     SMTP_TLS: bool = True
@@ -99,24 +89,83 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: EmailStr | None = None
     EMAILS_FROM_NAME: EmailStr | None = None
 
-
-
     # Azure
-    CLIENT_ID: str = ''
-    TENANT_ID: str = ''
-    CLIENT_SECRET: str = ''
+    CLIENT_ID: str = ""
+    TENANT_ID: str = ""
+    CLIENT_SECRET: str = ""
     # Email
-    MAIL_USER: str = ''
-    GRAPH_API: str = ''
+    MAIL_USER: str = ""
+    GRAPH_API: str = ""
+    # $batch calls in flight, and LLM extractions running, at the same time in process_inbox
+    MAIL_FETCH_CONCURRENCY: int = 8
+    LLM_CONCURRENCY: int = 4
+    # Incremental inbox ingestion (InboxSyncer)
+    MAIL_SYNC_ENABLED: bool = False
+    MAIL_SYNC_INTERVAL_SECONDS: int = 60
+    MAIL_SYNC_DISTRIBUTION_LIST: str | None = None
+    # How far back the first sync of a mailbox reaches
+    MAIL_SYNC_LOOKBACK_DAYS: int = 7
+    MAIL_SYNC_MAX_ATTEMPTS: int = 3
+    # Azure OpenAI
+    AZURE_OPENAI_ENDPOINT: str = ""
+    AZURE_OPENAI_API_KEY: str = ""
+    AZURE_OPENAI_API_VERSION: str = ""
+    AZURE_OPENAI_DEPLOYMENT: str = ""
+    # Reuse extractions of identical prompts (ExtractionCache) instead of calling the LLM again
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    # Estimated tokens per extraction prompt; larger attachments are extracted in chunks and merged
+    LLM_PROMPT_TOKEN_BUDGET: int | None = 8000
+    # Read xlsx/csv attachments with recognisable headers without the LLM (StructuredExtractor)
+    STRUCTURED_EXTRACTION_ENABLED: bool = True
+    # Target fields a header row has to name before a sheet counts as structured
+    STRUCTURED_EXTRACTION_MIN_FIELDS: int = 3
     # SharePoint
-    SITE_DOMAIN: str = ''
-    SITE_NAME: str = ''
-    SHAREPOINT_FILE_NAME: str = ''
+    SITE_DOMAIN: str = ""
+    SITE_NAME: str = ""
+    SHAREPOINT_FILE_NAME: str = ""
     SHAREPOINT_FOLDER_NAME: str = "Depot Master"
 
-    DEPOT_MASTER: str = ''
-    GATE_OUT: str = ''
-    DEPOT_ADDRESS: str = ''
+    DEPOT_MASTER: str = ""
+    GATE_OUT: str = ""
+    DEPOT_ADDRESS: str = ""
+
+    # Graph HTTP client
+    GRAPH_TIMEOUT_SECONDS: float = 30.0
+    # Retries for throttled (429/503) and transient failures, with jittered backoff
+    GRAPH_MAX_RETRIES: int = 4
+    GRAPH_BACKOFF_SECONDS: float = 0.5
+    GRAPH_MAX_CONNECTIONS: int = 20
+    # Refresh the Graph token in the background this long before it expires
+    GRAPH_TOKEN_REFRESH_MARGIN_SECONDS: float = 300.0
+
+    # Sync
+    # "vectorized" hashes whole sheets at once, "legacy" keeps the per-row sha256 digests
+    ROW_HASH_MODE: Literal["vectorized", "legacy"] = "vectorized"
+    # "numpy" keeps one binary snapshot per sheet, "json" the single sheet_row_hashes.json
+    ROW_HASH_STORE: Literal["numpy", "json"] = "numpy"
+    # Rows per upsert / delete statement batch during a sync
+    SYNC_CHUNK_SIZE: int = 5000
+    # Commit after every chunk instead of once per table
+    SYNC_COMMIT_PER_CHUNK: bool = True
+    # Workbook reader; "auto" uses calamine when python-calamine is installed
+    EXCEL_ENGINE: Literal["auto", "calamine", "openpyxl"] = "auto"
+    # Parse/hash sheets in worker processes and sync them concurrently
+    SYNC_PARALLEL_SHEETS: bool = False
+    # Watch the drive delta feed and sync as soon as the workbook changes
+    SHAREPOINT_CHANGE_FEED: bool = False
+    CHANGE_FEED_POLL_SECONDS: int = 10
+
+    # API
+    # Counts on list endpoints: "exact" COUNT(*), "cached" until the table is written,
+    # or "approximate" from sys.dm_db_partition_stats
+    LIST_COUNT_MODE: Literal["exact", "cached", "approximate"] = "exact"
+    LIST_COUNT_CACHE_SECONDS: int = 300
+    # Rows fetched per round trip by the export endpoints (yield_per)
+    EXPORT_BATCH_SIZE: int = 5000
+    # Items accepted by one bulk create / update / delete request
+    BULK_MAX_ITEMS: int = 10000
 
     @model_validator(mode="after")
     def _set_default_emails_from(self) -> Self:
@@ -157,6 +206,4 @@ class Settings(BaseSettings):
         return self
 
 
-
-
 settings = Settings()  # type: ignore
@@ -1,7 +1,6 @@
 import json
 from pathlib import Path
-from sqlmodel import SQLModel, Field
-import datetime
+from typing import Any
 
 # --- CONFIG ---
 JSON_FILE = "/app/app/sharepoint/DepotMasterMetadata.json"
@@ -18,7 +17,7 @@ TYPE_MAP = {
 MAX_LENGTH = 255  # For string fields
 
 
-def generate_models(sheet: dict) -> str:
+def generate_models(sheet: dict[str, Any]) -> str:
     """
     Generate SQLModel table + Pydantic schemas for a sheet.
     """
@@ -30,7 +29,9 @@ def generate_models(sheet: dict) -> str:
         col_name = col["formatted_name"]
         col_type = TYPE_MAP.get(col["type"], "str")
         if col_type == "str":
-            lines.append(f"    {col_name}: str | None = Field(default=None, max_length={MAX_LENGTH})")
+            lines.append(
+                f"    {col_name}: str | None = Field(default=None, max_length={MAX_LENGTH})"
+            )
         elif col_type == "float":
             lines.append(f"    {col_name}: float | None = Field(default=None)")
         elif col_type == "int":
@@ -39,53 +40,61 @@ def generate_models(sheet: dict) -> str:
             lines.append(f"    {col_name}: datetime | None = Field(default=None)")
         else:
             lines.append(f"    {col_name}: str | None = Field(default=None)")
-    lines.append("")  # empty line
+    lines.append("\n")  # two blank lines
 
     # Create schema
     lines.append(f"class {class_name}Create({class_name}Base):")
-    lines.append("    pass\n")
+    lines.append("    pass\n\n")
 
     # Update schema (all optional)
     lines.append(f"class {class_name}Update({class_name}Base):")
-    lines.append("    pass\n")
+    lines.append("    pass\n\n")
+
+    # Bulk schemas: rows of a bulk create may bring their own instance_id, bulk updates must
+    lines.append(f"class {class_name}BulkCreate({class_name}Create):")
+    lines.append("    instance_id: int | None = None\n\n")
+    lines.append(f"class {class_name}BulkUpdate({class_name}Update):")
+    lines.append("    instance_id: int\n\n")
 
     # Public schema
     lines.append(f"class {class_name}Public({class_name}Base):")
-    lines.append("    instance_id: int\n")
+    lines.append("    instance_id: int\n\n")
 
     # List schema
     lines.append(f"class {class_name}List(SQLModel):")
     lines.append(f"    data: list[{class_name}Public]")
-    lines.append("    count: int\n")
+    lines.append("    # None when the list was requested with include_count=false")
+    lines.append("    count: int | None")
+    lines.append("    # instance_id to pass as `after` for the next page")
+    lines.append("    next_cursor: int | None = None\n\n")
 
     # Table class
     lines.append(f"class {class_name}({class_name}Base, table=True):")
-    lines.append("    instance_id: int = Field(default_factory=int, primary_key=True)\n")
-
-    # Generic message
-    lines.append("class Message(SQLModel):")
-    lines.append("    message: str\n")
+    lines.append("    instance_id: int = Field(default_factory=int, primary_key=True)")
 
     return "\n".join(lines)
 
 
-def main():
-    with open(JSON_FILE, "r") as f:
+def main() -> None:
+    with open(JSON_FILE) as f:
         data = json.load(f)
 
     output_path = Path(OUTPUT_FILE)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     all_models = [
-        "from sqlmodel import SQLModel, Field",
-        "from datetime import datetime\n"
+        "from datetime import datetime\n\nfrom sqlmodel import Field, SQLModel"
     ]
 
     for sheet in data.get("sheets", []):
         all_models.append(generate_models(sheet))
 
+    # Generic message, shared by every sheet
+    all_models.append("class Message(SQLModel):\n    message: str")
+
+    # Top-level definitions separated by two blank lines, as ruff format expects
     with open(output_path, "w") as f:
-        f.write("\n".join(all_models))
+        f.write("\n\n\n".join(all_models) + "\n")
 
     print(f"✅ Models generated successfully at {OUTPUT_FILE}")
 
@@ -1,10 +1,18 @@
+import threading
+import time
 import uuid
-from typing import Any
+from collections.abc import Sequence
+from itertools import chain
+from typing import Any, cast
 
-from sqlmodel import Session, select
+from sqlalchemy import Column, delete, event, insert, inspect, text, update
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, SQLModel, func, select
 
+from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.models.models_bulk import BulkItemStatus
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -52,3 +60,264 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -
     session.commit()
     session.refresh(db_item)
     return db_item
+
+
+def _primary_key(model: type[SQLModel]) -> Column[Any]:
+    """The (first) primary key column of a table model."""
+    return cast(Column[Any], inspect(model, raiseerr=True).primary_key[0])
+
+
+def read_page(
+    *,
+    session: Session,
+    model: type[SQLModel],
+    skip: int = 0,
+    limit: int = 100,
+    after: int | None = None,
+    where: list[Any] | None = None,
+    order_by: list[Any] | None = None,
+) -> tuple[list[Any], int | None]:
+    """
+    One page of a table in primary key order, and the key to pass as `after` for the next
+    page (None on the last one). With `after` the query seeks past that key instead of
+    skipping rows, so deep pages cost the same as the first; `skip` is then ignored.
+    A custom order_by pages with skip only and returns no cursor. For sheets keyed by
+    FileEditor._key_instance_ids the primary key is a hash, so that order is not sheet order.
+    """
+    key = _primary_key(model)
+    if after is not None and order_by is not None:
+        raise ValueError("Keyset pagination needs the primary key order")
+    statement = select(model).where(*(where or [])).order_by(*(order_by or [key]))
+    if after is not None:
+        statement = statement.where(key > after)
+    else:
+        statement = statement.offset(skip)
+    items = session.exec(statement.limit(limit)).all()
+    keyset = order_by is None and items and len(items) == limit
+    next_cursor = getattr(items[-1], key.name) if keyset else None
+    return list(items), next_cursor
+
+
+# (table, statement, parameters) -> (expires at, count), for LIST_COUNT_MODE "cached"
+_counts: dict[tuple[str, str, str], tuple[float, int]] = {}
+# Bumped on every invalidation, so a count that raced a write is not cached
+_count_generations: dict[str, int] = {}
+_counts_lock = threading.Lock()
+
+
+def invalidate_counts(*table_names: str) -> None:
+    """Drop cached counts of the given tables, or of every table when none are given."""
+    names = {name.lower() for name in table_names}
+    with _counts_lock:
+        for key in [k for k in _counts if not names or k[0] in names]:
+            del _counts[key]
+        for name in names or list(_count_generations):
+            _count_generations[name] = _count_generations.get(name, 0) + 1
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_written_tables(session: OrmSession, _flush_context: Any) -> None:
+    tables = session.info.setdefault("written_tables", set())
+    tables.update(
+        obj.__table__.name
+        for obj in chain(session.new, session.deleted)
+        if hasattr(obj, "__table__")
+    )
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _collect_bulk_written_table(state: Any) -> None:
+    # delete(Item).where(...) and friends bypass the unit of work
+    if state.is_insert or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None:
+            state.session.info.setdefault("written_tables", set()).add(table.name)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_written_tables(session: OrmSession) -> None:
+    tables = session.info.pop("written_tables", None)
+    if tables:
+        invalidate_counts(*tables)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_written_tables(session: OrmSession) -> None:
+    session.info.pop("written_tables", None)
+
+
+def _approximate_count(session: Session, table_name: str) -> int | None:
+    # Row counts SQL Server keeps per partition: no scan, but may lag in-flight transactions
+    statement = text(
+        "SELECT SUM(row_count) FROM sys.dm_db_partition_stats "
+        "WHERE object_id = OBJECT_ID(:table_name) AND index_id IN (0, 1)"
+    )
+    try:
+        count = session.execute(statement, {"table_name": table_name}).scalar()
+    except Exception as e:
+        print(f"Approximate count of '{table_name}' unavailable, counting exactly: {e}")
+        return None
+    return int(count) if count is not None else None
+
+
+def count_rows(
+    *,
+    session: Session,
+    model: type[SQLModel],
+    where: list[Any] | None = None,
+    include_count: bool = True,
+    mode: str | None = None,
+) -> int | None:
+    """
+    Row count for a list endpoint, by LIST_COUNT_MODE (or mode):
+    "exact" runs COUNT(*) every time, "cached" reuses a count for LIST_COUNT_CACHE_SECONDS
+    until a write to the table invalidates it, "approximate" reads the partition stats
+    (unfiltered SQL Server tables only, exact otherwise). None when include_count is off.
+    """
+    if not include_count:
+        return None
+    mode = mode or settings.LIST_COUNT_MODE
+    table_name = model.__table__.name  # type: ignore[attr-defined]
+    statement = select(func.count()).select_from(model)
+    for criterion in where or []:
+        statement = statement.where(criterion)
+
+    if (
+        mode == "approximate"
+        and not where
+        and session.get_bind().dialect.name == "mssql"
+    ):
+        count = _approximate_count(session, table_name)
+        if count is not None:
+            return count
+    if mode != "cached":
+        return session.exec(statement).one()
+
+    compiled = statement.compile()
+    key = (table_name.lower(), str(compiled), repr(sorted(compiled.params.items())))
+    now = time.monotonic()
+    with _counts_lock:
+        cached = _counts.get(key)
+        generation = _count_generations.get(key[0], 0)
+    if cached and cached[0] > now:
+        return cached[1]
+    count = session.exec(statement).one()
+    with _counts_lock:
+        if _count_generations.get(key[0], 0) == generation:
+            _counts[key] = (now + settings.LIST_COUNT_CACHE_SECONDS, count)
+    return count
+
+
+# SQL Server rejects statements with more than 2100 parameters
+MAX_IN_PARAMETERS = 2000
+
+
+def _existing_keys(
+    session: Session, model: type[SQLModel], keys: list[int]
+) -> set[int]:
+    key = _primary_key(model)
+    existing: set[int] = set()
+    for start in range(0, len(keys), MAX_IN_PARAMETERS):
+        chunk = keys[start : start + MAX_IN_PARAMETERS]
+        existing.update(session.execute(select(key).where(key.in_(chunk))).scalars())
+    return existing
+
+
+def _max_key_statement(model: type[SQLModel], key: Any) -> Any:
+    # Held until the bulk transaction ends, so concurrent bulk creates take turns
+    # instead of allocating the same ids; other dialects have no table hints
+    return select(func.max(key)).with_hint(
+        model, "WITH (UPDLOCK, HOLDLOCK)", dialect_name="mssql"
+    )
+
+
+def bulk_create(
+    *, session: Session, model: type[SQLModel], items: Sequence[SQLModel]
+) -> list[BulkItemStatus]:
+    """
+    Insert rows with one executemany in the caller's transaction. Rows without an
+    instance_id get the next free ones, read under a lock held until the transaction
+    ends; ids that already exist, or repeat within the request, are reported as
+    conflicts and skipped.
+    """
+    key = _primary_key(model)
+    rows = [item.model_dump() for item in items]
+    taken = _existing_keys(
+        session, model, [r[key.name] for r in rows if r[key.name] is not None]
+    )
+    next_key = (session.execute(_max_key_statement(model, key)).scalar() or 0) + 1
+    next_key = max(
+        [next_key] + [r[key.name] + 1 for r in rows if r[key.name] is not None]
+    )
+
+    statuses, values = [], []
+    for index, row in enumerate(rows):
+        if row[key.name] is None:
+            row[key.name], next_key = next_key, next_key + 1
+        elif row[key.name] in taken:
+            statuses.append(
+                BulkItemStatus(
+                    index=index,
+                    instance_id=row[key.name],
+                    status="conflict",
+                    detail=f"{key.name} {row[key.name]} already exists",
+                )
+            )
+            continue
+        taken.add(row[key.name])
+        values.append(row)
+        statuses.append(
+            BulkItemStatus(index=index, instance_id=row[key.name], status="created")
+        )
+    if values:
+        session.execute(insert(model), values)
+    return statuses
+
+
+def bulk_update(
+    *, session: Session, model: type[SQLModel], items: Sequence[SQLModel]
+) -> list[BulkItemStatus]:
+    """
+    Update rows by primary key with executemany (one statement per distinct set of
+    fields sent) in the caller's transaction. Unknown ids are reported as not_found.
+    """
+    key = _primary_key(model)
+    rows = [item.model_dump(exclude_unset=True) for item in items]
+    found = _existing_keys(session, model, [r[key.name] for r in rows])
+
+    statuses, values = [], []
+    for index, row in enumerate(rows):
+        if row[key.name] not in found:
+            statuses.append(
+                BulkItemStatus(
+                    index=index, instance_id=row[key.name], status="not_found"
+                )
+            )
+            continue
+        values.append(row)
+        statuses.append(
+            BulkItemStatus(index=index, instance_id=row[key.name], status="updated")
+        )
+    if values:
+        session.execute(update(model), values)
+    return statuses
+
+
+def bulk_delete(
+    *, session: Session, model: type[SQLModel], ids: list[int]
+) -> list[BulkItemStatus]:
+    """Delete rows by primary key, MAX_IN_PARAMETERS per statement, in the caller's transaction."""
+    key = _primary_key(model)
+    found = _existing_keys(session, model, ids)
+    for start in range(0, len(ids), MAX_IN_PARAMETERS):
+        session.execute(
+            delete(model).where(key.in_(ids[start : start + MAX_IN_PARAMETERS]))
+        )
+    return [
+        BulkItemStatus(
+            index=index,
+            instance_id=id,
+            status="deleted" if id in found else "not_found",
+        )
+        for index, id in enumerate(ids)
+    ]
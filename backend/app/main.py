@@ -1,25 +1,23 @@
 import sentry_sdk
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
-import asyncio
-import pandas as pd
 
 from app.api.main import api_router
-from app.core.config import settings
-from app.api.services.EmailParser import EmailParser
-from app.api.services.DataSyncer import DataSyncer
-from app.api.services.GraphClient import GraphClient
 from app.api.services.DatabaseClient import DatabaseClient
-from app.api.services.FileEditor import FileEditor
+from app.api.services.DataSyncer import AsyncDataSyncer
+from app.api.services.EmailParser import EmailParser
+from app.api.services.FileEditor import AsyncFileEditor
+from app.api.services.GraphClient import AsyncGraphClient, GraphClient
+from app.api.services.InboxSyncer import InboxSyncer
+from app.core.config import settings
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
-
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
@@ -46,10 +44,12 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 # -----------------------
 # Scheduler setup
 # -----------------------
-scheduler = BackgroundScheduler()
+# Runs on the app's event loop: coroutine jobs share it, so their Graph calls overlap
+# without a thread per job. Plain functions still run in the loop's thread pool.
+scheduler = AsyncIOScheduler()
 
 
-def inventory_job():
+def inventory_job() -> None:
     """
     Put your scheduled job logic here.
     For example, fetch SharePoint files, read emails, or update database.
@@ -68,17 +68,76 @@ def inventory_job():
 
 
 # Schedule the job every 5 minutes
-scheduler.add_job(inventory_job, 'interval', seconds=60)
+scheduler.add_job(inventory_job, "interval", seconds=60)
+
+
+_data_syncer: AsyncDataSyncer | None = None
+
+
+async def sharepoint_change_job() -> None:
+    """
+    Poll the SharePoint drive delta feed and sync the workbook as soon as it changed.
+    Idle ticks cost one small delta request instead of a metadata check and download.
+    """
+    global _data_syncer
+    if _data_syncer is None:
+        _data_syncer = AsyncDataSyncer(
+            AsyncFileEditor(AsyncGraphClient()), DatabaseClient()
+        )
+    try:
+        await _data_syncer.sync_if_changed()
+    except Exception as e:
+        print(f"ERROR in SharePoint change feed: {e}")
+
+
+if settings.SHAREPOINT_CHANGE_FEED:
+    # A sync can outlast the poll interval; skip ticks instead of overlapping them
+    scheduler.add_job(
+        sharepoint_change_job,
+        "interval",
+        seconds=settings.CHANGE_FEED_POLL_SECONDS,
+        max_instances=1,
+        coalesce=True,
+    )
+
+
+_inbox_syncer: InboxSyncer | None = None
+
+
+def inbox_job() -> None:
+    """Extract the messages received since the last run; each message is processed once."""
+    global _inbox_syncer
+    if _inbox_syncer is None:
+        _inbox_syncer = InboxSyncer(EmailParser(GraphClient()))
+    try:
+        for record in _inbox_syncer.sync():
+            print(record)
+    except Exception as e:
+        print(f"ERROR in inbox sync: {e}")
+
+
+if settings.MAIL_SYNC_ENABLED:
+    # Blocking job: the scheduler runs it in the event loop's thread pool
+    scheduler.add_job(
+        inbox_job,
+        "interval",
+        seconds=settings.MAIL_SYNC_INTERVAL_SECONDS,
+        max_instances=1,
+        coalesce=True,
+    )
 
 
 # Start the scheduler when the app starts
 @app.on_event("startup")
-async def start_scheduler():
+async def start_scheduler() -> None:
     scheduler.start()
     print("Scheduler started")
 
+
 # Optional: shutdown scheduler gracefully
 @app.on_event("shutdown")
-async def shutdown_scheduler():
+async def shutdown_scheduler() -> None:
     scheduler.shutdown()
+    if _data_syncer is not None:
+        await _data_syncer.editor._client.close()
     print("Scheduler stopped")
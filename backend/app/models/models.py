@@ -53,7 +53,8 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    # None when the list was requested with include_count=false
+    count: int | None
 
 
 # Shared properties
@@ -89,7 +90,8 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    # None when the list was requested with include_count=false
+    count: int | None
 
 
 # Generic message
@@ -110,4 +112,4 @@ class TokenPayload(SQLModel):
 
 class NewPassword(SQLModel):
     token: str
-    new_password: str = Field(min_length=8, max_length=40)
\ No newline at end of file
+    new_password: str = Field(min_length=8, max_length=40)
@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel
+
+
+# Outcome of one item of a bulk request, in request order
+class BulkItemStatus(SQLModel):
+    index: int
+    instance_id: int | None = None
+    # created, updated, deleted, conflict or not_found
+    status: str
+    detail: str | None = None
+
+
+class BulkResult(SQLModel):
+    results: list[BulkItemStatus]
+    succeeded: int
+    failed: int
@@ -1,6 +1,8 @@
-from sqlmodel import SQLModel, Field
 from datetime import datetime
 
+from sqlmodel import Field, SQLModel
+
+
 class DepotMasterBase(SQLModel):
     vendor: str | None = Field(default=None, max_length=255)
     depot: str | None = Field(default=None, max_length=255)
@@ -27,24 +29,38 @@ class DepotMasterBase(SQLModel):
     price_after_damage: float | None = Field(default=None)
     gate_out_date: datetime | None = Field(default=None)
 
+
 class DepotMasterCreate(DepotMasterBase):
     pass
 
+
 class DepotMasterUpdate(DepotMasterBase):
     pass
 
+
+class DepotMasterBulkCreate(DepotMasterCreate):
+    instance_id: int | None = None
+
+
+class DepotMasterBulkUpdate(DepotMasterUpdate):
+    instance_id: int
+
+
 class DepotMasterPublic(DepotMasterBase):
     instance_id: int
 
+
 class DepotMasterList(SQLModel):
     data: list[DepotMasterPublic]
-    count: int
+    # None when the list was requested with include_count=false
+    count: int | None
+    # instance_id to pass as `after` for the next page
+    next_cursor: int | None = None
+
 
 class DepotMaster(DepotMasterBase, table=True):
     instance_id: int = Field(default_factory=int, primary_key=True)
 
-class Message(SQLModel):
-    message: str
 
 class GateOutBase(SQLModel):
     city: str | None = Field(default=None, max_length=255)
@@ -70,24 +86,38 @@ class GateOutBase(SQLModel):
     price_after_damage: float | None = Field(default=None)
     gate_out_date: datetime | None = Field(default=None)
 
+
 class GateOutCreate(GateOutBase):
     pass
 
+
 class GateOutUpdate(GateOutBase):
     pass
 
+
+class GateOutBulkCreate(GateOutCreate):
+    instance_id: int | None = None
+
+
+class GateOutBulkUpdate(GateOutUpdate):
+    instance_id: int
+
+
 class GateOutPublic(GateOutBase):
     instance_id: int
 
+
 class GateOutList(SQLModel):
     data: list[GateOutPublic]
-    count: int
+    # None when the list was requested with include_count=false
+    count: int | None
+    # instance_id to pass as `after` for the next page
+    next_cursor: int | None = None
+
 
 class GateOut(GateOutBase, table=True):
     instance_id: int = Field(default_factory=int, primary_key=True)
 
-class Message(SQLModel):
-    message: str
 
 class DepotAddressPriceBase(SQLModel):
     depot_name: str | None = Field(default=None, max_length=255)
@@ -116,21 +146,38 @@ class DepotAddressPriceBase(SQLModel):
     email_2: str | None = Field(default=None, max_length=255)
     fab_split: str | None = Field(default=None, max_length=255)
 
+
 class DepotAddressPriceCreate(DepotAddressPriceBase):
     pass
 
+
 class DepotAddressPriceUpdate(DepotAddressPriceBase):
     pass
 
+
+class DepotAddressPriceBulkCreate(DepotAddressPriceCreate):
+    instance_id: int | None = None
+
+
+class DepotAddressPriceBulkUpdate(DepotAddressPriceUpdate):
+    instance_id: int
+
+
 class DepotAddressPricePublic(DepotAddressPriceBase):
     instance_id: int
 
+
 class DepotAddressPriceList(SQLModel):
     data: list[DepotAddressPricePublic]
-    count: int
+    # None when the list was requested with include_count=false
+    count: int | None
+    # instance_id to pass as `after` for the next page
+    next_cursor: int | None = None
+
 
 class DepotAddressPrice(DepotAddressPriceBase, table=True):
     instance_id: int = Field(default_factory=int, primary_key=True)
 
+
 class Message(SQLModel):
     message: str
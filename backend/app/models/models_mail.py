@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlmodel import Column, DateTime, Field, SQLModel, Text
+
+
+# Incremental inbox ingestion state, one row per mailbox
+class MailSyncState(SQLModel, table=True):
+    mailbox: str = Field(primary_key=True, max_length=255)
+    # Graph delta links are far longer than 255 characters
+    delta_link: str | None = Field(default=None, sa_column=Column(Text))
+    # Naive UTC, like the other timestamps in this module
+    watermark: datetime | None = Field(default=None, sa_column=Column(DateTime))
+    updated_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
+
+
+# Every message handed to the LLM, keyed by Graph message id
+class ProcessedEmail(SQLModel, table=True):
+    message_id: str = Field(primary_key=True, max_length=255)
+    mailbox: str = Field(max_length=255, index=True)
+    subject: str | None = Field(default=None, max_length=255)
+    sender: str | None = Field(default=None, max_length=255)
+    received: datetime | None = Field(default=None, sa_column=Column(DateTime))
+    status: str = Field(max_length=16)
+    attempts: int = Field(default=1)
+    # Extracted fields as JSON, or the error message
+    result: str | None = Field(default=None, sa_column=Column(Text))
+    processed_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
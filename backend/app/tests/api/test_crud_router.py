@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+
+from app.api.crud_router import crud_router, routers_from_metadata
+
+
+def _routes(router: APIRouter) -> dict[tuple[str, str], str]:
+    return {
+        (route.path, method): route.name
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods or ()
+    }
+
+
+def test_crud_router_keeps_legacy_paths_and_names() -> None:
+    router = crud_router(
+        "DepotMaster", prefix="/depotmaster", route_name="depot_master"
+    )
+    routes = _routes(router)
+    assert routes[("/depotmaster/", "GET")] == "read_depot_masters"
+    assert routes[("/depotmaster/export", "GET")] == "export_depot_masters"
+    assert routes[("/depotmaster/bulk", "DELETE")] == "delete_depot_masters_bulk"
+    assert routes[("/depotmaster/{instance_id}", "GET")] == "read_depot_master_by_id"
+    assert routes[("/depotmaster/", "POST")] == "create_depot_master"
+    assert router.tags == ["DepotMaster"]
+
+
+def test_static_paths_precede_instance_id() -> None:
+    paths = [
+        route.path
+        for route in crud_router("GateOut").routes
+        if isinstance(route, APIRoute)
+    ]
+    assert paths.index("/gateout/export") < paths.index("/gateout/{instance_id}")
+    assert paths.index("/gateout/bulk") < paths.index("/gateout/{instance_id}")
+
+
+def test_routers_from_metadata(tmp_path: Path) -> None:
+    metadata = tmp_path / "metadata.json"
+    metadata.write_text(
+        json.dumps(
+            {
+                "sheets": [
+                    {"formatted_name": "GateOut", "columns": []},
+                    {"formatted_name": "DepotAddressPrice", "columns": []},
+                    {"formatted_name": "NotGenerated", "columns": []},
+                ]
+            }
+        )
+    )
+
+    routers = routers_from_metadata(str(metadata))
+
+    assert [router.prefix for router in routers] == ["/gateout", "/depotaddress"]
+    assert _routes(routers[1])[("/depotaddress/", "GET")] == "read_depot_addr_prices"
+
+
+def test_routers_without_metadata(tmp_path: Path) -> None:
+    routers = routers_from_metadata(str(tmp_path / "missing.json"))
+    assert [router.prefix for router in routers] == [
+        "/depotmaster",
+        "/gateout",
+        "/depotaddress",
+    ]
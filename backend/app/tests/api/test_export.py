@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Annotated, Any
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.export import ExportFormat, stream_export
+from app.api.filters import ListFilters, filter_model
+from app.models.models_depot import DepotMaster, DepotMasterBase
+from app.tests.utils.sqlite import sqlite_session
+
+DepotMasterFilters = filter_model(DepotMasterBase)
+ROWS = 25
+
+
+def _client() -> TestClient:
+    rows = (
+        DepotMaster(
+            instance_id=i,
+            customer="MAERSK" if i % 2 else "CMA",
+            container_number=f"MSKU{i:04}",
+            price=1000.0 + i,
+            gate_in_date=datetime(2024, 1, 1 + i, tzinfo=timezone.utc),
+        )
+        for i in range(1, ROWS + 1)
+    )
+    with sqlite_session(DepotMaster, rows=rows) as session:
+        engine = session.get_bind()
+
+    app = FastAPI()
+
+    @app.get("/depotmaster/export")
+    def export(
+        filters: Annotated[ListFilters, Depends(DepotMasterFilters)],
+        format: ExportFormat = "ndjson",
+    ) -> Any:
+        with Session(engine) as session:
+            # Batches smaller than the table, so the stream spans several fetches
+            return stream_export(session, DepotMaster, filters, format, batch_size=4)
+
+    return TestClient(app)
+
+
+def test_ndjson_export_streams_filtered_rows() -> None:
+    response = _client().get(
+        "/depotmaster/export", params={"customer": "MAERSK", "sort": "-price"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["instance_id"] for r in rows] == list(range(ROWS, 0, -2))
+    assert rows[0]["gate_in_date"].startswith("2024-01-26T00:00:00")
+    assert rows[0]["vendor"] is None
+
+
+def test_csv_export_has_one_header_and_every_row() -> None:
+    response = _client().get("/depotmaster/export", params={"format": "csv"})
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][0] == "vendor" and "instance_id" in rows[0]
+    assert len(rows) == ROWS + 1
+    assert (
+        response.headers["content-disposition"]
+        == 'attachment; filename="depotmaster.csv"'
+    )
+
+
+def test_parquet_export() -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = _client().get(
+        "/depotmaster/export", params={"format": "parquet", "price__gte": 1010}
+    )
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == ROWS - 9
+    assert table.column("instance_id").to_pylist() == list(range(10, ROWS + 1))
+    assert str(table.schema.field("gate_in_date").type) == "timestamp[us]"
+    # One row group per fetched batch
+    assert pq.ParquetFile(io.BytesIO(response.content)).num_row_groups == 4
+
+
+def test_invalid_sort_is_rejected_before_streaming() -> None:
+    assert (
+        _client().get("/depotmaster/export", params={"sort": "nope"}).status_code == 400
+    )
@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+from typing import Annotated, Any
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.filters import ListFilters, filter_model
+from app.crud import count_rows, read_page
+from app.models.models_depot import GateOut, GateOutBase
+from app.tests.utils.sqlite import sqlite_session
+
+GateOutFilters = filter_model(GateOutBase)
+
+
+def _session() -> Session:
+    return sqlite_session(
+        GateOut,
+        rows=[
+            GateOut(
+                instance_id=1,
+                customer="MAERSK",
+                container_number="MSKU1",
+                price=900,
+                gate_in_date=datetime(2024, 1, 5, tzinfo=timezone.utc),
+            ),
+            GateOut(
+                instance_id=2,
+                customer="MAERSK",
+                container_number="MSKU2",
+                price=1200,
+                gate_in_date=datetime(2024, 3, 1, tzinfo=timezone.utc),
+            ),
+            GateOut(
+                instance_id=3,
+                customer="CMA",
+                container_number="CMAU1",
+                price=1100,
+                gate_in_date=datetime(2024, 2, 1, tzinfo=timezone.utc),
+            ),
+            GateOut(
+                instance_id=4,
+                customer="MSC_100%",
+                container_number="MSCU1",
+                price=1100,
+                gate_in_date=None,
+            ),
+        ],
+    )
+
+
+def _app(session: Session) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/gateout/")
+    def read(
+        filters: Annotated[ListFilters, Depends(GateOutFilters)],
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Any:
+        where = filters.where(GateOut)
+        order_by = filters.order_by(GateOut) if filters.sort else None
+        items, _ = read_page(
+            session=session,
+            model=GateOut,
+            skip=skip,
+            limit=limit,
+            where=where,
+            order_by=order_by,
+        )
+        return {
+            "ids": [i.instance_id for i in items],
+            "count": count_rows(session=session, model=GateOut, where=where),
+        }
+
+    return TestClient(app)
+
+
+def test_query_parameters_are_generated_from_the_base_model() -> None:
+    fields = set(GateOutFilters.model_fields)
+    assert {
+        "customer",
+        "customer__prefix",
+        "price",
+        "price__gte",
+        "price__lte",
+        "gate_in_date__gte",
+        "gate_in_date__lte",
+        "sort",
+    } <= fields
+    assert "gate_in_date" not in fields
+
+
+def test_equality_range_and_prefix_filters() -> None:
+    with _session() as session:
+        client = _app(session)
+
+        assert client.get("/gateout/", params={"customer": "MAERSK"}).json() == {
+            "ids": [1, 2],
+            "count": 2,
+        }
+        assert client.get(
+            "/gateout/", params={"container_number__prefix": "MS"}
+        ).json()["ids"] == [1, 2, 4]
+        # LIKE wildcards in the value match literally
+        assert client.get("/gateout/", params={"customer__prefix": "MSC_100%"}).json()[
+            "ids"
+        ] == [4]
+        assert (
+            client.get("/gateout/", params={"customer__prefix": "MSC%"}).json()["ids"]
+            == []
+        )
+        assert client.get(
+            "/gateout/",
+            params={
+                "gate_in_date__gte": "2024-01-15T00:00:00Z",
+                "price__lte": 1150,
+            },
+        ).json() == {"ids": [3], "count": 1}
+        assert client.get("/gateout/", params={"price": "cheap"}).status_code == 422
+
+
+def test_multi_column_sort() -> None:
+    with _session() as session:
+        client = _app(session)
+
+        assert client.get("/gateout/", params={"sort": "-price,customer"}).json()[
+            "ids"
+        ] == [2, 3, 4, 1]
+        assert client.get(
+            "/gateout/", params={"sort": "customer", "skip": 1, "limit": 2}
+        ).json()["ids"] == [1, 2]
+        response = client.get("/gateout/", params={"sort": "hashed_password"})
+        assert response.status_code == 400
@@ -0,0 +1,103 @@
+from typing import Any
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import mssql
+from sqlmodel import Session, select
+
+from app.api.bulk import run_bulk
+from app.crud import _max_key_statement, bulk_create, bulk_delete, bulk_update
+from app.models.models_depot import GateOut, GateOutBulkCreate, GateOutBulkUpdate
+from app.tests.utils.sqlite import sqlite_session
+
+
+def _session() -> Session:
+    return sqlite_session(
+        GateOut,
+        rows=(
+            GateOut(instance_id=i, customer="MAERSK", city="Rotterdam")
+            for i in (1, 2, 3)
+        ),
+    )
+
+
+def _statuses(result: Any) -> list[tuple[int | None, str]]:
+    return [(s.instance_id, s.status) for s in result.results]
+
+
+def test_bulk_create_assigns_ids_and_reports_conflicts() -> None:
+    with _session() as session:
+        items = [
+            GateOutBulkCreate(customer="CMA"),
+            GateOutBulkCreate(instance_id=2, customer="taken"),
+            GateOutBulkCreate(instance_id=10, customer="MSC"),
+            GateOutBulkCreate(instance_id=10, customer="repeated"),
+            GateOutBulkCreate(customer="ONE"),
+        ]
+        result = run_bulk(
+            session,
+            len(items),
+            lambda: bulk_create(session=session, model=GateOut, items=items),
+        )
+
+        assert _statuses(result) == [
+            (11, "created"),
+            (2, "conflict"),
+            (10, "created"),
+            (10, "conflict"),
+            (12, "created"),
+        ]
+        assert (result.succeeded, result.failed) == (3, 2)
+        assert session.get(GateOut, 2).customer == "MAERSK"  # type: ignore[union-attr]
+        assert [
+            g.customer
+            for g in session.exec(select(GateOut).where(GateOut.instance_id >= 10))
+        ] == ["MSC", "CMA", "ONE"]
+
+
+def test_bulk_update_only_touches_sent_fields() -> None:
+    with _session() as session:
+        items = [
+            GateOutBulkUpdate(instance_id=1, customer="CMA"),
+            GateOutBulkUpdate(instance_id=2, city="Hamburg", price=1200),
+            GateOutBulkUpdate(instance_id=99, customer="nobody"),
+        ]
+        result = run_bulk(
+            session,
+            len(items),
+            lambda: bulk_update(session=session, model=GateOut, items=items),
+        )
+        session.expire_all()
+
+        assert _statuses(result) == [(1, "updated"), (2, "updated"), (99, "not_found")]
+        first, second = session.get(GateOut, 1), session.get(GateOut, 2)
+        assert first is not None and second is not None
+        assert (first.customer, first.city) == ("CMA", "Rotterdam")
+        assert (second.customer, second.price) == ("MAERSK", 1200)
+
+
+def test_bulk_delete_and_size_limit(monkeypatch: Any) -> None:
+    with _session() as session:
+        result = run_bulk(
+            session, 2, lambda: bulk_delete(session=session, model=GateOut, ids=[3, 42])
+        )
+
+        assert _statuses(result) == [(3, "deleted"), (42, "not_found")]
+        assert [g.instance_id for g in session.exec(select(GateOut))] == [1, 2]
+
+        monkeypatch.setattr("app.api.bulk.settings.BULK_MAX_ITEMS", 1)
+        with pytest.raises(HTTPException) as e:
+            run_bulk(
+                session,
+                2,
+                lambda: bulk_delete(session=session, model=GateOut, ids=[1, 2]),
+            )
+        assert e.value.status_code == 413
+
+
+def test_next_id_is_read_under_a_lock_on_sql_server() -> None:
+    statement = _max_key_statement(GateOut, GateOut.instance_id)
+    assert "FROM gateout WITH (UPDLOCK, HOLDLOCK)" in str(
+        statement.compile(dialect=mssql.dialect())  # type: ignore[no-untyped-call]
+    )
+    assert "UPDLOCK" not in str(statement.compile())
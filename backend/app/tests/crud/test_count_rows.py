@@ -0,0 +1,58 @@
+import uuid
+
+from sqlmodel import Session, col, delete
+
+from app.crud import count_rows, invalidate_counts
+from app.models.models import Item, User
+from app.models.models_depot import GateOut
+from app.tests.utils.sqlite import sqlite_session
+
+
+def _session() -> Session:
+    session = sqlite_session(
+        GateOut, User, Item, rows=(GateOut(instance_id=i) for i in range(1, 6))
+    )
+    invalidate_counts()
+    return session
+
+
+def test_cached_count_is_invalidated_by_orm_writes() -> None:
+    with _session() as session:
+        assert count_rows(session=session, model=GateOut, mode="cached") == 5
+
+        # Behind the ORM's back, as DataSyncer writes: served from the cache until invalidated
+        session.connection().exec_driver_sql(
+            "DELETE FROM gateout WHERE instance_id = 5"
+        )
+        session.commit()
+        assert count_rows(session=session, model=GateOut, mode="cached") == 5
+        invalidate_counts("GateOut")
+        assert count_rows(session=session, model=GateOut, mode="cached") == 4
+
+        session.add(GateOut(instance_id=10))
+        session.commit()
+        assert count_rows(session=session, model=GateOut, mode="cached") == 5
+
+        session.exec(delete(GateOut).where(col(GateOut.instance_id) > 2))
+        session.commit()
+        assert count_rows(session=session, model=GateOut, mode="cached") == 2
+
+
+def test_filtered_counts_are_cached_per_filter() -> None:
+    with _session() as session:
+        owner = User(email="owner@example.com", hashed_password="x")
+        session.add(owner)
+        session.add_all(Item(title=f"item {i}", owner_id=owner.id) for i in range(3))
+        session.commit()
+
+        mine = [Item.owner_id == owner.id]
+        theirs = [Item.owner_id == uuid.uuid4()]
+        assert count_rows(session=session, model=Item, where=mine, mode="cached") == 3
+        assert count_rows(session=session, model=Item, where=theirs, mode="cached") == 0
+
+
+def test_count_can_be_skipped_and_approximate_falls_back_to_exact() -> None:
+    with _session() as session:
+        assert count_rows(session=session, model=GateOut, include_count=False) is None
+        # sys.dm_db_partition_stats only exists on SQL Server
+        assert count_rows(session=session, model=GateOut, mode="approximate") == 5
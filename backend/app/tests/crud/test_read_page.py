@@ -0,0 +1,51 @@
+from typing import Any
+
+from sqlmodel import Session
+
+from app.crud import read_page
+from app.models.models_depot import GateOut
+from app.tests.utils.sqlite import sqlite_session
+
+
+def _session() -> Session:
+    # Gaps in the keys, as deletes leave them
+    return sqlite_session(
+        GateOut,
+        rows=(
+            GateOut(instance_id=i, container_number=f"CONT{i}") for i in range(1, 30, 3)
+        ),
+    )
+
+
+def _ids(items: list[Any]) -> list[int]:
+    return [item.instance_id for item in items]
+
+
+def test_cursor_pages_match_offset_pages() -> None:
+    with _session() as session:
+        pages, after = [], None
+        while True:
+            items, after = read_page(
+                session=session, model=GateOut, limit=4, after=after
+            )
+            pages.append(_ids(items))
+            if after is None:
+                break
+
+        assert pages == [[1, 4, 7, 10], [13, 16, 19, 22], [25, 28]]
+        for number, page in enumerate(pages):
+            items, _ = read_page(
+                session=session, model=GateOut, skip=number * 4, limit=4
+            )
+            assert _ids(items) == page
+
+
+def test_next_cursor_is_returned_in_offset_mode_too() -> None:
+    with _session() as session:
+        items, next_cursor = read_page(session=session, model=GateOut, skip=2, limit=3)
+        assert _ids(items) == [7, 10, 13] and next_cursor == 13
+
+        items, next_cursor = read_page(
+            session=session, model=GateOut, skip=5, limit=3, after=next_cursor
+        )
+        assert _ids(items) == [16, 19, 22]
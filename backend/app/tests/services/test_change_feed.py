@@ -0,0 +1,174 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from app.api.services.ChangeFeed import ChangeFeed
+from app.api.services.DataSyncer import DataSyncer
+from app.tests.utils.graph import FakeGraphServer
+
+DELTA_PATH = "/drives/drive-1/root/delta"
+WORKBOOK = {"id": "item-42", "name": "Depot Master.xlsx"}
+
+
+def _delta(server: FakeGraphServer, pages: dict[str, dict[str, Any]]) -> None:
+    """Serve delta pages keyed by the token query parameter."""
+
+    def respond(query: dict[str, list[str]], _body: Any) -> tuple[Any, ...]:
+        token = query["token"][0]
+        if token not in pages:
+            return 410, {"error": {"code": "resyncRequired"}}
+        return 200, pages[token]
+
+    server.route("GET", DELTA_PATH, respond)
+
+
+def _link(server: FakeGraphServer, token: str) -> str:
+    return f"{server.url}{DELTA_PATH}?token={token}"
+
+
+def test_first_poll_initializes_from_latest(tmp_path: Path) -> None:
+    token_file = tmp_path / "delta_token.json"
+    with FakeGraphServer() as server:
+        _delta(
+            server, {"latest": {"value": [], "@odata.deltaLink": _link(server, "t1")}}
+        )
+        feed = ChangeFeed(server.client(), "drive-1", token_file=str(token_file))
+
+        assert feed.poll() == (None, _link(server, "t1"))
+        assert [q["token"] for _, _, q in server.requests] == [["latest"]]
+        # Nothing is saved until the caller commits the new link
+        assert not token_file.exists()
+        feed.commit(_link(server, "t1"))
+        assert json.loads(token_file.read_text()) == {"drive-1": _link(server, "t1")}
+
+
+def test_idle_poll_is_one_request(tmp_path: Path) -> None:
+    token_file = str(tmp_path / "delta_token.json")
+    with FakeGraphServer() as server:
+        _delta(
+            server,
+            {
+                "latest": {"value": [], "@odata.deltaLink": _link(server, "t1")},
+                "t1": {"value": [], "@odata.deltaLink": _link(server, "t1")},
+            },
+        )
+        feed = ChangeFeed(server.client(), "drive-1", token_file=token_file)
+        feed.commit(feed.poll()[1])
+        server.requests.clear()
+
+        # A new feed picks up the persisted token
+        changes, _ = ChangeFeed(
+            server.client(), "drive-1", token_file=token_file
+        ).poll()
+        assert changes == []
+        assert len(server.requests) == 1
+
+
+def test_changes_follow_next_links(tmp_path: Path) -> None:
+    token_file = str(tmp_path / "delta_token.json")
+    with FakeGraphServer() as server:
+        _delta(
+            server,
+            {
+                "latest": {"value": [], "@odata.deltaLink": _link(server, "t1")},
+                "t1": {
+                    "value": [{"id": "folder"}],
+                    "@odata.nextLink": _link(server, "t1-page2"),
+                },
+                "t1-page2": {
+                    "value": [WORKBOOK],
+                    "@odata.deltaLink": _link(server, "t2"),
+                },
+                "t2": {"value": [], "@odata.deltaLink": _link(server, "t2")},
+            },
+        )
+        feed = ChangeFeed(server.client(), "drive-1", token_file=token_file)
+        feed.commit(feed.poll()[1])
+
+        changes, delta_link = feed.poll()
+        assert changes is not None
+        assert [c["id"] for c in changes] == ["folder", "item-42"]
+        assert delta_link == _link(server, "t2")
+        feed.commit(delta_link)
+        assert feed.poll() == ([], _link(server, "t2"))
+
+
+def test_expired_token_reinitializes(tmp_path: Path) -> None:
+    token_file = tmp_path / "delta_token.json"
+    with FakeGraphServer() as server:
+        token_file.write_text(json.dumps({"drive-1": _link(server, "expired")}))
+        _delta(
+            server, {"latest": {"value": [], "@odata.deltaLink": _link(server, "t1")}}
+        )
+        feed = ChangeFeed(server.client(), "drive-1", token_file=str(token_file))
+
+        assert feed.poll() == (None, _link(server, "t1"))
+        assert json.loads(token_file.read_text()) == {}
+
+
+def test_sync_runs_only_when_workbook_changed(tmp_path: Path) -> None:
+    token_file = str(tmp_path / "delta_token.json")
+    with FakeGraphServer() as server:
+        _delta(
+            server,
+            {
+                "latest": {"value": [], "@odata.deltaLink": _link(server, "t1")},
+                "t1": {
+                    "value": [{"id": "other-file"}],
+                    "@odata.deltaLink": _link(server, "t2"),
+                },
+                "t2": {"value": [WORKBOOK], "@odata.deltaLink": _link(server, "t3")},
+            },
+        )
+        syncs: list[int] = []
+
+        def check_and_sync() -> bool:
+            syncs.append(1)
+            return True
+
+        syncer = DataSyncer.__new__(DataSyncer)
+        syncer._sharepoint_file_name = WORKBOOK["name"]
+        syncer._change_feed = ChangeFeed(
+            server.client(), "drive-1", token_file=token_file
+        )
+        syncer._item_id = WORKBOOK["id"]
+        syncer.check_and_sync = check_and_sync  # type: ignore[method-assign]
+
+        # Freshly initialized feed: changes may have been missed, so sync
+        assert syncer.sync_if_changed() is True
+        assert syncer.sync_if_changed() is False
+        assert syncer.sync_if_changed() is True
+        assert len(syncs) == 2
+
+
+def test_failed_sync_is_retried_on_the_next_tick(tmp_path: Path) -> None:
+    token_file = str(tmp_path / "delta_token.json")
+    with FakeGraphServer() as server:
+        _delta(
+            server,
+            {
+                "t1": {"value": [WORKBOOK], "@odata.deltaLink": _link(server, "t2")},
+                "t2": {"value": [], "@odata.deltaLink": _link(server, "t2")},
+            },
+        )
+        feed = ChangeFeed(server.client(), "drive-1", token_file=token_file)
+        feed.commit(_link(server, "t1"))
+        results = [False, True]
+        syncs: list[bool] = []
+
+        def check_and_sync() -> bool:
+            syncs.append(results.pop(0))
+            return syncs[-1]
+
+        syncer = DataSyncer.__new__(DataSyncer)
+        syncer._sharepoint_file_name = WORKBOOK["name"]
+        syncer._change_feed = feed
+        syncer._item_id = WORKBOOK["id"]
+        syncer.check_and_sync = check_and_sync  # type: ignore[method-assign]
+
+        # The first sync fails, so the change is polled again and retried
+        assert syncer.sync_if_changed() is True
+        assert syncer.sync_if_changed() is True
+        assert syncs == [False, True]
+        # Once it went through the feed moves on
+        assert syncer.sync_if_changed() is False
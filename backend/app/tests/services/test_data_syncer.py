@@ -0,0 +1,148 @@
+import json
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from app.api.services.DataSyncer import (
+    DataSyncer,
+    compute_cell_hashes,
+    compute_row_hash,
+    compute_row_hashes,
+    diff_row_hashes,
+    group_changed_columns,
+    is_legacy_snapshot,
+)
+from app.api.services.RowHashStore import JsonRowHashStore, empty_snapshot
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "instance_id": [0, 1, 2],
+            "container_number": ["ABCU1234567", "ABCU7654321", None],
+            "price": [100.0, None, 250.5],
+        }
+    )
+
+
+def test_vectorized_hashes_are_stable() -> None:
+    assert compute_row_hashes(_frame()).equals(compute_row_hashes(_frame()))
+
+
+def test_vectorized_hashes_detect_changes() -> None:
+    df = _frame()
+    old_hashes = compute_row_hashes(df)
+    df.loc[1, "price"] = 99.0
+    df = pd.concat(
+        [df, pd.DataFrame({"instance_id": [3], "price": [1.0]})], ignore_index=True
+    )
+    new_hashes = compute_row_hashes(df)
+    assert diff_row_hashes(old_hashes, new_hashes) == ([3], [1], [])
+    assert diff_row_hashes(new_hashes, old_hashes) == ([], [1], [3])
+
+
+def test_legacy_snapshot_migration() -> None:
+    df = _frame()
+    legacy_hashes = compute_row_hashes(df, legacy=True)
+    assert is_legacy_snapshot(legacy_hashes)
+    assert not is_legacy_snapshot(compute_row_hashes(df))
+    assert not is_legacy_snapshot(empty_snapshot())
+    # An unchanged sheet diffed against its legacy digests reports no changes
+    assert diff_row_hashes(legacy_hashes, compute_row_hashes(df, legacy=True)) == (
+        [],
+        [],
+        [],
+    )
+
+
+def test_changed_rows_grouped_by_column_set() -> None:
+    df = _frame()
+    old_cells = compute_cell_hashes(df)
+    df.loc[0, "price"] = 1.0
+    df.loc[1, "price"] = 2.0
+    df.loc[2, ["price", "container_number"]] = [3.0, "ABCU0000000"]
+    new_cells = compute_cell_hashes(df)
+
+    groups = group_changed_columns(old_cells, new_cells, [0, 1, 2])
+    assert groups == {("price",): [0, 1], ("container_number", "price"): [2]}
+    # Without previous cell digests every column is updated
+    assert group_changed_columns(None, new_cells, [1]) == {
+        ("container_number", "price"): [1]
+    }
+
+
+class _RecordingDBClient:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, list[int]]] = []
+
+    def get_connection(self) -> nullcontext[Any]:
+        return nullcontext(None)
+
+    def create_table_from_dataframe(
+        self, conn: Any, table_name: str, df: pd.DataFrame
+    ) -> None:
+        pass
+
+    def upsert_dataframe(
+        self, conn: Any, table_name: str, df: pd.DataFrame, update_columns: Any = None
+    ) -> None:
+        self.calls.append(("upsert", df["instance_id"].tolist()))
+
+    def delete_rows(self, conn: Any, table_name: str, row_indices: list[int]) -> None:
+        self.calls.append(("delete", row_indices))
+
+
+def test_sync_is_chunked() -> None:
+    db_client = _RecordingDBClient()
+    progress: list[tuple[str, int, int]] = []
+    syncer = DataSyncer.__new__(DataSyncer)
+    syncer.db_client = db_client  # type: ignore[assignment]
+    syncer.chunk_size = 2
+    syncer.commit_per_chunk = True
+    syncer.progress_callback = lambda _table, stage, done, total: progress.append(
+        (stage, done, total)
+    )
+
+    df = pd.DataFrame({"instance_id": [10, 11, 12], "price": [1.0, 2.0, 3.0]})
+    syncer.sync_dataframe_to_db(
+        df, "DepotMaster", added_rows=[10, 11, 12], removed_rows=[1, 2, 3]
+    )
+
+    assert db_client.calls == [
+        ("upsert", [10, 11]),
+        ("upsert", [12]),
+        ("delete", [1, 2]),
+        ("delete", [3]),
+    ]
+    assert progress == [
+        ("upsert", 2, 3),
+        ("upsert", 3, 3),
+        ("delete", 2, 3),
+        ("delete", 3, 3),
+    ]
+
+
+def test_unchanged_legacy_snapshot_is_rewritten(tmp_path: Path) -> None:
+    df = _frame()
+    file_path = tmp_path / "sheet_row_hashes.json"
+    # The per-row path stored full sha256 hex digests
+    legacy = {str(i): compute_row_hash(df.iloc[i]) for i in range(len(df))}
+    file_path.write_text(json.dumps({"DepotMaster": legacy}))
+    store = JsonRowHashStore(str(file_path))
+    assert is_legacy_snapshot(store.load("DepotMaster"))
+
+    db_client = _RecordingDBClient()
+    syncer = DataSyncer.__new__(DataSyncer)
+    syncer.db_client = db_client  # type: ignore[assignment]
+    syncer.hash_store = store
+    syncer.parallel_sheets = False
+    syncer.sheets_mapping = {"Depot Master": "DepotMaster"}
+    hashed = {"Depot Master": (df, compute_row_hashes(df), compute_cell_hashes(df))}
+    syncer._sync_hashed_sheets(hashed, "2024-05-01T00:00:00Z")
+
+    assert db_client.calls == []
+    reloaded = JsonRowHashStore(str(file_path))
+    assert not is_legacy_snapshot(reloaded.load("DepotMaster"))
+    assert reloaded.load("DepotMaster").equals(compute_row_hashes(df))
@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import openai
+import pytest
+
+from app.api.services.EmailParser import AsyncEmailParser, EmailParser
+from app.api.services.ExtractionCache import ExtractionCache
+from app.api.services.GraphClient import AsyncGraphClient
+from app.core.config import settings
+from app.tests.utils.graph import FakeGraphServer, StaticTokens
+
+MAILBOX = "inventory@example.com"
+MESSAGE_IDS = [f"msg-{i}" for i in range(6)]
+
+
+def _serve_inbox(server: FakeGraphServer) -> None:
+    server.route(
+        "GET",
+        f"/users/{MAILBOX}/mailFolders/Inbox/messages",
+        lambda q, b: (
+            200,
+            {
+                "value": [
+                    {
+                        "id": mid,
+                        "subject": f"Offer {mid}",
+                        "receivedDateTime": "2024-05-01T00:00:00Z",
+                        "from": {"emailAddress": {"address": "vendor@example.com"}},
+                        "toRecipients": [{"emailAddress": {"address": MAILBOX}}],
+                    }
+                    for mid in MESSAGE_IDS
+                ]
+            },
+        ),
+    )
+    for mid in MESSAGE_IDS:
+
+        def respond(
+            _query: dict[str, list[str]], _body: Any, mid: str = mid
+        ) -> tuple[Any, ...]:
+            return (
+                200,
+                {
+                    "id": mid,
+                    "body": {"content": f"<p>20 units, message {mid}</p>"},
+                    "attachments": [
+                        {
+                            "@odata.type": "#microsoft.graph.fileAttachment",
+                            "name": "offer.txt",
+                            "contentBytes": base64.b64encode(
+                                f"qty for {mid}".encode()
+                            ).decode(),
+                        }
+                    ],
+                },
+            )
+
+        server.route("GET", f"/users/{MAILBOX}/messages/{mid}", respond)
+
+
+class _Tracker:
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+
+class _FakeLLMParser(EmailParser):
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.llm = _Tracker()
+
+    def parse_with_azure_openai(
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        self.llm.enter()
+        # Later messages answer first, so ordering is not an accident of timing
+        time.sleep(0.05 if "msg-0" in email_text else 0.01)
+        self.llm.leave()
+        if "msg-3" in email_text:
+            raise ValueError("unparseable")
+        return {"body": email_text, "attachment": attachment_text.strip()}
+
+
+class _AsyncFakeLLMParser(AsyncEmailParser):
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.llm = _Tracker()
+
+    async def parse_with_azure_openai(  # type: ignore[override]
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        self.llm.enter()
+        await asyncio.sleep(0.05 if "msg-0" in email_text else 0.01)
+        self.llm.leave()
+        if "msg-3" in email_text:
+            raise ValueError("unparseable")
+        return {"body": email_text, "attachment": attachment_text.strip()}
+
+
+def _check_results(results: list[dict[str, Any]]) -> None:
+    assert [r["email_id"] for r in results] == MESSAGE_IDS
+    assert results[1]["parsed"] == {
+        "body": "20 units, message msg-1",
+        "attachment": "qty for msg-1",
+    }
+    assert results[3]["error"] == "unparseable"
+
+
+def test_process_inbox_fans_out_and_keeps_order() -> None:
+    with FakeGraphServer() as server:
+        _serve_inbox(server)
+        parser = _FakeLLMParser(server.client(), MAILBOX)
+
+        results = parser.process_inbox(top=10, fetch_concurrency=3, llm_concurrency=2)
+
+        _check_results(results)
+        # One list request, then every body with its attachments in one $batch call
+        assert [path for _, path, _ in server.requests] == [
+            server.requests[0][1],
+            "/$batch",
+        ]
+        assert len(server.batched) == len(MESSAGE_IDS)
+        assert all(q == {"$expand": ["attachments"]} for _, _, q in server.batched)
+        assert 1 < parser.llm.peak <= 2
+
+
+def test_async_process_inbox_fans_out_and_keeps_order() -> None:
+    async def run(parser: _AsyncFakeLLMParser) -> list[dict[str, Any]]:
+        results = await parser.process_inbox(
+            top=10, fetch_concurrency=3, llm_concurrency=2
+        )
+        await parser.client.close()
+        return results
+
+    with FakeGraphServer() as server:
+        _serve_inbox(server)
+        client = AsyncGraphClient(graph_api=server.url, token_manager=StaticTokens())  # type: ignore[arg-type]
+        parser = _AsyncFakeLLMParser(client, MAILBOX)
+
+        _check_results(asyncio.run(run(parser)))
+        assert len(server.requests) == 2
+        assert len(server.batched) == len(MESSAGE_IDS)
+        assert parser.llm.peak == 2
+
+
+class _FakeCompletions:
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    def create(self, **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content='```json\n{"Qty": "20"}\n```')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_sync_parser_calls_the_azure_openai_client(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    completions = _FakeCompletions()
+    clients: list[dict[str, Any]] = []
+
+    def azure_openai(**kwargs: Any) -> Any:
+        clients.append(kwargs)
+        return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    monkeypatch.setattr(openai, "AzureOpenAI", azure_openai)
+    monkeypatch.setattr(settings, "AZURE_OPENAI_DEPLOYMENT", "extraction-model")
+    cache = ExtractionCache(str(tmp_path / "llm.sqlite"))
+    with FakeGraphServer() as server:
+        parser = EmailParser(server.client(), MAILBOX, cache=cache)
+        assert parser.parse_with_azure_openai("20 units") == {"Qty": "20"}
+        assert parser.parse_with_azure_openai("20 more units") == {"Qty": "20"}
+
+    # One client for the parser, called with the deployment as the model
+    assert len(clients) == 1
+    assert [c["model"] for c in completions.calls] == ["extraction-model"] * 2
+    assert "20 units" in completions.calls[0]["messages"][0]["content"]
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+from app.api.services.EmailParser import AsyncEmailParser, EmailParser
+from app.api.services.ExtractionCache import ExtractionCache, extraction_key
+from app.tests.utils.graph import FakeGraphServer
+
+
+class _CountingParser(EmailParser):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def _complete(self, prompt: str) -> str:
+        self.calls += 1
+        return '```json\n{"Qty": "20", "Size": "40HC"}\n```'
+
+
+class _AsyncCountingParser(AsyncEmailParser):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    async def _complete(self, prompt: str) -> str:  # type: ignore[override]
+        self.calls += 1
+        return '{"Qty": "20"}'
+
+
+def test_repeated_extraction_is_served_from_the_cache(tmp_path: Path) -> None:
+    cache = ExtractionCache(str(tmp_path / "llm.sqlite"))
+    with FakeGraphServer() as server:
+        parser = _CountingParser(server.client(), "inventory@example.com", cache=cache)
+
+        first = parser.parse_with_azure_openai(
+            "20 units of 40HC", "Qty Size\n20 40HC\n"
+        )
+        # Same content, different wrapping and trailing whitespace
+        second = parser.parse_with_azure_openai(
+            "20 units  of\n40HC", "Qty Size\n20 40HC"
+        )
+
+    assert first == second == {"Qty": "20", "Size": "40HC"}
+    assert parser.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_cache_persists_and_is_keyed_by_deployment(tmp_path: Path) -> None:
+    path = str(tmp_path / "llm.sqlite")
+    key = extraction_key("prompt", "gpt-4o")
+    ExtractionCache(path).put(key, {"Qty": "1"})
+
+    reopened = ExtractionCache(path)
+    assert reopened.get(key) == {"Qty": "1"}
+    assert reopened.get(extraction_key("prompt", "gpt-4o-mini")) is None
+
+
+def test_expired_and_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = ExtractionCache(
+        str(tmp_path / "llm.sqlite"), ttl_seconds=0.05, max_entries=2
+    )
+    cache.put("old", {"n": 0})
+    time.sleep(0.1)
+    assert cache.get("old") is None
+
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
+    assert cache.stats()["entries"] == 2
+
+
+def test_async_parser_uses_the_cache(tmp_path: Path) -> None:
+    cache = ExtractionCache(str(tmp_path / "llm.sqlite"))
+    with FakeGraphServer() as server:
+        parser = _AsyncCountingParser(
+            server.client(), "inventory@example.com", cache=cache
+        )
+
+        async def run() -> list[dict[str, Any]]:
+            return [await parser.parse_with_azure_openai("20 units") for _ in range(3)]
+
+        assert asyncio.run(run()) == [{"Qty": "20"}] * 3
+
+    assert parser.calls == 1
+    assert cache.stats()["hits"] == 2
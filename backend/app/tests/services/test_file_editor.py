@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+from app.api.services.DataSyncer import compute_row_hashes, diff_row_hashes
+from app.api.services.FileEditor import AsyncFileEditor, FileEditor
+from app.api.services.GraphClient import AsyncGraphClient
+from app.tests.utils.graph import FakeGraphServer, StaticTokens
+
+METADATA_PATH = Path(__file__).parents[2] / "sharepoint" / "DepotMasterMetadata.json"
+
+KEY = ["container_number", "gate_in_date"]
+
+
+def _sheet(containers: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "container_number": containers,
+            "gate_in_date": pd.to_datetime(["2024-05-01"] * len(containers)),
+            "approved": ["yes"] * len(containers),
+        }
+    ).reset_index(names="instance_id")
+    df["instance_id"] = FileEditor._key_instance_ids(df, KEY)
+    return df
+
+
+def test_key_ids_are_unique_for_duplicate_keys() -> None:
+    df = _sheet(["ABCU1", "ABCU1", "ABCU2"])
+    assert df["instance_id"].is_unique
+    assert (df["instance_id"] >= 0).all()
+
+
+def test_key_ids_do_not_depend_on_pandas_hashing() -> None:
+    # blake2b over the key text, so a pandas upgrade leaves every id in place
+    text = b"ABCU1\x1f2024-05-01 00:00:00\x1f0"
+    digest = hashlib.blake2b(text, digest_size=8).digest()
+    expected = int.from_bytes(digest, "big") >> 1
+    assert _sheet(["ABCU1"]).loc[0, "instance_id"] == expected == 4272622978267632966
+
+
+def test_key_id_order_ignores_sheet_order() -> None:
+    # Lists page by instance_id: keyed rows come back in hash order, the same after rows move
+    before = _sheet(["ABCU1", "ABCU2", "ABCU3", "ABCU4"])
+    after = _sheet(["ABCU3", "ABCU1", "ABCU4", "ABCU2"])
+
+    listed = before.sort_values("instance_id")["container_number"].tolist()
+    assert listed == after.sort_values("instance_id")["container_number"].tolist()
+    assert listed == ["ABCU4", "ABCU1", "ABCU3", "ABCU2"]
+
+
+def test_row_insert_costs_one_upsert() -> None:
+    before = _sheet(["ABCU1", "ABCU2", "ABCU3"])
+    after = _sheet(["NEWU0", "ABCU1", "ABCU2", "ABCU3"])
+
+    added, changed, removed = diff_row_hashes(
+        compute_row_hashes(before), compute_row_hashes(after)
+    )
+    new_id = after.loc[0, "instance_id"]
+    assert (added, changed, removed) == ([new_id], [], [])
+
+
+def test_async_editor_downloads_once_per_ctag(tmp_path: Path) -> None:
+    item = {
+        "id": "item-1",
+        "cTag": "c1",
+        "lastModifiedDateTime": "2024-05-01T00:00:00Z",
+    }
+
+    async def fetch_twice(editor: AsyncFileEditor) -> tuple[str, str]:
+        first = await editor._download_excel(await editor.get_sync_data())
+        second = await editor._download_excel(await editor.get_sync_data())
+        await editor._client.close()
+        return first, second
+
+    with FakeGraphServer() as server:
+        server.route(
+            "GET",
+            "/sites/contoso.sharepoint.com:/sites/ISM",
+            lambda q, b: (200, {"id": "site-1"}),
+        )
+        server.route(
+            "GET",
+            "/sites/site-1/drives",
+            lambda q, b: (200, {"value": [{"name": "Documents", "id": "drive-1"}]}),
+        )
+        server.route(
+            "GET",
+            "/sites/site-1/drives/drive-1/root:/Inventory/Depot Master.xlsx",
+            lambda q, b: (200, item),
+        )
+        server.route(
+            "GET",
+            "/drives/drive-1/items/item-1/content",
+            lambda q, b: (200, {"workbook": "bytes"}),
+        )
+        client = AsyncGraphClient(graph_api=server.url, token_manager=StaticTokens())  # type: ignore[arg-type]
+        editor = AsyncFileEditor(
+            client,
+            site_domain="contoso.sharepoint.com",
+            site_name="ISM",
+            sharepoint_folder_name="Inventory",
+            sharepoint_file_name="Depot Master.xlsx",
+            metadata_path=str(METADATA_PATH),
+            cache_dir=str(tmp_path),
+        )
+
+        first, second = asyncio.run(fetch_twice(editor))
+
+        assert first == second
+        assert Path(first).read_bytes() == b'{"workbook": "bytes"}'
+        downloads = [
+            path for _, path, _ in server.requests if path.endswith("/content")
+        ]
+        assert len(downloads) == 1
+        # Site and drive ids are looked up once
+        assert len(server.requests) == 5
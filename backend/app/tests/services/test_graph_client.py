@@ -0,0 +1,193 @@
+import asyncio
+from typing import Any
+
+import httpx
+import pytest
+
+from app.api.services import GraphClient as graph_client_module
+from app.api.services.GraphClient import AsyncGraphClient
+from app.tests.utils.graph import FakeGraphServer, StaticTokens
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    delays: list[float] = []
+    monkeypatch.setattr("app.api.services.GraphClient.time.sleep", delays.append)
+    return delays
+
+
+def _sequence(*responses: tuple[Any, ...]) -> Any:
+    """Responder returning the given responses in turn, repeating the last one."""
+    remaining = list(responses)
+
+    def respond(_query: dict[str, list[str]], _body: Any) -> tuple[Any, ...]:
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+
+    return respond
+
+
+def test_requests_reuse_one_connection() -> None:
+    with FakeGraphServer() as server:
+        server.route("GET", "/me", _sequence((200, {"id": "me"})))
+        client = server.client()
+        for _ in range(5):
+            assert client.get("/me").json() == {"id": "me"}
+
+        assert len(server.requests) == 5
+        assert len(set(server.connections)) == 1
+
+
+def test_throttled_request_honours_retry_after(_no_sleep: list[float]) -> None:
+    with FakeGraphServer() as server:
+        server.route(
+            "GET",
+            "/me",
+            _sequence(
+                (429, {"error": {"code": "TooManyRequests"}}, {"Retry-After": "7"}),
+                (503, {"error": {"code": "serviceNotAvailable"}}),
+                (200, {"id": "me"}),
+            ),
+        )
+        response = server.client().get("/me")
+
+        assert response.status_code == 200
+        assert len(server.requests) == 3
+        assert _no_sleep[0] >= 7
+        assert len(_no_sleep) == 2
+
+
+def test_retries_are_bounded(_no_sleep: list[float]) -> None:
+    with FakeGraphServer() as server:
+        server.route(
+            "GET", "/me", _sequence((503, {"error": {"code": "serviceNotAvailable"}}))
+        )
+        client = server.client()
+        client.max_retries = 2
+
+        assert client.get("/me").status_code == 503
+        assert len(server.requests) == 3
+        assert len(_no_sleep) == 2
+
+
+def test_client_errors_are_not_retried() -> None:
+    with FakeGraphServer() as server:
+        response = server.client().get("/missing")
+
+        assert response.status_code == 404
+        assert len(server.requests) == 1
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    with FakeGraphServer() as server:
+        client = server.client()
+    delays = [client._backoff_seconds(attempt) for attempt in range(20)]
+    assert all(0 <= d <= graph_client_module.MAX_BACKOFF_SECONDS for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_unauthorized_request_retries_with_new_token() -> None:
+    with FakeGraphServer() as server:
+        server.route(
+            "GET",
+            "/me",
+            _sequence(
+                (401, {"error": {"code": "InvalidAuthenticationToken"}}),
+                (200, {"id": "me"}),
+            ),
+        )
+        response = server.client().get("/me")
+
+        assert response.status_code == 200
+        assert server.authorization == ["Bearer test-token-1", "Bearer test-token-2"]
+
+
+def test_async_client_retries_and_reuses_connection(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    delays: list[float] = []
+
+    async def record_sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr("app.api.services.GraphClient.asyncio.sleep", record_sleep)
+
+    async def fetch_all(client: AsyncGraphClient) -> list[int]:
+        statuses = [(await client.get("/me")).status_code]
+        statuses += [
+            r.status_code
+            for r in await asyncio.gather(*(client.get("/me") for _ in range(3)))
+        ]
+        await client.close()
+        return statuses
+
+    with FakeGraphServer() as server:
+        server.route(
+            "GET",
+            "/me",
+            _sequence((429, {}, {"Retry-After": "2"}), (200, {"id": "me"})),
+        )
+        client = AsyncGraphClient(graph_api=server.url, token_manager=StaticTokens())  # type: ignore[arg-type]
+
+        assert asyncio.run(fetch_all(client)) == [200] * 4
+        assert len(delays) == 1 and delays[0] >= 2
+        assert len(server.requests) == 5
+
+
+def test_batch_groups_sub_requests_and_retries_throttled_ones(
+    _no_sleep: list[float],
+) -> None:
+    with FakeGraphServer() as server:
+        for i in range(45):
+            server.route("GET", f"/items/{i}", _sequence((200, {"id": i})))
+        server.route(
+            "GET",
+            "/items/7",
+            _sequence((429, {}, {"Retry-After": "3"}), (200, {"id": 7})),
+        )
+
+        with server.client().batch() as batch:
+            futures = [batch.get(f"/items/{i}") for i in range(45)]
+            # Asking for a result sends the queued batches
+            assert futures[0].result().json() == {"id": 0}
+
+        assert [f.result().json()["id"] for f in futures] == list(range(45))
+        # 20 + 20 + 5 sub-requests, then the throttled one on its own
+        assert [path for _, path, _ in server.requests] == ["/$batch"] * 4
+        assert len(server.batched) == 46
+        assert _no_sleep[0] >= 3
+
+
+def test_batch_reports_sub_request_errors_per_item() -> None:
+    with FakeGraphServer() as server:
+        server.route("GET", "/items/1", _sequence((200, {"id": 1})))
+
+        with server.client().batch() as batch:
+            found, missing = batch.get("/items/1"), batch.get("/items/2")
+
+        assert found.result().status_code == 200
+        assert missing.result().status_code == 404
+        with pytest.raises(httpx.HTTPStatusError):
+            missing.result().raise_for_status()
+
+
+def test_async_batch_sends_requests_queued_together() -> None:
+    async def fetch(client: AsyncGraphClient) -> list[int]:
+        async with client.batch() as batch:
+            ids = [
+                r.json()["id"]
+                for r in await asyncio.gather(
+                    *(batch.get(f"/items/{i}") for i in range(5))
+                )
+            ]
+            # Awaited straight away: sent on the next loop step
+            ids.append((await batch.get("/items/5")).json()["id"])
+        await client.close()
+        return ids
+
+    with FakeGraphServer() as server:
+        for i in range(6):
+            server.route("GET", f"/items/{i}", _sequence((200, {"id": i})))
+        client = AsyncGraphClient(graph_api=server.url, token_manager=StaticTokens())  # type: ignore[arg-type]
+
+        assert asyncio.run(fetch(client)) == list(range(6))
+        assert len(server.requests) == 2
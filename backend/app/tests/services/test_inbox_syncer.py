@@ -0,0 +1,194 @@
+import json
+from typing import Any
+
+import httpx
+import openai
+from sqlmodel import Session, select
+
+from app.api.services.EmailParser import EmailParser
+from app.api.services.InboxSyncer import InboxSyncer
+from app.models.models_mail import MailSyncState, ProcessedEmail
+from app.tests.utils.graph import FakeGraphServer
+from app.tests.utils.sqlite import sqlite_engine
+
+MAILBOX = "inventory@example.com"
+DELTA_PATH = f"/users/{MAILBOX}/mailFolders/Inbox/messages/delta"
+
+
+def _message(mid: str, received: str = "2024-05-01T08:00:00Z") -> dict[str, Any]:
+    return {
+        "id": mid,
+        "subject": f"Offer {mid}",
+        "receivedDateTime": received,
+        "from": {"emailAddress": {"address": "vendor@example.com"}},
+        "toRecipients": [{"emailAddress": {"address": MAILBOX}}],
+    }
+
+
+class _CountingParser(EmailParser):
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.processed: list[str] = []
+        self.failures = {"msg-2"}
+
+    def process_messages(
+        self, emails: list[dict[str, Any]], *args: Any
+    ) -> list[dict[str, Any]]:
+        results = []
+        for mail in emails:
+            self.processed.append(mail["id"])
+            if mail["id"] in self.failures:
+                self.failures.discard(mail["id"])
+                results.append(
+                    self._inbox_result(mail, error=ValueError("LLM timeout"))
+                )
+            else:
+                results.append(self._inbox_result(mail, parsed={"Qty": 20}))
+        return results
+
+
+def _serve_delta(server: FakeGraphServer, pages: dict[str, dict[str, Any]]) -> None:
+    def respond(query: dict[str, list[str]], _body: Any) -> tuple[Any, ...]:
+        token = query.get("token", ["initial"])[0]
+        return 200, pages[token]
+
+    server.route("GET", DELTA_PATH, respond)
+
+
+def test_messages_are_processed_once_across_syncs() -> None:
+    engine = sqlite_engine(MailSyncState, ProcessedEmail)
+    with FakeGraphServer() as server:
+        link = f"{server.url}{DELTA_PATH}?token="
+        _serve_delta(
+            server,
+            {
+                "initial": {
+                    "value": [_message("msg-1")],
+                    "@odata.nextLink": link + "page2",
+                },
+                "page2": {
+                    "value": [_message("msg-2"), _message("msg-1")],
+                    "@odata.deltaLink": link + "d1",
+                },
+                # msg-1 shows up again next to a genuinely new message
+                "d1": {
+                    "value": [
+                        _message("msg-1"),
+                        _message("msg-3", "2024-05-02T08:00:00Z"),
+                        {"id": "msg-0", "@removed": {"reason": "deleted"}},
+                    ],
+                    "@odata.deltaLink": link + "d2",
+                },
+                "d2": {"value": [], "@odata.deltaLink": link + "d2"},
+            },
+        )
+        parser = _CountingParser(server.client(), MAILBOX)
+
+        first = InboxSyncer(parser, engine=engine)
+        assert [r["email_id"] for r in first.sync()] == ["msg-1", "msg-2"]
+        initial_query = server.requests[0][2]
+        assert initial_query["changeType"] == ["created"]
+        assert initial_query["$filter"][0].startswith("receivedDateTime ge ")
+
+        # A fresh syncer (e.g. after a restart) resumes from the stored delta link
+        second = InboxSyncer(parser, engine=engine)
+        assert [r["email_id"] for r in second.sync()] == ["msg-3", "msg-2"]
+        assert second.sync() == []
+
+        assert parser.processed == ["msg-1", "msg-2", "msg-3", "msg-2"]
+
+    with Session(engine) as session:
+        state = session.get(MailSyncState, MAILBOX)
+        assert state is not None
+        assert state.delta_link is not None and state.delta_link.endswith("token=d2")
+        assert state.watermark is not None
+        assert state.watermark.isoformat() == "2024-05-02T08:00:00"
+        rows = {r.message_id: r for r in session.exec(select(ProcessedEmail))}
+        assert {mid: (r.status, r.attempts) for mid, r in rows.items()} == {
+            "msg-1": ("parsed", 1),
+            "msg-2": ("parsed", 2),
+            "msg-3": ("parsed", 1),
+        }
+        assert json.loads(rows["msg-1"].result or "") == {"Qty": 20}
+
+
+def test_expired_delta_link_resumes_from_watermark() -> None:
+    engine = sqlite_engine(MailSyncState, ProcessedEmail)
+    with FakeGraphServer() as server:
+        with Session(engine) as session:
+            session.add(
+                MailSyncState(
+                    mailbox=MAILBOX, delta_link=f"{server.url}{DELTA_PATH}?token=gone"
+                )
+            )
+            session.commit()
+
+        def respond(query: dict[str, list[str]], _body: Any) -> tuple[Any, ...]:
+            if query.get("token") == ["gone"]:
+                return 410, {"error": {"code": "SyncStateNotFound"}}
+            return 200, {
+                "value": [_message("msg-9")],
+                "@odata.deltaLink": f"{server.url}{DELTA_PATH}?token=new",
+            }
+
+        server.route("GET", DELTA_PATH, respond)
+        parser = _CountingParser(server.client(), MAILBOX)
+
+        assert [r["email_id"] for r in InboxSyncer(parser, engine=engine).sync()] == [
+            "msg-9"
+        ]
+
+
+class _UnavailableLLMParser(EmailParser):
+    """Extraction fails as if Azure OpenAI were unreachable, until it comes back."""
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.available = False
+
+    def parse_with_azure_openai(
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        if not self.available:
+            # openai 3 types requests with httpx2, earlier releases with httpx
+            raise openai.APIConnectionError(
+                request=httpx.Request("POST", "https://llm.example.com")  # type: ignore[arg-type, unused-ignore]
+            )
+        return {"Qty": 20}
+
+
+def test_extraction_outage_keeps_messages_pending() -> None:
+    engine = sqlite_engine(MailSyncState, ProcessedEmail)
+    with FakeGraphServer() as server:
+        link = f"{server.url}{DELTA_PATH}?token="
+        _serve_delta(
+            server,
+            {
+                "initial": {
+                    "value": [_message("msg-1")],
+                    "@odata.deltaLink": link + "d1",
+                },
+                "d1": {"value": [], "@odata.deltaLink": link + "d1"},
+            },
+        )
+        server.route(
+            "GET",
+            f"/users/{MAILBOX}/messages/msg-1",
+            lambda q, b: (200, {"id": "msg-1", "body": {"content": "20 units"}}),
+        )
+        parser = _UnavailableLLMParser(server.client(), MAILBOX)
+        syncer = InboxSyncer(parser, engine=engine, max_attempts=2)
+
+        # More failed syncs than max_attempts, without giving up on the message
+        for _ in range(3):
+            assert "error" in syncer.sync()[0]
+        with Session(engine) as session:
+            row = session.get(ProcessedEmail, "msg-1")
+            assert row is not None and (row.status, row.attempts) == ("pending", 0)
+
+        parser.available = True
+        assert syncer.sync()[0]["parsed"] == {"Qty": 20}
+        assert syncer.sync() == []
+    with Session(engine) as session:
+        row = session.get(ProcessedEmail, "msg-1")
+        assert row is not None and (row.status, row.attempts) == ("parsed", 1)
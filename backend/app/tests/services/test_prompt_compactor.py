@@ -0,0 +1,106 @@
+import base64
+from typing import Any
+
+from app.api.services.EmailParser import EmailParser
+from app.api.services.PromptCompactor import (
+    chunk_attachments,
+    estimate_tokens,
+    merge_extractions,
+)
+from app.tests.utils.graph import FakeGraphServer
+
+MAILBOX = "inventory@example.com"
+
+
+def _price_sheet(rows: int) -> bytes:
+    lines = ["Depot,Size,Qty,Price,Empty"]
+    lines += [f"Depot {i % 50},40HC,{i},{1000 + i}," for i in range(rows)]
+    # Exact repeats and a blank line, as exported sheets often have
+    lines += [lines[1], lines[1], ",,,,"]
+    return "\n".join(lines).encode()
+
+
+def test_tables_are_compacted_and_deduplicated() -> None:
+    (text,) = chunk_attachments(
+        [("prices.csv", _price_sheet(3)), ("note.txt", b"  Valid until Friday \n\n")]
+    )
+
+    assert text.splitlines() == [
+        "Depot\tSize\tQty\tPrice",
+        "Depot 0\t40HC\t0\t1000",
+        "Depot 1\t40HC\t1\t1001",
+        "Depot 2\t40HC\t2\t1002",
+        "Valid until Friday",
+    ]
+
+
+def test_oversized_tables_are_chunked_within_the_budget() -> None:
+    chunks = chunk_attachments([("prices.csv", _price_sheet(500))], budget=400)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 400 + len(c.splitlines()) for c in chunks)
+    assert all(c.startswith("Depot\tSize\tQty\tPrice\n") for c in chunks)
+    rows = [line for c in chunks for line in c.splitlines()[1:]]
+    assert len(rows) == 500
+
+
+def test_chunk_results_are_merged() -> None:
+    assert merge_extractions([{"Qty": 1}]) == {"Qty": 1}
+    assert merge_extractions([{"items": [{"Qty": 1}]}, [{"Qty": 2}], {"Qty": 3}]) == {
+        "items": [{"Qty": 1}, {"Qty": 2}, {"Qty": 3}],
+        "chunks": 3,
+    }
+
+
+class _RecordingParser(EmailParser):
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.prompts: list[str] = []
+
+    def parse_with_azure_openai(
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        self.prompts.append(self._extraction_prompt(email_text, attachment_text))
+        return {"items": [{"rows": len(attachment_text.splitlines()) - 1}]}
+
+
+def test_process_messages_extracts_large_attachments_in_chunks(
+    monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(
+        "app.api.services.EmailParser.settings.STRUCTURED_EXTRACTION_ENABLED", False
+    )
+    with FakeGraphServer() as server:
+        server.route(
+            "GET",
+            f"/users/{MAILBOX}/messages/msg-1",
+            lambda q, b: (
+                200,
+                {
+                    "body": {"content": "Prices attached"},
+                    "attachments": [
+                        {
+                            "@odata.type": "#microsoft.graph.fileAttachment",
+                            "name": "prices.csv",
+                            "contentBytes": base64.b64encode(
+                                _price_sheet(2000)
+                            ).decode(),
+                        }
+                    ],
+                },
+            ),
+        )
+        parser = _RecordingParser(server.client(), MAILBOX)
+        monkeypatch.setattr(
+            parser,
+            "prompt_chunks",
+            lambda body, att: EmailParser.prompt_chunks(parser, body, att, 2000),
+        )
+        (result,) = parser.process_messages(
+            [{"id": "msg-1", "subject": "Prices", "from": None, "received": None}]
+        )
+
+    assert len(parser.prompts) > 1
+    assert all(estimate_tokens(p) <= 2000 * 1.1 for p in parser.prompts)
+    assert sum(item["rows"] for item in result["parsed"]["items"]) == 2000
+    assert result["prompt_tokens"] == sum(estimate_tokens(p) for p in parser.prompts)
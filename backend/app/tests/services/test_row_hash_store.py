@@ -0,0 +1,159 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api.services import RowHashStore
+from app.api.services.DataSyncer import _read_and_hash_sheet, compute_row_hash
+from app.api.services.RowHashStore import (
+    LEGACY_HASH_NAME,
+    JsonRowHashStore,
+    NumpyRowHashStore,
+)
+
+
+def _snapshot() -> pd.Series:
+    return pd.Series(
+        np.array([1, 2**63 + 5, 42], dtype=np.uint64),
+        index=np.array([0, 1, 7], dtype=np.int64),
+    )
+
+
+def test_numpy_store_round_trip(tmp_path: Path) -> None:
+    file_path = str(tmp_path / "sheet_row_hashes.json")
+    NumpyRowHashStore(file_path).save({"DepotMaster": _snapshot()})
+
+    loaded = NumpyRowHashStore(file_path).load("DepotMaster")
+    assert loaded.index.tolist() == [0, 1, 7]
+    assert loaded.tolist() == _snapshot().tolist()
+    assert NumpyRowHashStore(file_path).load("GateOut").empty
+
+
+def test_json_store_round_trip(tmp_path: Path) -> None:
+    file_path = str(tmp_path / "sheet_row_hashes.json")
+    JsonRowHashStore(file_path).save({"DepotMaster": _snapshot()})
+    JsonRowHashStore(file_path).save({"GateOut": _snapshot()})
+
+    store = JsonRowHashStore(file_path)
+    assert store.load("DepotMaster").tolist() == _snapshot().tolist()
+    assert store.load("GateOut").index.tolist() == [0, 1, 7]
+
+
+def test_numpy_store_reads_legacy_json(tmp_path: Path) -> None:
+    file_path = tmp_path / "sheet_row_hashes.json"
+    row = pd.Series({"instance_id": 0, "city": "Dallas"})
+    file_path.write_text(json.dumps({"DepotMaster": {"0": compute_row_hash(row)}}))
+
+    loaded = NumpyRowHashStore(str(file_path)).load("DepotMaster")
+    assert loaded.name == LEGACY_HASH_NAME
+    assert loaded.tolist() == [int(compute_row_hash(row)[:16], 16)]
+
+
+def test_numpy_store_keeps_cell_digests(tmp_path: Path) -> None:
+    file_path = str(tmp_path / "sheet_row_hashes.json")
+    cells = pd.DataFrame(
+        {
+            "city": np.array([1, 2, 3], dtype=np.uint32),
+            "price": np.array([4, 5, 6], dtype=np.uint32),
+        },
+        index=_snapshot().index,
+    )
+    NumpyRowHashStore(file_path).save(
+        {"DepotMaster": _snapshot()}, {"DepotMaster": cells}
+    )
+
+    loaded = NumpyRowHashStore(file_path).load_cells("DepotMaster")
+    assert loaded is not None
+    assert loaded.equals(cells)
+    assert JsonRowHashStore(file_path).load_cells("DepotMaster") is None
+
+
+def test_numpy_store_commits_snapshots_and_times_together(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    file_path = str(tmp_path / "sheet_row_hashes.json")
+    store = NumpyRowHashStore(file_path)
+    store.save(
+        {"DepotMaster": _snapshot(), "GateOut": _snapshot()},
+        synced_times={"DepotMaster": "t1", "GateOut": "t1"},
+    )
+
+    # A crash before the manifest is replaced leaves the previous commit in effect
+    write = RowHashStore.atomic_write
+
+    def crash_on_manifest(path: str, *args: object, **kwargs: object) -> None:
+        if path.endswith(NumpyRowHashStore.MANIFEST_FILE):
+            raise OSError("disk full")
+        write(path, *args, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(RowHashStore, "atomic_write", crash_on_manifest)
+    changed = _snapshot() + np.uint64(1)
+    with pytest.raises(OSError):
+        store.save(
+            {"DepotMaster": changed, "GateOut": changed},
+            synced_times={"DepotMaster": "t2", "GateOut": "t2"},
+        )
+    monkeypatch.undo()
+
+    reloaded = NumpyRowHashStore(file_path)
+    assert reloaded.load("DepotMaster").tolist() == _snapshot().tolist()
+    assert reloaded.load("GateOut").tolist() == _snapshot().tolist()
+    assert reloaded.load_synced_time("GateOut") == "t1"
+
+    reloaded.save({"GateOut": changed}, synced_times={"GateOut": "t3"})
+    assert NumpyRowHashStore(file_path).load("GateOut").tolist() == changed.tolist()
+    assert NumpyRowHashStore(file_path).load_synced_time("GateOut") == "t3"
+    assert NumpyRowHashStore(file_path).load_synced_time("DepotMaster") == "t1"
+    assert sorted(p.name for p in (tmp_path / "sheet_row_hashes").glob("*.npy")) == [
+        "DepotMaster.1.npy",
+        "GateOut.2.npy",
+    ]
+
+
+def test_worker_parses_without_a_graph_client(tmp_path: Path) -> None:
+    metadata = {
+        "sheets": [
+            {
+                "name": "Gate Out",
+                "formatted_name": "GateOut",
+                "columns": [
+                    {
+                        "name": "Customer",
+                        "formatted_name": "customer",
+                        "type": "str",
+                        "position": 0,
+                    },
+                    {
+                        "name": "Price",
+                        "formatted_name": "price",
+                        "type": "float",
+                        "position": 1,
+                    },
+                ],
+            }
+        ]
+    }
+    metadata_path = tmp_path / "metadata.json"
+    metadata_path.write_text(json.dumps(metadata))
+    excel_path = tmp_path / "workbook.xlsx"
+    pd.DataFrame({"Customer": ["MAERSK", "MSC"], "Price": [10, 20]}).to_excel(
+        excel_path, sheet_name="Gate Out", index=False
+    )
+
+    df, hashes, cells = _read_and_hash_sheet(
+        str(metadata_path), str(excel_path), "Gate Out", False
+    )
+    assert df.columns.tolist() == ["instance_id", "customer", "price"]
+    assert hashes.index.tolist() == [0, 1]
+    assert cells.columns.tolist() == ["customer", "price"]
+
+
+def test_incomplete_store_fails_when_created() -> None:
+    class LoadOnlyStore(RowHashStore.RowHashStore):
+        def load(self, sheet_name: str) -> pd.Series:
+            return RowHashStore.empty_snapshot()
+
+    with pytest.raises(TypeError):
+        LoadOnlyStore()  # type: ignore[abstract]
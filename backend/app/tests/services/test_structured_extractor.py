@@ -0,0 +1,162 @@
+import base64
+from datetime import datetime
+from io import BytesIO
+from typing import Any
+
+import pandas as pd
+
+from app.api.services.EmailParser import EmailParser
+from app.api.services.StructuredExtractor import extract_attachments
+from app.tests.utils.graph import FakeGraphServer
+
+MAILBOX = "inventory@example.com"
+
+
+def _xlsx(sheets: dict[str, pd.DataFrame]) -> bytes:
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False, header=False)
+    return buffer.getvalue()
+
+
+def test_fields_are_read_from_recognised_headers() -> None:
+    sheet = pd.DataFrame(
+        [
+            ["Stock list May", None, None, None, None],
+            ["Depot", "Size/Type", "Qty.", "Grade", "Unit Price"],
+            ["Rotterdam", "40HC", 12, "CW", 1850.0],
+            [None, None, None, None, None],
+            ["Hamburg", "20DV", 3, "IICL", 1200.5],
+        ]
+    )
+    parsed = extract_attachments(
+        [("stock.xlsx", _xlsx({"Stock": sheet, "Empty": pd.DataFrame()}))]
+    )
+
+    assert parsed is not None
+    assert parsed["items"] == [
+        {
+            "Country": None,
+            "Location": "Rotterdam",
+            "Qty": 12,
+            "Size": "40HC",
+            "Condition": "CW",
+            "Specs": None,
+            "Price": 1850,
+            "Vendor": None,
+            "Availability": None,
+        },
+        {
+            "Country": None,
+            "Location": "Hamburg",
+            "Qty": 3,
+            "Size": "20DV",
+            "Condition": "IICL",
+            "Specs": None,
+            "Price": 1200.5,
+            "Vendor": None,
+            "Availability": None,
+        },
+    ]
+
+
+def test_csv_values_and_dates() -> None:
+    csv = b"Country,City,Quantity,Available From\nNL,Rotterdam,5,2024-06-01\n"
+    parsed = extract_attachments([("offer.csv", csv), ("logo.png", b"\x89PNG")])
+
+    assert parsed is not None
+    assert parsed["items"][0]["Availability"] == "2024-06-01"
+    assert parsed["items"][0]["Qty"] == "5"
+    dated = extract_attachments(
+        [
+            (
+                "dates.xlsx",
+                _xlsx(
+                    {
+                        "S": pd.DataFrame(
+                            [
+                                ["Location", "Qty", "ETA"],
+                                ["Oslo", 1, datetime(2024, 6, 1)],
+                            ]
+                        )
+                    }
+                ),
+            )
+        ]
+    )
+    assert dated is not None
+    assert dated["items"][0]["Availability"] == "2024-06-01T00:00:00"
+
+
+def test_unstructured_input_falls_back_to_the_llm() -> None:
+    unknown = b"Notes,Comment\nfoo,bar\n"
+    table = b"Location,Qty,Size\nOslo,1,20DV\n"
+
+    assert extract_attachments([]) is None
+    assert extract_attachments([("notes.csv", unknown)]) is None
+    assert (
+        extract_attachments([("offer.txt", b"20 units"), ("offer.csv", table)]) is None
+    )
+    assert extract_attachments([("broken.xlsx", b"not a workbook")]) is None
+
+
+class _NoLLMParser(EmailParser):
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.prompts: list[str] = []
+
+    def parse_with_azure_openai(
+        self, email_text: str, attachment_text: str = ""
+    ) -> dict[str, Any]:
+        self.prompts.append(email_text)
+        return {"Qty": "from llm"}
+
+
+def test_process_messages_only_prompts_for_unstructured_mail() -> None:
+    attachments = {
+        "msg-table": ("offer.csv", b"Location,Qty,Size\nOslo,1,20DV\n"),
+        "msg-text": ("offer.txt", b"one 20DV in Oslo"),
+    }
+    with FakeGraphServer() as server:
+        for mid, (name, content) in attachments.items():
+
+            def respond(
+                _query: dict[str, list[str]],
+                _body: Any,
+                name: str = name,
+                content: bytes = content,
+            ) -> tuple[Any, ...]:
+                return (
+                    200,
+                    {
+                        "body": {"content": "See attached"},
+                        "attachments": [
+                            {
+                                "@odata.type": "#microsoft.graph.fileAttachment",
+                                "name": name,
+                                "contentBytes": base64.b64encode(content).decode(),
+                            }
+                        ],
+                    },
+                )
+
+            server.route("GET", f"/users/{MAILBOX}/messages/{mid}", respond)
+        parser = _NoLLMParser(server.client(), MAILBOX)
+        emails: list[dict[str, Any]] = [
+            {
+                "id": mid,
+                "subject": mid,
+                "from": "v@example.com",
+                "received": None,
+                "to": [],
+            }
+            for mid in attachments
+        ]
+
+        results = parser.process_messages(emails)
+
+    assert results[0]["parsed"]["extracted_by"] == "rules"
+    assert results[0]["parsed"]["items"][0]["Location"] == "Oslo"
+    assert results[1]["parsed"] == {"Qty": "from llm"}
+    assert len(parser.prompts) == 1
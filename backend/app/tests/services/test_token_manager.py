@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Any
+
+from app.api.services.TokenManager import TokenManager
+
+
+class _FakeMsalApp:
+    def __init__(self, expires_in: float = 3600, fail: int = 0) -> None:
+        self.expires_in = expires_in
+        self.fail = fail
+        self.calls = 0
+        self.removed = 0
+        self._lock = threading.Lock()
+
+    def acquire_token_for_client(self, scopes: list[str]) -> dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            if self.fail:
+                self.fail -= 1
+                return {"error": "temporarily_unavailable"}
+            return {
+                "access_token": f"token-{self.calls}",
+                "expires_in": self.expires_in,
+            }
+
+    def remove_tokens_for_client(self) -> None:
+        self.removed += 1
+
+
+def _manager(
+    app: _FakeMsalApp, refresh_margin: float = 60, retry_seconds: float = 0.01
+) -> TokenManager:
+    return TokenManager(
+        "client",
+        "tenant",
+        "secret",
+        refresh_margin=refresh_margin,
+        retry_seconds=retry_seconds,
+        app=app,
+    )
+
+
+def _wait_for(condition: Any, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_token_is_fetched_once_and_shared_across_threads() -> None:
+    app = _FakeMsalApp()
+    manager = _manager(app)
+    tokens: list[str] = []
+    threads = [
+        threading.Thread(target=lambda: tokens.append(manager.get_token()))
+        for _ in range(20)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    manager.stop()
+
+    assert tokens == ["token-1"] * 20
+    assert app.calls == 1
+
+
+def test_token_is_refreshed_before_it_expires() -> None:
+    # Expires in 10s, refreshed 9.95s early: the refresher runs again without any caller
+    app = _FakeMsalApp(expires_in=10)
+    manager = _manager(app, refresh_margin=9.95)
+    assert manager.get_token() == "token-1"
+
+    assert _wait_for(lambda: app.calls >= 2)
+    assert manager.get_token() != "token-1"
+    manager.stop()
+
+
+def test_failed_refresh_is_retried() -> None:
+    app = _FakeMsalApp(fail=2)
+    manager = _manager(app)
+
+    assert manager.get_token() == "token-3"
+    manager.stop()
+
+
+def test_invalidate_fetches_a_new_token() -> None:
+    app = _FakeMsalApp()
+    manager = _manager(app)
+    assert manager.get_token() == "token-1"
+
+    manager.invalidate()
+    assert manager.get_token() == "token-2"
+    assert app.removed == 1
+    manager.stop()
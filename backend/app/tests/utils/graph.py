@@ -0,0 +1,135 @@
+import json
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from app.api.services.GraphClient import GraphClient
+
+# (query, json body) -> (status, json payload[, headers])
+Responder = Callable[[dict[str, list[str]], Any], tuple[Any, ...]]
+
+
+class StaticTokens:
+    """Token manager stand-in handing out numbered tokens; invalidate() moves to the next."""
+
+    def __init__(self) -> None:
+        self.issued = 1
+
+    def get_token(self) -> str:
+        return f"test-token-{self.issued}"
+
+    def cached_token(self) -> str:
+        return self.get_token()
+
+    def invalidate(self) -> None:
+        self.issued += 1
+
+
+class FakeGraphServer:
+    """
+    Local stand-in for the Graph API. Register a responder per (method, path);
+    every request is recorded as (method, path, query), with the client address it
+    came in on in `connections` and its Authorization header in `authorization`.
+    POST /$batch is answered from the same routes, and its sub-requests are recorded
+    in `batched`.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], Responder] = {}
+        self.requests: list[tuple[str, str, dict[str, list[str]]]] = []
+        self.connections: list[tuple[str, int]] = []
+        self.authorization: list[str | None] = []
+        self.batched: list[tuple[str, str, dict[str, list[str]]]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def route(self, method: str, path: str, responder: Responder) -> None:
+        self.routes[(method, path)] = responder
+
+    def dispatch(
+        self, method: str, path: str, query: dict[str, list[str]], body: Any
+    ) -> tuple[int, Any, dict[str, str]]:
+        """(status, payload, headers) of the responder for a request."""
+        if (method, path) not in self.routes and (method, path) == ("POST", "/$batch"):
+            return (
+                200,
+                {"responses": [self._sub_response(r) for r in body["requests"]]},
+                {},
+            )
+        responder = self.routes.get((method, path))
+        if responder is None:
+            return 404, {"error": {"code": "itemNotFound"}}, {}
+        with self._lock:
+            status, payload, *rest = responder(query, body)
+        return status, payload, rest[0] if rest else {}
+
+    def _sub_response(self, request: dict[str, Any]) -> dict[str, Any]:
+        parts = urlsplit(request["url"])
+        path, query = unquote(parts.path), parse_qs(parts.query)
+        self.batched.append((request["method"], path, query))
+        status, payload, headers = self.dispatch(
+            request["method"], path, query, request.get("body")
+        )
+        return {
+            "id": request["id"],
+            "status": status,
+            "headers": headers,
+            "body": payload,
+        }
+
+    def client(self) -> GraphClient:
+        """A GraphClient pointed at this server, with authentication skipped."""
+        return GraphClient(graph_api=self.url, token_manager=StaticTokens())  # type: ignore[arg-type]
+
+    def __enter__(self) -> "FakeGraphServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so connection reuse can be observed
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self) -> None:
+                parts = urlsplit(self.path)
+                path = unquote(parts.path)
+                query = parse_qs(parts.query)
+                server.authorization.append(self.headers.get("Authorization"))
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                server.requests.append((self.command, path, query))
+                server.connections.append(self.client_address)
+
+                status, payload, headers = server.dispatch(
+                    self.command, path, query, body
+                )
+
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
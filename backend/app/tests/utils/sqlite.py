@@ -0,0 +1,26 @@
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+
+def sqlite_engine(*models: type[SQLModel]) -> Engine:
+    """In-memory SQLite with the tables of the given models, one connection shared by all threads."""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(
+        engine,
+        tables=[model.__table__ for model in models],  # type: ignore[attr-defined]
+    )
+    return engine
+
+
+def sqlite_session(*models: type[SQLModel], rows: Iterable[Any] = ()) -> Session:
+    """A session on sqlite_engine(*models), with rows already committed."""
+    session = Session(sqlite_engine(*models))
+    session.add_all(rows)
+    session.commit()
+    return session